@@ -0,0 +1,237 @@
+import asyncio
+import ipaddress
+import json
+import math
+import os
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+import metrics
+
+# Writes are refused with 503 while more requests than this are in flight...
+SHED_MAX_IN_FLIGHT = int(os.environ.get("SHED_MAX_IN_FLIGHT", "200"))
+# ...or while the event loop runs this late
+SHED_MAX_LOOP_LAG_MS = float(os.environ.get("SHED_MAX_LOOP_LAG_MS", "250"))
+LOOP_LAG_PROBE_SECONDS = 0.1
+# Idle client buckets are dropped this often, and the oldest when there are more than the maximum
+RATE_LIMIT_SWEEP_SECONDS = 60.0
+RATE_LIMIT_MAX_CLIENTS = int(os.environ.get("RATE_LIMIT_MAX_CLIENTS", "100000"))
+
+_READ_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+class Rate(NamedTuple):
+    per_second: float
+    burst: float
+
+
+def parse_rate(value: str) -> Rate:
+    """Rate from "<requests per second>/<burst>", e.g. "0.2/10" """
+    per_second, burst = value.split("/")
+    return Rate(float(per_second), float(burst))
+
+
+class TokenBuckets:
+    """Token buckets by key, each stored as (tokens, updated_at).
+
+    A missing key is a full bucket, so buckets that have refilled are
+    dropped by sweep() without changing any outcome.
+    """
+
+    def __init__(self, rate: Rate, max_keys: int = RATE_LIMIT_MAX_CLIENTS):
+        self.rate = rate
+        self.max_keys = max_keys
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+
+    def available(self, key: str, now: float) -> float:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            return self.rate.burst
+        tokens, updated_at = bucket
+        return min(self.rate.burst, tokens + (now - updated_at) * self.rate.per_second)
+
+    def take(self, key: str, tokens: float, now: float):
+        """Spend one token from a bucket holding tokens"""
+        self._buckets[key] = (tokens - 1.0, now)
+
+    def retry_after(self, tokens: float) -> float:
+        """Seconds until a bucket holding tokens has one to spend"""
+        if self.rate.per_second <= 0:
+            return RATE_LIMIT_SWEEP_SECONDS
+        return (1.0 - tokens) / self.rate.per_second
+
+    def sweep(self, now: float):
+        full = [key for key in self._buckets if self.available(key, now) >= self.rate.burst]
+        for key in full:
+            del self._buckets[key]
+        # Insertion order is creation order, so the oldest clients go first
+        for key in list(self._buckets)[: max(0, len(self._buckets) - self.max_keys)]:
+            del self._buckets[key]
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class _Limit:
+    def __init__(self, name: str, method: str, path: str, per_client: Rate, overall: Rate):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.clients = TokenBuckets(per_client)
+        self.overall = TokenBuckets(overall)
+
+    def matches(self, method: str, path: str) -> bool:
+        if method != self.method:
+            return False
+        return path == self.path or (self.path.endswith("/") and path.startswith(self.path))
+
+    def admit(self, client: str, now: float) -> Optional[float]:
+        """None once a token is spent from both buckets, else seconds to wait"""
+        own = self.clients.available(client, now)
+        if own < 1.0:
+            return self.clients.retry_after(own)
+        shared = self.overall.available("", now)
+        if shared < 1.0:
+            return self.overall.retry_after(shared)
+        self.clients.take(client, own, now)
+        self.overall.take("", shared, now)
+        return None
+
+
+_limits: List[_Limit] = []
+
+
+def register(name: str, method: str, path: str, per_client: Rate, overall: Rate):
+    """Rate-limit requests to path (or under it, when it ends in /) per client IP and in total.
+
+    Each limit can be overridden with RATE_LIMIT_<NAME>_PER_CLIENT and
+    RATE_LIMIT_<NAME>_OVERALL, written as "<per second>/<burst>".
+    """
+    per_client = _configured(f"RATE_LIMIT_{name.upper()}_PER_CLIENT", per_client)
+    overall = _configured(f"RATE_LIMIT_{name.upper()}_OVERALL", overall)
+    _limits.append(_Limit(name, method, path, per_client, overall))
+
+
+def _configured(variable: str, default: Rate) -> Rate:
+    value = os.environ.get(variable)
+    return parse_rate(value) if value else default
+
+
+def client_key(scope: Scope) -> str:
+    """Client IP, with IPv6 clients grouped by /64 since one host usually holds a whole /64.
+
+    Behind a reverse proxy this relies on uvicorn's --proxy-headers to set the real client.
+    """
+    client = scope.get("client")
+    if not client:
+        return ""
+    try:
+        address = ipaddress.ip_address(client[0])
+    except ValueError:
+        return client[0]
+    if address.version == 6 and address.ipv4_mapped is None:
+        return str(ipaddress.ip_network(f"{address}/64", strict=False))
+    return str(address.ipv4_mapped or address)
+
+
+_in_flight = 0
+_loop_lag_ms = 0.0
+_swept_at = 0.0
+_probe: Optional[asyncio.Task] = None
+
+
+async def _probe_loop_lag():
+    global _loop_lag_ms
+    while True:
+        started = time.monotonic()
+        await asyncio.sleep(LOOP_LAG_PROBE_SECONDS)
+        _loop_lag_ms = max(0.0, (time.monotonic() - started - LOOP_LAG_PROBE_SECONDS) * 1000)
+
+
+def start():
+    """Start measuring event-loop lag for the shedder"""
+    global _probe
+    _probe = asyncio.create_task(_probe_loop_lag())
+
+
+async def stop():
+    global _probe
+    if _probe is not None:
+        _probe.cancel()
+        await asyncio.gather(_probe, return_exceptions=True)
+        _probe = None
+
+
+def stats() -> dict:
+    return {
+        "in_flight": _in_flight,
+        "loop_lag_ms": round(_loop_lag_ms, 3),
+        "tracked_clients": {limit.name: len(limit.clients) for limit in _limits},
+    }
+
+
+metrics.register_collector("admission", stats)
+
+
+async def _refuse(send: Send, status: int, detail: str, retry_after: float):
+    body = json.dumps({"detail": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class AdmissionMiddleware:
+    """Refuse writes before they reach a route when limits are hit.
+
+    Registered rate limits answer 429 and writes are shed with 503 while
+    the worker is overloaded, both with Retry-After and without reading
+    the body. Reads are only counted, so they keep their latency.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        global _in_flight
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        method = scope["method"]
+        if method not in _READ_METHODS:
+            refusal = self._check(method, scope)
+            if refusal is not None:
+                await _refuse(send, *refusal)
+                return
+        _in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _in_flight -= 1
+
+    def _check(self, method: str, scope: Scope) -> Optional[Tuple[int, str, float]]:
+        global _swept_at
+        if _in_flight >= SHED_MAX_IN_FLIGHT or _loop_lag_ms >= SHED_MAX_LOOP_LAG_MS:
+            metrics.counter("admission.shed").inc()
+            return 503, "Server busy, try again shortly", 1.0
+        now = time.monotonic()
+        if now - _swept_at >= RATE_LIMIT_SWEEP_SECONDS:
+            _swept_at = now
+            for limit in _limits:
+                limit.clients.sweep(now)
+        path = scope["path"]
+        for limit in _limits:
+            if limit.matches(method, path):
+                wait = limit.admit(client_key(scope), now)
+                if wait is not None:
+                    metrics.counter(f"admission.rate_limited.{limit.name}").inc()
+                    return 429, "Too many requests", wait
+        return None
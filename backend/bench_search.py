@@ -0,0 +1,87 @@
+"""Latency of search_index.search over a synthetic corpus.
+
+Run from backend/: python bench_search.py [documents] [queries]
+
+Documents are built by mixing the words of the seeded programs, events
+and leadership bios, in both languages, across the four indexed
+collections. Each query is run once before timing, since a term's
+postings are sorted on its first lookup. The target is a p99 under 5 ms
+at 10,000 documents.
+"""
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "bench")
+
+import search  # noqa: E402
+from routes.events_routes import DEFAULT_EVENTS  # noqa: E402
+from routes.leadership_routes import DEFAULT_LEADERSHIP  # noqa: E402
+from routes.programs_routes import DEFAULT_PROGRAMS  # noqa: E402
+
+QUERIES = [
+    "soccer", "socc", "tournoi", "famille", "evenement", "événements communautaires",
+    "youth leadership", "jeunes", "career workshops", "culturel", "Marie", "de",
+    "summer soccer tournament", "développement des jeunes", "festival", "mentorat",
+]
+
+
+def _vocabulary(lang: str):
+    words = []
+    for doc in [*DEFAULT_PROGRAMS, *DEFAULT_EVENTS, *DEFAULT_LEADERSHIP]:
+        for key, value in doc.items():
+            if key.endswith(f"_{lang}") and isinstance(value, str):
+                words.extend(value.split())
+    return words
+
+
+def _corpus(count: int, rng: random.Random):
+    words = {lang: _vocabulary(lang) for lang in ("en", "fr")}
+    sources = list(search.search_index.sources.values())
+
+    def text(lang, n):
+        return " ".join(rng.choices(words[lang], k=n))
+
+    for i in range(count):
+        source = sources[i % len(sources)]
+        doc = {"id": f"doc-{i}", "name": f"Person {i}"}
+        for lang in ("en", "fr"):
+            for field in source.fields:
+                doc[f"{field}_{lang}"] = text(lang, 4 if field in ("title", "name", "role") else 40)
+        yield source, doc
+
+
+async def main(count: int, queries: int):
+    rng = random.Random(7)
+    index = search.search_index
+    started = time.perf_counter()
+    for source, doc in _corpus(count, rng):
+        index.add(source, doc)
+    index.built_at = time.monotonic()
+    build = time.perf_counter() - started
+
+    for query in QUERIES:
+        index.search(query)
+    timings = []
+    for i in range(queries):
+        query = QUERIES[i % len(QUERIES)]
+        lang = (None, "en", "fr")[i % 3]
+        started = time.perf_counter()
+        index.search(query, lang)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+
+    print(f"{count} documents indexed in {build:.2f} s, {index.stats()['terms']} terms")
+    print(f"{queries} queries: p50 {statistics.median(timings):.3f} ms, "
+          f"p99 {timings[int(len(timings) * 0.99) - 1]:.3f} ms, max {timings[-1]:.3f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 10000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 2000,
+    ))
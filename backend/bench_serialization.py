@@ -0,0 +1,85 @@
+"""Per-item cost of encoding the events list, by serialization path.
+
+Run from backend/: python bench_serialization.py [items] [rounds]
+
+- fastapi: returning dicts with response_model=List[EventResponse]
+  (validate, then serialize_response's encoder, then json.dumps)
+- validate+dump: model_validate + model_dump + json.dumps per item
+- trusted: serialization.encode_list (dicts dumped against a precompiled
+  TypeAdapter of the model's TypedDict shape)
+"""
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import List
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "bench")
+
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.utils import create_response_field  # noqa: E402
+
+import serialization  # noqa: E402
+from repository import to_response  # noqa: E402
+from routes.events_routes import DEFAULT_EVENTS, EventResponse  # noqa: E402
+
+
+def _documents(count: int) -> List[dict]:
+    docs = []
+    for i in range(count):
+        doc = to_response({**DEFAULT_EVENTS[i % len(DEFAULT_EVENTS)], "_id": f"event-{i}", "order": i})
+        doc["media"] = {
+            "id": f"asset-{i}",
+            "key": doc["media_key"],
+            "url": doc["image_url"],
+            "alt_en": doc["title_en"],
+            "alt_fr": doc["title_fr"],
+        }
+        docs.append(doc)
+    return docs
+
+
+async def _fastapi(docs: List[dict]) -> bytes:
+    field = create_response_field(name="Response_list_events", type_=List[EventResponse])
+    content = await serialize_response(field=field, response_content=docs)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+async def _validate_dump(docs: List[dict]) -> bytes:
+    data = [EventResponse.model_validate(doc).model_dump(mode="json") for doc in docs]
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+async def _trusted(docs: List[dict]) -> bytes:
+    return serialization.encode_list(EventResponse, docs)
+
+
+async def _measure(encode, docs: List[dict], rounds: int) -> float:
+    await encode(docs)  # Warm up adapters and caches
+    started = time.perf_counter()
+    for _ in range(rounds):
+        await encode(docs)
+    return (time.perf_counter() - started) / (rounds * len(docs))
+
+
+async def main(items: int, rounds: int):
+    docs = _documents(items)
+    expected = json.loads(await _fastapi(docs))
+    results = {}
+    for name, encode in (("fastapi", _fastapi), ("validate+dump", _validate_dump), ("trusted", _trusted)):
+        assert json.loads(await encode(docs)) == expected, f"{name} output differs"
+        results[name] = await _measure(encode, docs, rounds)
+
+    baseline = results["fastapi"]
+    print(f"{items} events x {rounds} rounds")
+    for name, per_item in results.items():
+        print(f"  {name:<14} {per_item * 1e6:8.2f} us/item  {baseline / per_item:5.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 100,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 200,
+    ))
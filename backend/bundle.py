@@ -0,0 +1,83 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, List, NamedTuple, Optional, Sequence
+
+from cache import content_cache
+from responses import Loaded, cached_body
+
+
+def _by_language(lang: Optional[str]) -> Hashable:
+    return lang
+
+
+class Section(NamedTuple):
+    collection: str
+    load: Callable[[Optional[str]], Awaitable[Loaded]]
+    variant: Callable[[Optional[str]], Hashable]
+    best: bool
+
+
+# Public reads each route module contributes to the site bundle, by section name
+_sections: Dict[str, Section] = {}
+
+# Sections each frontend page renders on first load
+PAGES: Dict[str, Sequence[str]] = {
+    "home": ("hero", "programs", "upcoming_events", "media"),
+    "about": ("about", "leadership", "media"),
+    "programs": ("programs", "media"),
+    "gallery": ("gallery", "media"),
+    "events": ("events", "media"),
+}
+
+
+def register(
+    section: str,
+    collection: str,
+    load: Callable[[Optional[str]], Awaitable[Loaded]],
+    variant: Optional[Callable[[Optional[str]], Hashable]] = None,
+    best: bool = True,
+):
+    """Declare a section: the collection it reads and the loader of its JSON body.
+
+    load(lang) renders both languages when lang is None, else only that one.
+    A section that also changes with time passes variant(lang), the
+    content_cache variant its body is kept under; sharing it with the
+    matching GET endpoint shares the cached body too.
+    """
+    _sections[section] = Section(collection, load, variant or _by_language, best)
+
+
+def sections_for(page: Optional[str]) -> List[str]:
+    """Section names for a page, or every registered section when page is None"""
+    if page is None:
+        return sorted(_sections)
+    return [name for name in PAGES[page] if name in _sections]
+
+
+def collections_for(page: Optional[str]) -> List[str]:
+    """Every collection whose writes change the bundle for a page"""
+    collections = {}
+    for name in sections_for(page):
+        collections.update(dict.fromkeys(content_cache.sources(_sections[name].collection)))
+    return list(collections)
+
+
+def variant(page: Optional[str], lang: Optional[str] = None) -> Hashable:
+    """The content_cache variant of a page's bundle, which changes along with any of its sections'"""
+    return (page, tuple(_sections[name].variant(lang) for name in sections_for(page)))
+
+
+async def render(page: Optional[str], lang: Optional[str] = None) -> bytes:
+    """One JSON object holding every section of a page.
+
+    Sections are fetched concurrently through content_cache, so a section
+    that has not changed is reused as-is and its body is spliced in
+    without being decoded again.
+    """
+    names = sections_for(page)
+    bodies = await asyncio.gather(*(_section_body(_sections[name], lang) for name in names))
+    parts = [b'"%s":%s' % (name.encode("ascii"), entry.body) for name, entry in zip(names, bodies)]
+    return b"{" + b",".join(parts) + b"}"
+
+
+async def _section_body(section: Section, lang: Optional[str]):
+    return await cached_body(section.collection, lambda: section.load(lang), section.variant(lang), best=section.best)
@@ -0,0 +1,153 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Sequence, Tuple
+
+import metrics
+
+
+class TTLCache:
+    """Size-bounded LRU cache whose entries also expire after a TTL"""
+
+    def __init__(self, name: str, maxsize: int = 256, ttl: float = 60.0):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        metrics.register_collector(f"cache.{name}", self.stats)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        self._entries[key] = (value, time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable):
+        if self._entries.pop(key, None) is not None:
+            self.invalidations += 1
+
+    def invalidate_where(self, predicate: Callable[[Hashable], bool]):
+        for key in [k for k in self._entries if predicate(k)]:
+            del self._entries[key]
+            self.invalidations += 1
+
+    def clear(self):
+        self.invalidations += len(self._entries)
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+        }
+
+
+class ResponseCache:
+    """Serialized responses keyed by (name, variant).
+
+    The name is normally a collection. A response built from several
+    collections is stored with depends_on listing them, per variant, since
+    each variant (e.g. each page of the site bundle) may read different
+    collections. A write to a collection calls invalidate(collection), which drops every
+    cached variant built from it and bumps the collection version. The TTL
+    is only a safety net for writes this process never saw (e.g. other
+    workers).
+    """
+
+    def __init__(self, name: str, maxsize: int = 512, ttl: float = 300.0):
+        self._entries = TTLCache(name, maxsize=maxsize, ttl=ttl)
+        self._versions: dict = {}
+        self._loading: dict = {}
+        self._dependencies: Dict[str, Tuple[str, ...]] = {}
+        self._entry_dependencies: Dict[Hashable, Tuple[str, ...]] = {}
+
+    def version(self, collection: str) -> int:
+        return self._versions.get(collection, 0)
+
+    def sources(self, name: str) -> Tuple[str, ...]:
+        """The collections whose writes invalidate entries stored under name"""
+        return self._dependencies.get(name, (name,))
+
+    def depends(self, name: str, *collections: str):
+        """Also invalidate entries stored under name when any of collections changes"""
+        self._dependencies[name] = tuple(dict.fromkeys((*self.sources(name), *collections)))
+
+    def _entry_sources(self, key: Hashable) -> Tuple[str, ...]:
+        """The collections one (name, variant) entry was built from"""
+        return self._entry_dependencies.get(key) or self.sources(key[0])
+
+    def invalidate(self, collection: str):
+        self._versions[collection] = self.version(collection) + 1
+        self._entries.invalidate_where(lambda key: collection in self._entry_sources(key))
+
+    async def get_or_load(
+        self,
+        collection: str,
+        load: Callable,
+        variant: Hashable = None,
+        depends_on: Optional[Sequence[str]] = None,
+    ) -> Any:
+        """Return the cached value, calling load() once on a miss even under concurrency"""
+        key = (collection, variant)
+        if depends_on is not None:
+            self._entry_dependencies[key] = tuple(depends_on)
+        value = self._entries.get(key)
+        if value is not None:
+            return value
+
+        pending = self._loading.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        sources = self._entry_sources(key)
+        versions = [self.version(source) for source in sources]
+        future = asyncio.get_running_loop().create_future()
+        self._loading[key] = future
+        try:
+            value = await load()
+        except BaseException as e:
+            if isinstance(e, Exception):
+                future.set_exception(e)
+                future.exception()  # Mark retrieved when nobody else is waiting
+            else:
+                future.cancel()
+            raise
+        finally:
+            self._loading.pop(key, None)
+        # Skip storing if a write landed while we were loading
+        if [self.version(source) for source in sources] == versions:
+            self._entries.set(key, value)
+        future.set_result(value)
+        return value
+
+
+content_cache = ResponseCache(
+    "content",
+    ttl=float(os.environ.get("CONTENT_CACHE_TTL_SECONDS", "300")),
+)
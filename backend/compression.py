@@ -0,0 +1,143 @@
+import gzip
+import os
+from typing import Dict, Optional
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+import metrics
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+# Bodies smaller than this are sent as they are
+COMPRESSION_MIN_BYTES = int(os.environ.get("COMPRESSION_MIN_BYTES", "1024"))
+# Bodies at least this large are compressed in a worker thread, not on the event loop
+COMPRESSION_THREADPOOL_BYTES = int(os.environ.get("COMPRESSION_THREADPOOL_BYTES", str(32 * 1024)))
+# Levels for responses compressed per request; the fixed public reads are
+# compressed once per content version, so they use the slowest, smallest settings
+GZIP_LEVEL = int(os.environ.get("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.environ.get("BROTLI_QUALITY", "5"))
+
+# Supported encodings, preferred first
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+    "text/",
+)
+
+
+def negotiate(accept_encoding: Optional[str]) -> Optional[str]:
+    """The encoding to use for an Accept-Encoding header, or None for identity"""
+    if not accept_encoding:
+        return None
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip()] = quality
+    for encoding in ENCODINGS:
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+def compress(body: bytes, encoding: str, best: bool = False) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=11 if best else BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=9 if best else GZIP_LEVEL, mtime=0)
+
+
+def precompress(body: bytes, best: bool = True) -> Dict[str, bytes]:
+    """Body in every supported encoding that makes it smaller; empty when it is too small"""
+    if len(body) < COMPRESSION_MIN_BYTES:
+        return {}
+    encoded = {encoding: compress(body, encoding, best) for encoding in ENCODINGS}
+    return {encoding: data for encoding, data in encoded.items() if len(data) < len(body)}
+
+
+def record(original: int, sent: int):
+    metrics.counter("compression.responses").inc()
+    metrics.counter("compression.bytes_saved").inc(original - sent)
+
+
+def _compressible(headers: MutableHeaders) -> bool:
+    content_type = headers.get("content-type", "")
+    return "content-encoding" not in headers and content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+class CompressionMiddleware:
+    """Compress text and JSON responses with the client's preferred encoding.
+
+    Only complete 200 responses are compressed. Anything already encoded
+    (such as the precompressed bodies cached_json sends), smaller than
+    COMPRESSION_MIN_BYTES, or streamed in several body messages passes
+    through untouched. Bodies of COMPRESSION_THREADPOOL_BYTES or more are
+    compressed in a worker thread so other requests keep being served.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESSION_MIN_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        held: Optional[Message] = None
+
+        async def send_compressed(message: Message):
+            nonlocal held
+            if message["type"] == "http.response.start":
+                held = message
+                return
+            if held is None:
+                await send(message)
+                return
+            start, held = held, None
+            headers = MutableHeaders(raw=start["headers"])
+            body = message.get("body", b"")
+            if (
+                message["type"] == "http.response.body"
+                and not message.get("more_body", False)
+                and start["status"] == 200
+                and len(body) >= self.minimum_size
+                and _compressible(headers)
+            ):
+                if len(body) >= COMPRESSION_THREADPOOL_BYTES:
+                    compressed = await run_in_threadpool(compress, body, encoding)
+                else:
+                    compressed = compress(body, encoding)
+                if len(compressed) < len(body):
+                    record(len(body), len(compressed))
+                    headers["content-encoding"] = encoding
+                    headers["content-length"] = str(len(compressed))
+                    etag = headers.get("etag")
+                    if etag and not etag.startswith("W/"):
+                        # The bytes differ from the identity response's
+                        headers["etag"] = "W/" + etag
+                    headers.add_vary_header("Accept-Encoding")
+                    message = {**message, "body": compressed}
+            await send(start)
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
@@ -1,11 +1,91 @@
 import os
+import time
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
 from dotenv import load_dotenv
 from pathlib import Path
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / ".env")
 
+
+class PoolStats(monitoring.ConnectionPoolListener):
+    """Track connection pool usage so readiness checks can report it"""
+
+    def __init__(self):
+        self.open = 0
+        self.checked_out = 0
+        self.checkout_failures = 0
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self.open += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self.open -= 1
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        self.checkout_failures += 1
+
+    def connection_checked_out(self, event):
+        self.checked_out += 1
+
+    def connection_checked_in(self, event):
+        self.checked_out -= 1
+
+    def snapshot(self) -> dict:
+        return {
+            "open": self.open,
+            "checked_out": self.checked_out,
+            "checkout_failures": self.checkout_failures,
+        }
+
+
+pool_stats = PoolStats()
+
+# Single client shared by the app and every route module
 mongo_url = os.environ["MONGO_URL"]
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncIOMotorClient(
+    mongo_url,
+    maxPoolSize=int(os.environ.get("MONGO_MAX_POOL_SIZE", "50")),
+    minPoolSize=int(os.environ.get("MONGO_MIN_POOL_SIZE", "2")),
+    maxIdleTimeMS=int(os.environ.get("MONGO_MAX_IDLE_TIME_MS", "60000")),
+    serverSelectionTimeoutMS=int(os.environ.get("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000")),
+    event_listeners=[pool_stats],
+)
 db = client[os.environ["DB_NAME"]]
+
+
+async def ping() -> float:
+    """Ping the server and return the round trip in milliseconds"""
+    started = time.perf_counter()
+    await client.admin.command("ping")
+    return (time.perf_counter() - started) * 1000
+
+
+def pool_info() -> dict:
+    """Configured pool limits plus live connection counts"""
+    options = client.options.pool_options
+    return {
+        "max_pool_size": options.max_pool_size,
+        "min_pool_size": options.min_pool_size,
+        "max_idle_time_ms": int(options.max_idle_time_seconds * 1000) if options.max_idle_time_seconds else None,
+        **pool_stats.snapshot(),
+    }
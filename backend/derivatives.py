@@ -0,0 +1,123 @@
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+from PIL import Image, ImageOps
+
+import metrics
+
+# Widths generated for each stored image that is wider than them
+DERIVATIVE_WIDTHS = tuple(
+    sorted(int(w) for w in os.environ.get("IMAGE_DERIVATIVE_WIDTHS", "320,640,1280").split(","))
+)
+WEBP_QUALITY = int(os.environ.get("IMAGE_WEBP_QUALITY", "80"))
+JPEG_QUALITY = int(os.environ.get("IMAGE_JPEG_QUALITY", "82"))
+IMAGE_WORKERS = int(os.environ.get("IMAGE_WORKERS", "2"))
+
+# Output formats in order of preference when the client accepts them
+FORMATS = (
+    ("webp", ".webp", "image/webp"),
+    ("jpeg", ".jpg", "image/jpeg"),
+)
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def variant_path(original: Path, width: int, extension: str) -> Path:
+    """<sha>.png -> <sha>.w640.webp, next to the original"""
+    return original.with_name(f"{original.stem}.w{width}{extension}")
+
+
+def variant_paths(original: Path) -> Iterator[Path]:
+    """Every derivative that may exist for an original"""
+    for width in DERIVATIVE_WIDTHS:
+        for _, extension, _ in FORMATS:
+            yield variant_path(original, width, extension)
+
+
+def variant_candidates(original: Path, width: int, accept: str) -> List[Tuple[Path, str]]:
+    """Derivatives to try for a display width, best first.
+
+    That is the smallest configured width at least `width` wide, WebP first
+    when the client accepts it. Empty when the request is wider than every
+    derivative, so the original should be served.
+    """
+    for candidate in DERIVATIVE_WIDTHS:
+        if candidate >= width:
+            return [
+                (variant_path(original, candidate, extension), content_type)
+                for _, extension, content_type in FORMATS
+                if content_type != "image/webp" or "image/webp" in accept
+            ]
+    return []
+
+
+def _save(image: Image.Image, path: Path, fmt: str, icc_profile) -> int:
+    tmp_path = path.with_name(path.name + ".part")
+    if fmt == "webp":
+        image.save(tmp_path, "WEBP", quality=WEBP_QUALITY, method=4, icc_profile=icc_profile)
+    else:
+        image.save(tmp_path, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True, icc_profile=icc_profile)
+    os.replace(tmp_path, path)
+    return path.stat().st_size
+
+
+def render_variants(source: str) -> List[dict]:
+    """Write resized WebP and JPEG copies of an image; runs in a worker process.
+
+    Orientation from EXIF is applied to the pixels and the metadata itself
+    is not carried over. Animated images are left alone.
+    """
+    original = Path(source)
+    with Image.open(original) as opened:
+        if getattr(opened, "is_animated", False):
+            return []
+        icc_profile = opened.info.get("icc_profile")
+        image = ImageOps.exif_transpose(opened)
+
+        if image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info):
+            # JPEG has no alpha channel, so flatten onto white
+            rgba = image.convert("RGBA")
+            image = Image.new("RGB", rgba.size, (255, 255, 255))
+            image.paste(rgba, mask=rgba.getchannel("A"))
+        else:
+            image = image.convert("RGB")
+
+        variants = []
+        # Largest first, each step downscaling the previous result
+        for width in sorted((w for w in DERIVATIVE_WIDTHS if w < image.width), reverse=True):
+            height = max(1, round(image.height * width / image.width))
+            image = image.resize((width, height), Image.Resampling.LANCZOS, reducing_gap=3.0)
+            for fmt, extension, _ in FORMATS:
+                size = _save(image, variant_path(original, width, extension), fmt, icc_profile)
+                variants.append({"w": width, "format": fmt, "size": size})
+    return sorted(variants, key=lambda v: (v["w"], v["format"]))
+
+
+def _pool() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        # spawn rather than fork: the parent runs Motor and threadpool threads
+        _executor = ProcessPoolExecutor(IMAGE_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _executor
+
+
+async def render(original: Path) -> List[dict]:
+    """Generate derivatives for a stored image on the process pool"""
+    started = time.perf_counter()
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(_pool(), render_variants, str(original))
+    finally:
+        metrics.timer("images.derivatives").observe(time.perf_counter() - started)
+
+
+def shutdown():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
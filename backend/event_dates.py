@@ -0,0 +1,94 @@
+import os
+import re
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional, Tuple
+from zoneinfo import ZoneInfo
+
+# Naive times from the admin UI are in this zone, and display dates are shown in it
+EVENTS_TIMEZONE = ZoneInfo(os.environ.get("EVENTS_TIMEZONE", "America/Toronto"))
+
+MONTHS = {
+    "en": (
+        "January", "February", "March", "April", "May", "June",
+        "July", "August", "September", "October", "November", "December",
+    ),
+    "fr": (
+        "janvier", "février", "mars", "avril", "mai", "juin",
+        "juillet", "août", "septembre", "octobre", "novembre", "décembre",
+    ),
+}
+
+_MONTH_NUMBERS = {name.lower(): i + 1 for names in MONTHS.values() for i, name in enumerate(names)}
+_MONTH_NUMBERS.update({"fevrier": 2, "aout": 8, "decembre": 12})
+_MONTH = "|".join(sorted(_MONTH_NUMBERS, key=len, reverse=True))
+_DASH = r"\s*[-–]\s*"
+
+# "August 15, 2025" and "August 15-17, 2025"
+_EN_DATE = re.compile(rf"^({_MONTH})\s+(\d{{1,2}})(?:{_DASH}(\d{{1,2}}))?,?\s+(\d{{4}})$", re.IGNORECASE)
+# "15 août 2025", "1er août 2025" and "15-17 août 2025"
+_FR_DATE = re.compile(rf"^(\d{{1,2}})(?:er)?(?:{_DASH}(\d{{1,2}}))?\s+({_MONTH})\s+(\d{{4}})$", re.IGNORECASE)
+
+
+def to_utc(value: datetime) -> datetime:
+    """Naive UTC for storage; naive input is taken as EVENTS_TIMEZONE local time"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=EVENTS_TIMEZONE)
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def from_utc(value: datetime) -> datetime:
+    """A stored naive UTC datetime made timezone-aware"""
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+def _day(value: datetime) -> date:
+    return from_utc(value).astimezone(EVENTS_TIMEZONE).date()
+
+
+def _format_day(day: date, lang: str) -> str:
+    month = MONTHS[lang][day.month - 1]
+    if lang == "fr":
+        return f"{'1er' if day.day == 1 else day.day} {month} {day.year}"
+    return f"{month} {day.day}, {day.year}"
+
+
+def display(starts_at: datetime, ends_at: Optional[datetime], lang: str) -> str:
+    """Localized date of an event, e.g. "August 15–17, 2025" or "15–17 août 2025" """
+    start = _day(starts_at)
+    end = _day(ends_at) if ends_at is not None else start
+    if end <= start:
+        return _format_day(start, lang)
+    if (start.year, start.month) == (end.year, end.month):
+        if lang == "fr":
+            return f"{'1er' if start.day == 1 else start.day}–{_format_day(end, lang)}"
+        return f"{MONTHS[lang][start.month - 1]} {start.day}–{end.day}, {end.year}"
+    return f"{_format_day(start, lang)} – {_format_day(end, lang)}"
+
+
+def parse(text: Optional[str], lang: str) -> Optional[Tuple[datetime, datetime]]:
+    """(starts_at, ends_at) from a legacy display string, or None.
+
+    Both are timezone-aware; a day runs from local midnight to its last second.
+    """
+    if not text:
+        return None
+    text = " ".join(text.split())
+    if lang == "fr":
+        match = _FR_DATE.match(text)
+        if match is None:
+            return None
+        first, last, month, year = match.groups()
+    else:
+        match = _EN_DATE.match(text)
+        if match is None:
+            return None
+        month, first, last, year = match.groups()
+    try:
+        start = datetime(int(year), _MONTH_NUMBERS[month.lower()], int(first))
+        end = start.replace(day=int(last)) if last else start
+    except ValueError:
+        return None
+    if end < start:
+        return None
+    end += timedelta(days=1) - timedelta(seconds=1)
+    return start.replace(tzinfo=EVENTS_TIMEZONE), end.replace(tzinfo=EVENTS_TIMEZONE)
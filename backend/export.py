@@ -0,0 +1,69 @@
+import csv
+import io
+import zlib
+from datetime import datetime
+from typing import Any, AsyncIterator, Sequence, Type
+
+from pydantic import BaseModel
+
+import metrics
+from compression import GZIP_LEVEL
+from serialization import encode_one
+
+# Rows are buffered into chunks of about this size before being sent
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+# Spreadsheets run cells starting with these as formulas
+_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _cell(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+async def csv_chunks(docs: AsyncIterator[dict], columns: Sequence[str]) -> AsyncIterator[bytes]:
+    """CSV with a header row, in chunks of about EXPORT_CHUNK_BYTES"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    rows = 0
+    async for doc in docs:
+        writer.writerow([_cell(doc.get(column)) for column in columns])
+        rows += 1
+        if buffer.tell() >= EXPORT_CHUNK_BYTES:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode("utf-8")
+    metrics.counter("export.rows").inc(rows)
+
+
+async def ndjson_chunks(docs: AsyncIterator[dict], model: Type[BaseModel]) -> AsyncIterator[bytes]:
+    """One JSON document per line, encoded as the list endpoints encode them"""
+    chunk = bytearray()
+    rows = 0
+    async for doc in docs:
+        chunk += encode_one(model, doc)
+        chunk += b"\n"
+        rows += 1
+        if len(chunk) >= EXPORT_CHUNK_BYTES:
+            yield bytes(chunk)
+            chunk.clear()
+    yield bytes(chunk)
+    metrics.counter("export.rows").inc(rows)
+
+
+async def gzipped(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """A gzip file of the chunks, compressed as they arrive"""
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
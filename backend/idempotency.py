@@ -0,0 +1,170 @@
+import hashlib
+import json
+import math
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Iterable, NamedTuple, Optional
+
+from fastapi import HTTPException
+from pymongo import ASCENDING, IndexModel
+from pymongo.errors import DuplicateKeyError
+
+import indexes
+import metrics
+from database import db
+
+# How long a replay of an Idempotency-Key returns the first response
+IDEMPOTENCY_KEY_TTL_SECONDS = float(os.environ.get("IDEMPOTENCY_KEY_TTL_SECONDS", str(24 * 3600)))
+# Without a key, an identical submission this soon after is taken as a duplicate
+DUPLICATE_WINDOW_SECONDS = float(os.environ.get("DUPLICATE_WINDOW_SECONDS", "600"))
+# Keys remembered per bloom filter generation, and the false positive rate at that size
+IDEMPOTENCY_BLOOM_CAPACITY = int(os.environ.get("IDEMPOTENCY_BLOOM_CAPACITY", "100000"))
+IDEMPOTENCY_BLOOM_ERROR_RATE = 0.01
+MAX_KEY_LENGTH = 255
+
+indexes.register("idempotency_keys", IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0))
+
+
+class BloomFilter:
+    """Set membership with false positives but no false negatives, in a bit array"""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str) -> Iterable[int]:
+        # Kirsch-Mitzenmacher: k positions from two halves of one digest
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+    def add(self, key: str):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class Claim(NamedTuple):
+    key: str
+    fingerprint: str
+    response: dict
+    expires_at: datetime
+
+    def document(self) -> dict:
+        return {
+            "_id": self.key,
+            "fingerprint": self.fingerprint,
+            "response": self.response,
+            "expires_at": self.expires_at,
+        }
+
+
+def fingerprint(payload: dict) -> str:
+    """Hash of a submission with whitespace and case normalized, so a resent form matches"""
+    normalized = {
+        name: " ".join(value.split()).casefold() if isinstance(value, str) else value
+        for name, value in payload.items()
+    }
+    return hashlib.sha256(json.dumps(normalized, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def claim_for(collection: str, idempotency_key: Optional[str], payload_fingerprint: str, response: dict) -> Claim:
+    """The key a submission is recorded under: its Idempotency-Key if sent, else its content"""
+    if idempotency_key is not None:
+        if not 0 < len(idempotency_key) <= MAX_KEY_LENGTH:
+            raise HTTPException(status_code=400, detail=f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters")
+        digest = hashlib.sha256(idempotency_key.encode()).hexdigest()
+        key, ttl = f"{collection}:key:{digest}", IDEMPOTENCY_KEY_TTL_SECONDS
+    else:
+        key, ttl = f"{collection}:body:{payload_fingerprint}", DUPLICATE_WINDOW_SECONDS
+    return Claim(key, payload_fingerprint, response, datetime.utcnow() + timedelta(seconds=ttl))
+
+
+class IdempotencyKeys:
+    """Submission keys in the TTL-indexed idempotency_keys collection.
+
+    A claim is inserted under its key's _id before the submission is
+    written, so of two concurrent duplicates only one is stored, on any
+    worker. Each worker keeps a bloom filter of the keys it has seen: a
+    key it has definitely not seen needs no lookup. Two generations are
+    kept, the older dropped every IDEMPOTENCY_KEY_TTL_SECONDS, so every
+    live key stays in one of them.
+    """
+
+    def __init__(self):
+        self._generations = [self._new_filter(), self._new_filter()]
+        self._rotated_at = time.monotonic()
+        metrics.register_collector("idempotency", self.stats)
+
+    @property
+    def collection(self):
+        return db.idempotency_keys
+
+    @staticmethod
+    def _new_filter() -> BloomFilter:
+        return BloomFilter(IDEMPOTENCY_BLOOM_CAPACITY, IDEMPOTENCY_BLOOM_ERROR_RATE)
+
+    def _remember(self, key: str):
+        now = time.monotonic()
+        current = self._generations[0]
+        if now - self._rotated_at >= IDEMPOTENCY_KEY_TTL_SECONDS or current.count >= IDEMPOTENCY_BLOOM_CAPACITY:
+            self._generations = [self._new_filter(), self._generations[0]]
+            self._rotated_at = now
+        self._generations[0].add(key)
+
+    def might_exist(self, key: str) -> bool:
+        return any(key in generation for generation in self._generations)
+
+    async def warm(self):
+        """Load the unexpired keys, so a restarted worker still looks them up"""
+        async for doc in self.collection.find({"expires_at": {"$gt": datetime.utcnow()}}, {"_id": 1}):
+            self._remember(doc["_id"])
+
+    def _replay(self, claim: Claim, stored: dict) -> dict:
+        if stored["fingerprint"] != claim.fingerprint:
+            raise HTTPException(status_code=422, detail="Idempotency-Key was already used for a different request")
+        metrics.counter("idempotency.replays").inc()
+        return stored["response"]
+
+    async def find(self, claim: Claim) -> Optional[dict]:
+        """The response first given for this claim's key, if it is still live"""
+        if not self.might_exist(claim.key):
+            metrics.counter("idempotency.lookups_skipped").inc()
+            return None
+        stored = await self.collection.find_one({"_id": claim.key, "expires_at": {"$gt": datetime.utcnow()}})
+        return self._replay(claim, stored) if stored is not None else None
+
+    async def claim(self, claim: Claim) -> Optional[dict]:
+        """Record a claim, or return the response of the one that got there first"""
+        self._remember(claim.key)
+        try:
+            await self.collection.insert_one(claim.document())
+            return None
+        except DuplicateKeyError:
+            pass
+        stored = await self.collection.find_one({"_id": claim.key})
+        if stored is None or stored["expires_at"] <= datetime.utcnow():
+            # Expired but not yet removed by the TTL monitor
+            await self.collection.replace_one({"_id": claim.key}, claim.document(), upsert=True)
+            return None
+        return self._replay(claim, stored)
+
+    async def release(self, claim: Claim):
+        """Drop a claim whose submission could not be stored"""
+        await self.collection.delete_one({"_id": claim.key, "response.id": claim.response["id"]})
+
+    def stats(self) -> dict:
+        return {
+            "bloom_keys": [generation.count for generation in self._generations],
+            "bloom_bytes": sum(len(generation.bits) for generation in self._generations),
+        }
+
+
+idempotency_keys = IdempotencyKeys()
@@ -0,0 +1,229 @@
+import asyncio
+import logging
+import os
+import re
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List, NamedTuple, Optional, Set, Tuple
+
+from fastapi import UploadFile
+from pymongo import ReturnDocument
+from starlette.concurrency import run_in_threadpool
+
+import derivatives
+import static_files
+from cache import TTLCache
+from database import db
+from uploads import UPLOAD_ROOT, discard, schedule_delete, stream_upload
+
+logger = logging.getLogger(__name__)
+
+# Content-addressed images: one file per distinct content, named by its SHA-256
+STORE_DIR = UPLOAD_ROOT / "store"
+STORE_URL_PREFIX = "/api/uploads/store/"
+
+# Per-section directories used before the store existed; still served and cleaned up
+LEGACY_BUCKETS = ("gallery", "events", "leadership")
+
+_STORE_NAME = re.compile(r"^([0-9a-f]{64})(\.[a-z]+)$")
+_LEGACY_NAME = re.compile(r"^[A-Za-z0-9_-]+\.[A-Za-z]+$")
+
+# Derivative jobs in flight, held so they are not garbage collected
+_pending: Set[asyncio.Task] = set()
+
+# A blob with no recorded variants after this long is not getting any (older than derivatives, or failed)
+DERIVATIVE_GRACE = timedelta(seconds=int(os.environ.get("IMAGE_DERIVATIVE_GRACE_SECONDS", "600")))
+# Blobs whose derivatives are final; only positive answers are kept
+_settled = TTLCache("uploads.derivatives_settled", maxsize=4096, ttl=static_files.STAT_CACHE_TTL_SECONDS)
+
+
+class StoredImage(NamedTuple):
+    digest: str
+    url: str
+    size: int
+    content_type: str
+
+    @property
+    def filename(self) -> str:
+        return self.url[len(STORE_URL_PREFIX):]
+
+
+def blob_path(digest: str, extension: str) -> Path:
+    """Shard by the first two byte pairs so no directory grows too large"""
+    return STORE_DIR / digest[:2] / digest[2:4] / f"{digest}{extension}"
+
+
+def store_url(digest: str, extension: str) -> str:
+    return f"{STORE_URL_PREFIX}{digest}{extension}"
+
+
+def parse_store_name(filename: str) -> Optional[Tuple[str, str]]:
+    match = _STORE_NAME.match(filename)
+    return (match.group(1), match.group(2)) if match else None
+
+
+def parse_store_url(url: str) -> Optional[Tuple[str, str]]:
+    if not url or not url.startswith(STORE_URL_PREFIX):
+        return None
+    # A media URL may ask for a width, e.g. ...png?w=640
+    path = url.split("?", 1)[0].split("#", 1)[0]
+    return parse_store_name(path[len(STORE_URL_PREFIX):])
+
+
+def legacy_file(bucket: str, filename: str) -> Optional[Path]:
+    """The file behind a pre-store upload, or None if the name is not a valid one"""
+    if bucket not in LEGACY_BUCKETS or not _LEGACY_NAME.match(filename):
+        return None
+    return UPLOAD_ROOT / bucket / filename
+
+
+def legacy_path(url: str) -> Optional[Path]:
+    """Map /api/uploads/<bucket>/<file> to its file, or None for anything else"""
+    parts = (url or "").split("/")
+    if len(parts) != 5 or parts[:3] != ["", "api", "uploads"]:
+        return None
+    return legacy_file(parts[3], parts[4])
+
+
+def _move_into_place(tmp_path: Path, final_path: Path) -> bool:
+    """Rename the temp file into the store; False if identical content was already there"""
+    if final_path.exists():
+        discard(tmp_path)
+        # Fresh mtime keeps the garbage collector's grace period from expiring under a re-upload
+        os.utime(final_path)
+        return False
+    final_path.parent.mkdir(parents=True, exist_ok=True)
+    os.replace(tmp_path, final_path)
+    return True
+
+
+async def put(file: UploadFile) -> StoredImage:
+    """Store an uploaded image, reusing the existing file when the content is already known.
+
+    A new blob starts with zero references; acquire() is called when a
+    document starts pointing at it. Resized derivatives of new content are
+    generated in the background.
+    """
+    upload = await stream_upload(file, STORE_DIR)
+    final_path = blob_path(upload.sha256, upload.extension)
+    created = await run_in_threadpool(_move_into_place, upload.path, final_path)
+    result = await db.image_blobs.update_one(
+        {"_id": upload.sha256},
+        {
+            "$setOnInsert": {
+                "ext": upload.extension,
+                "size": upload.size,
+                "content_type": upload.content_type,
+                "refs": 0,
+                "created_at": datetime.utcnow(),
+            }
+        },
+        upsert=True,
+    )
+    if result.upserted_id is not None:
+        # New record: either new content, or content whose deletion is still queued
+        _settled.invalidate(upload.sha256)
+        _schedule_derivatives(upload.sha256, upload.extension)
+    if not created:
+        logger.info("Deduplicated upload %s", upload.sha256)
+    return StoredImage(upload.sha256, store_url(upload.sha256, upload.extension), upload.size, upload.content_type)
+
+
+def _schedule_derivatives(digest: str, extension: str):
+    task = asyncio.create_task(_build_derivatives(digest, extension))
+    _pending.add(task)
+    task.add_done_callback(_pending.discard)
+
+
+async def _build_derivatives(digest: str, extension: str):
+    try:
+        variants = await derivatives.render(blob_path(digest, extension))
+    except Exception as e:
+        logger.warning("Could not generate derivatives for %s: %s", digest, e)
+        return
+    await db.image_blobs.update_one({"_id": digest}, {"$set": {"variants": variants}})
+
+
+async def derivatives_settled(digest: str, extension: str) -> bool:
+    """False while resized copies of a blob may still appear.
+
+    Once the job has recorded its variants (possibly none, for an image
+    narrower than every derivative width), whatever exists is final. Stat
+    misses cached while the job ran are dropped at that point.
+    """
+    if _settled.get(digest):
+        return True
+    blob = await db.image_blobs.find_one({"_id": digest}, {"variants": 1, "created_at": 1})
+    if blob is not None and "variants" not in blob:
+        created_at = blob.get("created_at")
+        if created_at is not None and created_at > datetime.utcnow() - DERIVATIVE_GRACE:
+            return False
+    for path in derivatives.variant_paths(blob_path(digest, extension)):
+        static_files.stat_index.invalidate(path)
+    _settled.set(digest, True)
+    return True
+
+
+def _blob_files(digest: str, extension: str) -> List[Path]:
+    original = blob_path(digest, extension)
+    return [original, *derivatives.variant_paths(original)]
+
+
+async def unrecorded(digest: str) -> bool:
+    """True while no image_blobs record claims digest, i.e. it was not uploaded again"""
+    return await db.image_blobs.find_one({"_id": digest}, {"_id": 1}) is None
+
+
+async def acquire(url: str):
+    """Record one more document referencing url (no-op for non-store URLs).
+
+    The record is recreated if release() or the garbage collector removed
+    it, so a file still on disk is kept from then on.
+    """
+    parsed = parse_store_url(url)
+    if not parsed:
+        return
+    digest, extension = parsed
+    result = await db.image_blobs.update_one(
+        {"_id": digest},
+        {"$inc": {"refs": 1}, "$setOnInsert": {"ext": extension, "created_at": datetime.utcnow()}},
+        upsert=True,
+    )
+    if result.upserted_id is not None and not await run_in_threadpool(blob_path(digest, extension).exists):
+        logger.warning("Image %s is referenced but its file was already deleted", digest)
+
+
+async def release(url: str):
+    """Drop one reference to url and remove the file once nothing points at it.
+
+    Legacy per-section uploads carry no reference count and are removed
+    directly, as before the store existed.
+    """
+    parsed = parse_store_url(url)
+    if parsed is None:
+        path = legacy_path(url)
+        if path is not None:
+            schedule_delete([path])
+            static_files.forget(path)
+        return
+
+    digest, extension = parsed
+    blob = await db.image_blobs.find_one_and_update(
+        {"_id": digest}, {"$inc": {"refs": -1}}, return_document=ReturnDocument.AFTER
+    )
+    if blob is None or blob["refs"] > 0:
+        return
+    # Only delete if no acquire() slipped in since the decrement
+    if await db.image_blobs.find_one_and_delete({"_id": digest, "refs": {"$lte": 0}}):
+        paths = _blob_files(digest, extension)
+        schedule_delete(paths, lambda: unrecorded(digest))
+        for path in paths:
+            static_files.forget(path)
+
+
+async def replace(old_url: str, new_url: str):
+    """Move one reference from old_url to new_url"""
+    if old_url == new_url:
+        return
+    await acquire(new_url)
+    await release(old_url)
@@ -0,0 +1,61 @@
+import logging
+from collections import defaultdict
+from typing import Dict, List
+
+from pymongo import IndexModel
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+# Indexes each route module declares for the collections it queries
+_registry: Dict[str, List[IndexModel]] = defaultdict(list)
+
+
+def register(collection: str, *indexes: IndexModel):
+    """Declare indexes for a collection; applied by ensure_indexes() at startup"""
+    _registry[collection].extend(indexes)
+
+
+def declared() -> Dict[str, List[IndexModel]]:
+    return dict(_registry)
+
+
+async def ensure_indexes(db) -> Dict[str, str]:
+    """Create every declared index. Safe to run repeatedly.
+
+    A failure on one collection (e.g. duplicates blocking a unique index)
+    is logged and reported without stopping the others.
+    """
+    results = {}
+    for collection, indexes in _registry.items():
+        try:
+            await db[collection].create_indexes(indexes)
+            results[collection] = "ok"
+        except OperationFailure as e:
+            logger.error("Could not create indexes on %s: %s", collection, e)
+            results[collection] = str(e)
+    return results
+
+
+async def index_report(db) -> Dict[str, dict]:
+    """Compare declared indexes with what exists, and flag indexes never used.
+
+    Usage counts come from $indexStats and reset when mongod restarts.
+    """
+    report = {}
+    for collection in sorted(_registry):
+        wanted = {index.document["name"] for index in _registry[collection]}
+        existing = set((await db[collection].index_information()).keys())
+        usage = {}
+        try:
+            async for stat in db[collection].aggregate([{"$indexStats": {}}]):
+                usage[stat["name"]] = stat["accesses"]["ops"]
+        except OperationFailure:
+            pass
+        report[collection] = {
+            "missing": sorted(wanted - existing),
+            "undeclared": sorted(existing - wanted - {"_id_"}),
+            "unused": sorted(name for name, ops in usage.items() if ops == 0 and name != "_id_"),
+            "usage": usage,
+        }
+    return report
@@ -0,0 +1,70 @@
+from typing import Any, Dict, Literal, Optional, Tuple, Type, Union, get_args, get_origin
+
+from pydantic import BaseModel, create_model
+
+# Languages every bilingual field is stored in, as <name>_<lang>
+LANGUAGES = ("en", "fr")
+Lang = Literal["en", "fr"]
+
+_models: Dict[Tuple[type, str], Type[BaseModel]] = {}
+
+
+def split_field(name: str) -> Optional[Tuple[str, str]]:
+    """title_fr -> ("title", "fr"); None for fields that are not per-language"""
+    base, _, suffix = name.rpartition("_")
+    if base and suffix in LANGUAGES:
+        return base, suffix
+    return None
+
+
+def projection(model: Type[BaseModel], lang: str) -> Dict[str, int]:
+    """Mongo projection of the model's fields, keeping only one language"""
+    fields = {}
+    for name in model.model_fields:
+        if name == "id":
+            continue
+        split = split_field(name)
+        if split is None or split[1] == lang:
+            fields[name] = 1
+    return fields
+
+
+def localize(value: Any, lang: str) -> Any:
+    """Rename <name>_<lang> keys to <name> and drop other languages, recursively"""
+    if isinstance(value, list):
+        return [localize(item, lang) for item in value]
+    if not isinstance(value, dict):
+        return value
+    result = {}
+    for key, item in value.items():
+        split = split_field(key)
+        if split is None:
+            result[key] = localize(item, lang)
+        elif split[1] == lang:
+            result[split[0]] = item
+    return result
+
+
+def _localized_annotation(annotation: Any) -> Any:
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return localized_model(annotation)
+    if get_origin(annotation) is Union:
+        return Union[tuple(_localized_annotation(arg) for arg in get_args(annotation))]
+    return annotation
+
+
+def localized_model(model: Type[BaseModel]) -> Type[BaseModel]:
+    """The single-language shape of a bilingual model, e.g. title_en/title_fr -> title"""
+    key = (model, "localized")
+    if key not in _models:
+        fields = {}
+        for name, info in model.model_fields.items():
+            split = split_field(name)
+            if split is not None:
+                if split[1] != LANGUAGES[0]:
+                    continue
+                name = split[0]
+            default = ... if info.is_required() else info.default
+            fields[name] = (_localized_annotation(info.annotation), default)
+        _models[key] = create_model(f"Localized{model.__name__}", **fields)
+    return _models[key]
@@ -0,0 +1,59 @@
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel, ConfigDict
+from pymongo import ASCENDING
+
+from cache import content_cache
+from repository import Repository
+
+
+class MediaAssetBase(BaseModel):
+    key: str
+    url: str
+    alt_en: Optional[str] = ""
+    alt_fr: Optional[str] = ""
+
+
+class MediaAssetResponse(MediaAssetBase):
+    id: str
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ResolvedMedia(BaseModel):
+    """The media asset a media_key points at, inlined into content responses"""
+    url: str
+    alt_en: Optional[str] = ""
+    alt_fr: Optional[str] = ""
+
+
+# url may point into the image store, so it holds a reference like any item's image_url
+media_repo = Repository("media_assets", MediaAssetResponse, sort=[("key", ASCENDING)], image_field="url")
+
+
+def resolves_media(collection: str):
+    """Declare that cached responses for collection embed resolved media"""
+    content_cache.depends(collection, "media_assets")
+
+
+async def assets_by_key() -> Dict[str, dict]:
+    """Every media asset keyed by key, loaded in one query and kept until media changes"""
+    return await content_cache.get_or_load("media_assets", _load_assets_by_key, variant="by_key")
+
+
+async def _load_assets_by_key() -> Dict[str, dict]:
+    return {asset["key"]: asset for asset in await media_repo.find(limit=None)}
+
+
+async def resolve(docs: List[dict]) -> List[dict]:
+    """Set each doc's media to the asset its media_key names, or None"""
+    assets = await assets_by_key()
+    for doc in docs:
+        doc["media"] = assets.get(doc.get("media_key") or "")
+    return docs
+
+
+async def resolve_one(doc: Optional[dict]) -> Optional[dict]:
+    if doc is not None:
+        await resolve([doc])
+    return doc
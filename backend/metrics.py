@@ -0,0 +1,90 @@
+import threading
+from typing import Callable, Dict
+
+
+class Counter:
+    """Monotonic counter"""
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: int = 1):
+        with self._lock:
+            self.value += amount
+
+    def snapshot(self):
+        return self.value
+
+
+class Gauge:
+    """Value that can go up and down"""
+
+    def __init__(self):
+        self.value = 0
+
+    def set(self, value):
+        self.value = value
+
+    def snapshot(self):
+        return self.value
+
+
+class Timer:
+    """Count, total and max of observed durations in milliseconds"""
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        ms = seconds * 1000
+        with self._lock:
+            self.count += 1
+            self.total_ms += ms
+            if ms > self.max_ms:
+                self.max_ms = ms
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 3),
+        }
+
+
+_metrics: Dict[str, object] = {}
+_collectors: Dict[str, Callable[[], dict]] = {}
+
+
+def _get(name: str, kind):
+    metric = _metrics.get(name)
+    if metric is None:
+        metric = _metrics.setdefault(name, kind())
+    return metric
+
+
+def counter(name: str) -> Counter:
+    return _get(name, Counter)
+
+
+def gauge(name: str) -> Gauge:
+    return _get(name, Gauge)
+
+
+def timer(name: str) -> Timer:
+    return _get(name, Timer)
+
+
+def register_collector(name: str, collect: Callable[[], dict]):
+    """Register a callable whose result is included in every snapshot"""
+    _collectors[name] = collect
+
+
+def snapshot() -> dict:
+    data = {name: metric.snapshot() for name, metric in sorted(_metrics.items())}
+    for name, collect in sorted(_collectors.items()):
+        data[name] = collect()
+    return data
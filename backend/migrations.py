@@ -0,0 +1,41 @@
+import logging
+import os
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Tuple
+
+from cache import content_cache
+
+logger = logging.getLogger(__name__)
+
+MIGRATION_BATCH_SIZE = int(os.environ.get("MIGRATION_BATCH_SIZE", "500"))
+
+# Data migrations each route module contributes, by name, run in registration order
+_migrations: Dict[str, Tuple[str, Callable[..., Awaitable[int]]]] = {}
+
+
+def register(name: str, collection: str, migrate: Callable[..., Awaitable[int]]):
+    """Declare a migration: migrate(db, batch_size) updates collection and returns the documents changed.
+
+    It must be safe to rerun, since a worker may stop before recording it.
+    """
+    _migrations[name] = (collection, migrate)
+
+
+async def run_migrations(db) -> Dict[str, int]:
+    """Run every migration not yet recorded in the migrations collection"""
+    done = {doc["_id"] async for doc in db.migrations.find({"completed_at": {"$exists": True}}, {"_id": 1})}
+    results = {}
+    for name, (collection, migrate) in _migrations.items():
+        if name in done:
+            continue
+        changed = await migrate(db, MIGRATION_BATCH_SIZE)
+        if changed:
+            content_cache.invalidate(collection)
+        await db.migrations.update_one(
+            {"_id": name},
+            {"$set": {"completed_at": datetime.utcnow(), "changed": changed}},
+            upsert=True,
+        )
+        logger.info("Migration %s changed %d documents in %s", name, changed, collection)
+        results[name] = changed
+    return results
@@ -0,0 +1,47 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Optional, Tuple
+
+from fastapi import HTTPException
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(value: Any, doc_id: Any) -> str:
+    """Opaque cursor pointing just past (value, doc_id)"""
+    if isinstance(value, datetime):
+        payload = {"d": value.isoformat(), "i": doc_id}
+    else:
+        payload = {"v": value, "i": doc_id}
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        value = datetime.fromisoformat(payload["d"]) if "d" in payload else payload["v"]
+        return value, payload["i"]
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def keyset_filter(field: str, cursor: Optional[str], direction: int = -1) -> dict:
+    """Filter selecting documents after the cursor for a sort on (field, _id)"""
+    if not cursor:
+        return {}
+    value, doc_id = decode_cursor(cursor)
+    op = "$lt" if direction < 0 else "$gt"
+    return {"$or": [{field: {op: value}}, {field: value, "_id": {op: doc_id}}]}
+
+
+def date_range_filter(field: str, start: Optional[datetime], end: Optional[datetime]) -> dict:
+    bounds = {}
+    if start is not None:
+        bounds["$gte"] = start
+    if end is not None:
+        bounds["$lt"] = end
+    return {field: bounds} if bounds else {}
@@ -0,0 +1,206 @@
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Callable, Generic, List, Optional, Sequence, Tuple, Type, TypeVar
+
+from pydantic import BaseModel
+from pymongo import ASCENDING, ReturnDocument
+from pymongo.errors import BulkWriteError
+
+import image_store
+import localization
+import metrics
+from cache import content_cache
+from database import db
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+# MongoDB error code for a duplicate _id or unique key
+DUPLICATE_KEY_ERROR = 11000
+
+
+def to_response(doc: Optional[dict]) -> Optional[dict]:
+    """Convert MongoDB doc, converting _id to string id"""
+    if doc is None:
+        return None
+    result = dict(doc)
+    if "_id" in result:
+        result["id"] = str(result.pop("_id"))
+    return result
+
+
+class Repository(Generic[ModelT]):
+    """Data access for one collection, shaped by its response model.
+
+    Reads only fetch the fields the response model declares. Updates and
+    deletes take a single round trip, and every write invalidates the
+    collection in content_cache when cached=True. When image_field is set,
+    writes keep the image store's reference counts in step with it.
+    Subscribers see each written document, e.g. to keep an index current.
+    Each call is timed as db.<collection>.<operation> in /api/metrics.
+    """
+
+    def __init__(
+        self,
+        collection: str,
+        response_model: Type[ModelT],
+        sort: Optional[Sequence[Tuple[str, int]]] = None,
+        cached: bool = True,
+        image_field: Optional[str] = None,
+    ):
+        self.name = collection
+        self.response_model = response_model
+        self.sort = list(sort) if sort else [("order", ASCENDING)]
+        self.cached = cached
+        self.image_field = image_field
+        self.projection = {field: 1 for field in response_model.model_fields if field != "id"}
+        self._lang_projections = {
+            lang: localization.projection(response_model, lang) for lang in localization.LANGUAGES
+        }
+        self._subscribers: List[Callable[[Any, Optional[dict]], None]] = []
+
+    @property
+    def collection(self):
+        return db[self.name]
+
+    @contextmanager
+    def _timed(self, operation: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            metrics.timer(f"db.{self.name}.{operation}").observe(time.perf_counter() - started)
+
+    def _projection(self, lang: Optional[str]) -> dict:
+        """Only the fields of one language when lang is given"""
+        if lang is None:
+            return self.projection
+        return self._lang_projections[lang]
+
+    def subscribe(self, listener: Callable[[Any, Optional[dict]], None]):
+        """Call listener(doc_id, doc) after each write; doc is None once deleted"""
+        self._subscribers.append(listener)
+
+    def _changed(self, doc_id: Any = None, doc: Optional[dict] = None):
+        if self.cached:
+            content_cache.invalidate(self.name)
+        for listener in self._subscribers:
+            listener(doc_id, doc)
+
+    async def find(
+        self,
+        query: Optional[dict] = None,
+        sort: Optional[Sequence[Tuple[str, int]]] = None,
+        limit: Optional[int] = 100,
+        lang: Optional[str] = None,
+    ) -> List[dict]:
+        with self._timed("find"):
+            cursor = self.collection.find(query or {}, self._projection(lang)).sort(list(sort or self.sort))
+            items = await cursor.to_list(limit)
+        return [to_response(item) for item in items]
+
+    async def stream(
+        self,
+        query: Optional[dict] = None,
+        sort: Optional[Sequence[Tuple[str, int]]] = None,
+        batch_size: int = 500,
+    ) -> AsyncIterator[dict]:
+        """Every matching document, fetched batch_size at a time so memory stays flat"""
+        cursor = self.collection.find(query or {}, self.projection).sort(list(sort or self.sort))
+        async for doc in cursor.batch_size(batch_size):
+            yield to_response(doc)
+
+    async def count(self, query: Optional[dict] = None) -> int:
+        """Exact count for a filter, or the cheap metadata estimate without one"""
+        with self._timed("count"):
+            if query:
+                return await self.collection.count_documents(query)
+            return await self.collection.estimated_document_count()
+
+    async def get(self, doc_id: Any, lang: Optional[str] = None) -> Optional[dict]:
+        with self._timed("find_one"):
+            doc = await self.collection.find_one({"_id": doc_id}, self._projection(lang))
+        return to_response(doc)
+
+    async def first(self, lang: Optional[str] = None) -> Optional[dict]:
+        with self._timed("find_one"):
+            doc = await self.collection.find_one({}, self._projection(lang))
+        return to_response(doc)
+
+    async def create(self, data: dict) -> dict:
+        doc = dict(data)
+        doc.setdefault("_id", str(uuid.uuid4()))
+        with self._timed("insert_one"):
+            await self.collection.insert_one(doc)
+        self._changed(doc["_id"], to_response(doc))
+        if self.image_field:
+            await image_store.acquire(doc.get(self.image_field, ""))
+        return to_response(doc)
+
+    async def insert_many(self, docs: List[dict]) -> int:
+        """Insert documents that already have an _id, skipping ones stored before; returns the number inserted"""
+        try:
+            with self._timed("insert_many"):
+                result = await self.collection.insert_many(docs, ordered=False)
+            inserted = len(result.inserted_ids)
+        except BulkWriteError as e:
+            if any(error.get("code") != DUPLICATE_KEY_ERROR for error in e.details.get("writeErrors", ())):
+                raise
+            inserted = e.details.get("nInserted", 0)
+        for doc in docs:
+            self._changed(doc["_id"], to_response(doc))
+        return inserted
+
+    async def update(self, doc_id: Any, data: dict) -> Optional[dict]:
+        """Apply $set and return the updated document, or None if it does not exist"""
+        if self.image_field and self.image_field in data:
+            return await self._update_image(doc_id, data)
+        with self._timed("find_one_and_update"):
+            doc = await self.collection.find_one_and_update(
+                {"_id": doc_id},
+                {"$set": data},
+                projection=self.projection,
+                return_document=ReturnDocument.AFTER,
+            )
+        if doc is not None:
+            self._changed(doc_id, to_response(doc))
+        return to_response(doc)
+
+    async def _update_image(self, doc_id: Any, data: dict) -> Optional[dict]:
+        # Take the previous version so the replaced image can be released
+        with self._timed("find_one_and_update"):
+            previous = await self.collection.find_one_and_update(
+                {"_id": doc_id},
+                {"$set": data},
+                projection=self.projection,
+                return_document=ReturnDocument.BEFORE,
+            )
+        if previous is None:
+            return None
+        doc = to_response({**previous, **data})
+        self._changed(doc_id, doc)
+        await image_store.replace(previous.get(self.image_field, ""), data[self.image_field])
+        return doc
+
+    async def upsert_singleton(self, data: dict) -> dict:
+        """Replace the fields of the collection's only document, creating it if needed"""
+        with self._timed("find_one_and_update"):
+            doc = await self.collection.find_one_and_update(
+                {},
+                {"$set": data, "$setOnInsert": {"_id": str(uuid.uuid4())}},
+                projection=self.projection,
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        self._changed(doc["_id"], to_response(doc))
+        return to_response(doc)
+
+    async def delete(self, doc_id: Any) -> Optional[dict]:
+        """Delete and return the removed document, or None if it did not exist"""
+        with self._timed("find_one_and_delete"):
+            doc = await self.collection.find_one_and_delete({"_id": doc_id}, projection=self.projection)
+        if doc is not None:
+            self._changed(doc_id, None)
+            if self.image_field:
+                await image_store.release(doc.get(self.image_field, ""))
+        return to_response(doc)
@@ -0,0 +1,169 @@
+import hashlib
+import os
+from typing import Awaitable, Callable, Dict, Hashable, Iterable, Optional, Sequence, Tuple, Type, Union
+
+from fastapi import Request, Response
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
+
+import compression
+import serialization
+from cache import content_cache
+from localization import localize, localized_model
+
+PUBLIC_CACHE_MAX_AGE = int(os.environ.get("PUBLIC_CACHE_MAX_AGE", "0"))
+PUBLIC_CACHE_STALE_WHILE_REVALIDATE = int(os.environ.get("PUBLIC_CACHE_STALE_WHILE_REVALIDATE", "0"))
+
+
+def _public_cache_control() -> str:
+    value = f"public, max-age={PUBLIC_CACHE_MAX_AGE}"
+    if PUBLIC_CACHE_STALE_WHILE_REVALIDATE:
+        value += f", stale-while-revalidate={PUBLIC_CACHE_STALE_WHILE_REVALIDATE}"
+    return value
+
+
+PUBLIC_CACHE_CONTROL = os.environ.get("PUBLIC_CACHE_CONTROL") or _public_cache_control()
+
+
+def _digest(body: bytes, headers: Dict[str, str]) -> str:
+    hasher = hashlib.blake2b(body, digest_size=12)
+    if headers:
+        hasher.update(repr(sorted(headers.items())).encode("utf-8"))
+    return hasher.hexdigest()
+
+
+class CachedBody:
+    """Encoded JSON body, the strong ETag derived from it, and compressed copies.
+
+    The copies are made once when the entry is built, at the slowest,
+    smallest settings when best is set. Each gets its own ETag, since its
+    bytes differ from the plain body's. headers go out with the body (e.g.
+    a list's next-page cursor) and count towards the ETag.
+    """
+
+    __slots__ = ("body", "etag", "encoded", "headers")
+
+    def __init__(self, body: bytes, headers: Optional[Dict[str, str]] = None, best: bool = True):
+        self.body = body
+        self.headers = headers or {}
+        digest = _digest(body, self.headers)
+        self.etag = '"%s"' % digest
+        self.encoded: Dict[str, Tuple[bytes, str]] = {
+            encoding: (data, '"%s-%s"' % (digest, encoding))
+            for encoding, data in compression.precompress(body, best).items()
+        }
+
+    def select(self, accept_encoding: Optional[str]) -> Tuple[bytes, str, Optional[str]]:
+        """Body, ETag and Content-Encoding to send for an Accept-Encoding header"""
+        encoding = compression.negotiate(accept_encoding)
+        if encoding in self.encoded:
+            body, etag = self.encoded[encoding]
+            return body, etag, encoding
+        return self.body, self.etag, None
+
+
+def render_one(model: Type[BaseModel], doc: dict, lang: Optional[str] = None) -> bytes:
+    """Encode a stored doc as the response model, as FastAPI would, without re-validating it.
+
+    With lang, only that language's fields are kept, under neutral names.
+    """
+    if lang is not None:
+        model, doc = localized_model(model), localize(doc, lang)
+    return serialization.encode_one(model, doc)
+
+
+def render_list(model: Type[BaseModel], docs: Iterable[dict], lang: Optional[str] = None) -> bytes:
+    """Encode stored docs as a list of the response model, as FastAPI would"""
+    if lang is not None:
+        model, docs = localized_model(model), localize(list(docs), lang)
+    return serialization.encode_list(model, docs)
+
+
+def localized_response(model: Type[BaseModel], doc: dict, lang: Optional[str]):
+    """Return doc for FastAPI to serialize, or pre-rendered in one language"""
+    if lang is None:
+        return doc
+    return Response(content=render_one(model, doc, lang), media_type="application/json")
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against our ETag"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+Loaded = Union[bytes, Tuple[bytes, Dict[str, str]]]
+
+
+async def cached_body(
+    collection: str,
+    load: Callable[[], Awaitable[Loaded]],
+    variant: Hashable = None,
+    depends_on: Optional[Sequence[str]] = None,
+    best: bool = True,
+) -> CachedBody:
+    """The encoded body for a public read, from content_cache or freshly loaded.
+
+    load returns the body, or (body, headers) to cache headers alongside it.
+    best=False precompresses at the per-request levels, for entries that
+    are replaced too often to repay the slowest settings.
+    """
+
+    async def build() -> CachedBody:
+        loaded = await load()
+        body, headers = loaded if isinstance(loaded, tuple) else (loaded, None)
+        # Hashing and compressing a large body would stall the event loop
+        return await run_in_threadpool(CachedBody, body, headers, best)
+
+    return await content_cache.get_or_load(collection, build, variant, depends_on)
+
+
+async def cached_json(
+    request: Request,
+    collection: str,
+    load: Callable[[], Awaitable[Loaded]],
+    variant: Hashable = None,
+    depends_on: Optional[Sequence[str]] = None,
+    best: bool = True,
+) -> Response:
+    """Serve a public read from content_cache with ETag revalidation.
+
+    The entry is rebuilt only after a write to the collection (or to any
+    of depends_on) bumps its version, so the ETag stays stable until the
+    content changes. The body goes out precompressed when the client
+    accepts one of the cached encodings.
+    """
+    entry = await cached_body(collection, load, variant, depends_on, best)
+    body, etag, encoding = entry.select(request.headers.get("accept-encoding"))
+    headers = {**entry.headers, "ETag": etag, "Cache-Control": PUBLIC_CACHE_CONTROL, "Vary": "Accept-Encoding"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+        compression.record(len(entry.body), len(body))
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+async def uncached_json(request: Request, load: Callable[[], Awaitable[Loaded]]) -> Response:
+    """Serve a public read with ETag revalidation, built per request and kept out of content_cache.
+
+    For reads whose variants are open-ended (arbitrary key sets, date
+    ranges, cursors), which would push the fixed entries out of the cache.
+    CompressionMiddleware compresses the body at the per-request levels.
+    """
+    loaded = await load()
+    body, extra = loaded if isinstance(loaded, tuple) else (loaded, {})
+    etag = '"%s"' % _digest(body, extra)
+    headers = {**extra, "ETag": etag, "Cache-Control": PUBLIC_CACHE_CONTROL, "Vary": "Accept-Encoding"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -1,3 +1,7 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
 
@@ -5,7 +9,14 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-
+from pydantic import BaseModel, Field
+from pymongo import ASCENDING, IndexModel
+from pymongo.errors import DuplicateKeyError
+
+import admission
+import indexes
+import metrics
+from cache import TTLCache
 from database import db
 
 SECRET_KEY = "gosec-demo-secret-key-change-me"
@@ -16,24 +27,103 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+DEFAULT_ADMIN_PASSWORD = "gosec_admin"
+
+# bcrypt is CPU bound, so it runs on a small dedicated pool instead of the event loop
+BCRYPT_WORKERS = int(os.environ.get("BCRYPT_WORKERS", "2"))
+BCRYPT_MAX_CONCURRENCY = int(os.environ.get("BCRYPT_MAX_CONCURRENCY", str(BCRYPT_WORKERS * 4)))
+_bcrypt_executor = ThreadPoolExecutor(max_workers=BCRYPT_WORKERS, thread_name_prefix="bcrypt")
+_bcrypt_slots = asyncio.Semaphore(BCRYPT_MAX_CONCURRENCY)
+
+# Hash for the fallback admin, computed once at startup
+_default_admin_hash: Optional[str] = None
+
+# Authenticated admins keyed by (token subject, token expiry). A write to
+# admin_users clears this worker's entries; other workers notice within the TTL.
+principal_cache = TTLCache(
+    "auth.principals",
+    maxsize=int(os.environ.get("PRINCIPAL_CACHE_SIZE", "256")),
+    ttl=float(os.environ.get("PRINCIPAL_CACHE_TTL_SECONDS", "30")),
+)
+
 router = APIRouter(prefix="/api/auth", tags=["auth"])
 
+indexes.register("admin_users", IndexModel([("username", ASCENDING)], unique=True))
+
+# Each login attempt costs a bcrypt hash, so guessing is held to a trickle
+admission.register(
+    "login", "POST", "/api/auth/login",
+    per_client=admission.Rate(per_second=0.2, burst=10),
+    overall=admission.Rate(per_second=10, burst=20),
+)
+
+
+async def _run_bcrypt(fn, *args):
+    """Run a bcrypt call on the bounded pool, recording how long it waited"""
+    queued_at = time.perf_counter()
+
+    def job():
+        metrics.timer("auth.bcrypt_queue_wait").observe(time.perf_counter() - queued_at)
+        return fn(*args)
+
+    async with _bcrypt_slots:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_bcrypt_executor, job)
+
+
+async def hash_password(plain_password: str) -> str:
+    return await _run_bcrypt(pwd_context.hash, plain_password)
+
+
+async def verify_password(plain_password: str, password_hash: str) -> bool:
+    return await _run_bcrypt(pwd_context.verify, plain_password, password_hash)
+
+
+async def init_default_admin_hash():
+    """Hash the fallback admin password once so requests never pay for it"""
+    global _default_admin_hash
+    if _default_admin_hash is None:
+        _default_admin_hash = await hash_password(DEFAULT_ADMIN_PASSWORD)
+
+
+async def ensure_default_admin():
+    """Store the default admin when admin_users is empty, so it can be changed or removed like any other"""
+    await init_default_admin_hash()
+    if await db.admin_users.find_one({}, {"_id": 1}) is not None:
+        return
+    try:
+        await db.admin_users.insert_one({
+            "username": "admin",
+            "password_hash": _default_admin_hash,
+            "created_at": datetime.utcnow(),
+        })
+    except DuplicateKeyError:
+        # Another worker stored it first
+        pass
+    invalidate_admin("admin")
+
 
 async def get_admin_user(username: str):
-    # For MVP, single admin stored in DB or fallback to default
     user = await db.admin_users.find_one({"username": username})
     if user:
         return user
-    # Fallback default admin if none in DB
-    if username == "admin":
-        # password: gosec_admin (bcrypt hash)
-        hashed = pwd_context.hash("gosec_admin")
-        return {"username": "admin", "password_hash": hashed}
+    # Fallback default admin while none is stored, e.g. if the startup bootstrap failed
+    if username == "admin" and await db.admin_users.find_one({}, {"_id": 1}) is None:
+        if _default_admin_hash is None:
+            await init_default_admin_hash()
+        return {"username": "admin", "password_hash": _default_admin_hash}
     return None
 
 
-def verify_password(plain_password: str, password_hash: str) -> bool:
-    return pwd_context.verify(plain_password, password_hash)
+def invalidate_admin(username: Optional[str] = None):
+    """Drop cached principals for one admin, or all of them when username is None.
+
+    Must be called after any change to, or removal of, a document in admin_users.
+    """
+    if username is None:
+        principal_cache.clear()
+    else:
+        principal_cache.invalidate_where(lambda key: key[0] == username)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
@@ -57,9 +147,19 @@ async def get_current_admin(token: str = Depends(oauth2_scheme)):
             raise credentials_exception
     except JWTError:
         raise credentials_exception
+
+    expires_at = payload.get("exp")
+    cache_key = (username, expires_at)
+    user = principal_cache.get(cache_key)
+    if user is not None:
+        return user
+
     user = await get_admin_user(username)
     if user is None:
         raise credentials_exception
+    # Never keep a principal cached past its token expiry
+    ttl = expires_at - time.time() if expires_at else None
+    principal_cache.set(cache_key, user, ttl=ttl)
     return user
 
 
@@ -70,7 +170,7 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
         raise HTTPException(status_code=400, detail="Incorrect username or password")
 
     password_hash = user.get("password_hash") or user.get("password")
-    if not password_hash or not verify_password(form_data.password, password_hash):
+    if not password_hash or not await verify_password(form_data.password, password_hash):
         raise HTTPException(status_code=400, detail="Incorrect username or password")
 
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -78,3 +178,60 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
         data={"sub": form_data.username}, expires_delta=access_token_expires
     )
     return {"access_token": access_token, "token_type": "bearer"}
+
+
+class AdminUserCreate(BaseModel):
+    username: str = Field(..., min_length=1, max_length=64)
+    password: str = Field(..., min_length=8)
+
+
+class AdminPasswordUpdate(BaseModel):
+    password: str = Field(..., min_length=8)
+
+
+@router.get("/admins", dependencies=[Depends(get_current_admin)])
+async def list_admins():
+    """Usernames of every stored admin (admin only)"""
+    cursor = db.admin_users.find({}, {"_id": 0, "username": 1}).sort("username", ASCENDING)
+    return [doc["username"] async for doc in cursor]
+
+
+@router.post("/admins", status_code=201, dependencies=[Depends(get_current_admin)])
+async def create_admin(admin: AdminUserCreate):
+    """Add an admin (admin only)"""
+    try:
+        await db.admin_users.insert_one({
+            "username": admin.username,
+            "password_hash": await hash_password(admin.password),
+            "created_at": datetime.utcnow(),
+        })
+    except DuplicateKeyError:
+        raise HTTPException(status_code=409, detail=f"Admin {admin.username!r} already exists")
+    # A cached fallback principal for this name must not outlive the real one
+    invalidate_admin(admin.username)
+    return {"username": admin.username}
+
+
+@router.put("/admins/{username}", dependencies=[Depends(get_current_admin)])
+async def update_admin_password(username: str, update: AdminPasswordUpdate):
+    """Change an admin's password (admin only)"""
+    result = await db.admin_users.update_one(
+        {"username": username},
+        {"$set": {"password_hash": await hash_password(update.password), "updated_at": datetime.utcnow()}},
+    )
+    invalidate_admin(username)
+    if result.matched_count == 0:
+        raise HTTPException(status_code=404, detail="Admin not found")
+    return {"username": username}
+
+
+@router.delete("/admins/{username}", dependencies=[Depends(get_current_admin)])
+async def delete_admin(username: str):
+    """Remove an admin (admin only). The last one cannot be removed."""
+    if await db.admin_users.count_documents({"username": {"$ne": username}}, limit=1) == 0:
+        raise HTTPException(status_code=409, detail="Cannot remove the last admin")
+    result = await db.admin_users.delete_one({"username": username})
+    invalidate_admin(username)
+    if result.deleted_count == 0:
+        raise HTTPException(status_code=404, detail="Admin not found")
+    return {"message": "Admin removed"}
@@ -1,62 +1,79 @@
 from typing import List, Optional, Any
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel, Field, ConfigDict
+from pymongo import ASCENDING, IndexModel
+from pymongo.errors import DuplicateKeyError
 from datetime import datetime
-import uuid
 
-from database import db
+import bundle
+import indexes
+import media
+import seed
+from localization import Lang
+from media import MediaAssetBase, MediaAssetResponse, ResolvedMedia, media_repo
+from repository import Repository, to_response
+from responses import cached_json, render_list, render_one, uncached_json
+from serialization import TrustedJSONRoute
 from routes.auth_routes import get_current_admin
 
-router = APIRouter(prefix="/api", tags=["content"])
+router = APIRouter(
+    prefix="/api",
+    tags=["content"],
+    route_class=TrustedJSONRoute,
+    default_response_class=ORJSONResponse,
+)
 
-
-# Helper to convert Mongo docs to response format
-def to_response(doc: dict) -> dict:
-    """Convert MongoDB doc, converting _id to string id"""
-    if doc is None:
-        return None
-    result = dict(doc)
-    if "_id" in result:
-        result["id"] = str(result.pop("_id"))
-    return result
+indexes.register("media_assets", IndexModel([("key", ASCENDING)], unique=True))
 
 
 # Media
-class MediaAssetBase(BaseModel):
-    key: str
-    url: str
-    alt_en: Optional[str] = ""
-    alt_fr: Optional[str] = ""
+@router.get("/media", response_model=List[MediaAssetResponse])
+async def list_media(
+    request: Request,
+    keys: Optional[str] = Query(None, description="Comma-separated media keys to resolve instead of listing everything"),
+    lang: Optional[Lang] = None,
+):
+    if keys is None:
+        return await cached_json(request, "media_assets", lambda: _load_media(lang), variant=lang)
+    wanted = tuple(dict.fromkeys(key.strip() for key in keys.split(",") if key.strip()))
+    # Any client can ask for any key set, so these stay out of content_cache
+    return await uncached_json(request, lambda: _load_media_keys(wanted, lang))
 
 
-class MediaAssetResponse(MediaAssetBase):
-    id: str
+async def _load_media(lang: Optional[str] = None) -> bytes:
+    return render_list(MediaAssetResponse, await media_repo.find(limit=200, lang=lang), lang)
 
-    model_config = ConfigDict(from_attributes=True)
 
+async def _load_media_keys(keys, lang: Optional[str] = None) -> bytes:
+    assets = await media.assets_by_key()
+    return render_list(MediaAssetResponse, [assets[key] for key in keys if key in assets], lang)
 
-@router.get("/media", response_model=List[MediaAssetResponse])
-async def list_media():
-    items = await db.media_assets.find().to_list(200)
-    return [to_response(item) for item in items]
+
+bundle.register("media", "media_assets", _load_media)
+
+
+def _key_taken(key: str) -> HTTPException:
+    return HTTPException(status_code=409, detail=f"Another media asset already uses the key {key!r}")
 
 
 @router.post("/media", response_model=MediaAssetResponse, dependencies=[Depends(get_current_admin)])
 async def create_media(asset: MediaAssetBase):
-    doc = asset.model_dump()
-    doc["_id"] = str(uuid.uuid4())
-    await db.media_assets.insert_one(doc)
-    return to_response(doc)
+    try:
+        return await media_repo.create(asset.model_dump())
+    except DuplicateKeyError:
+        raise _key_taken(asset.key)
 
 
 @router.put("/media/{media_id}", response_model=MediaAssetResponse, dependencies=[Depends(get_current_admin)])
 async def update_media(media_id: str, asset: MediaAssetBase):
-    update = {"$set": asset.model_dump()}
-    res = await db.media_assets.update_one({"_id": media_id}, update)
-    if res.matched_count == 0:
+    try:
+        doc = await media_repo.update(media_id, asset.model_dump())
+    except DuplicateKeyError:
+        raise _key_taken(asset.key)
+    if doc is None:
         raise HTTPException(status_code=404, detail="Media not found")
-    doc = await db.media_assets.find_one({"_id": media_id})
-    return to_response(doc)
+    return doc
 
 
 # Hero content
@@ -72,28 +89,42 @@ class HeroContentBase(BaseModel):
 
 class HeroContentResponse(HeroContentBase):
     id: str
+    media: Optional[ResolvedMedia] = None
 
     model_config = ConfigDict(from_attributes=True)
 
 
+hero_repo = Repository("hero_content", HeroContentResponse)
+media.resolves_media("hero_content")
+
+
+# Default hero content
+DEFAULT_HERO = {
+    "_id": "hero",
+    "title_en": "Gatineau Ottawa Social Elite Club",
+    "title_fr": "Club Social d'Élite Gatineau Ottawa",
+    "subtitle_en": "Community-based soccer and community programs.",
+    "subtitle_fr": "Programmes de soccer et communautaires.",
+    "tagline_en": "Using sport, culture, and education to connect communities.",
+    "tagline_fr": "Utiliser le sport, la culture et l'éducation pour relier les communautés.",
+    "media_key": "hero.main",
+}
+
+seed.register("hero_content", [DEFAULT_HERO])
+
+
 @router.get("/content/hero", response_model=HeroContentResponse)
-async def get_hero_content():
-    doc = await db.hero_content.find_one({})
-    if not doc:
-        # Minimal default
-        default_doc = {
-            "_id": str(uuid.uuid4()),
-            "title_en": "Gatineau Ottawa Social Elite Club",
-            "title_fr": "Club Social d'Élite Gatineau Ottawa",
-            "subtitle_en": "Community-based soccer and community programs.",
-            "subtitle_fr": "Programmes de soccer et communautaires.",
-            "tagline_en": "Using sport, culture, and education to connect communities.",
-            "tagline_fr": "Utiliser le sport, la culture et l'éducation pour relier les communautés.",
-            "media_key": "hero.main",
-        }
-        await db.hero_content.insert_one(default_doc)
-        return to_response(default_doc)
-    return to_response(doc)
+async def get_hero_content(request: Request, lang: Optional[Lang] = None):
+    return await cached_json(request, "hero_content", lambda: _load_hero_content(lang), variant=lang)
+
+
+async def _load_hero_content(lang: Optional[str] = None) -> bytes:
+    # Fall back to the defaults if the seeder has not run yet
+    doc = await hero_repo.first(lang=lang) or to_response(DEFAULT_HERO)
+    return render_one(HeroContentResponse, await media.resolve_one(doc), lang)
+
+
+bundle.register("hero", "hero_content", _load_hero_content)
 
 
 class HeroContentUpdate(HeroContentBase):
@@ -102,15 +133,7 @@ class HeroContentUpdate(HeroContentBase):
 
 @router.put("/content/hero", response_model=HeroContentResponse, dependencies=[Depends(get_current_admin)])
 async def update_hero_content(payload: HeroContentUpdate):
-    data = payload.model_dump()
-    existing = await db.hero_content.find_one({})
-    if existing:
-        await db.hero_content.update_one({"_id": existing["_id"]}, {"$set": data})
-        doc = await db.hero_content.find_one({"_id": existing["_id"]})
-    else:
-        doc = {"_id": str(uuid.uuid4()), **data}
-        await db.hero_content.insert_one(doc)
-    return to_response(doc)
+    return await hero_repo.upsert_singleton(payload.model_dump())
 
 
 # About content
@@ -129,22 +152,35 @@ class AboutContentResponse(AboutContentBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+about_repo = Repository("about_content", AboutContentResponse)
+
+
+# Default about content
+DEFAULT_ABOUT = {
+    "_id": "about",
+    "about_en": "GOSEC is a non-profit community club that uses soccer, culture, and education to support youth, families, newcomers, and community members in Gatineau and Ottawa.",
+    "about_fr": "GOSEC est un organisme à but non lucratif qui utilise le soccer, la culture et l'éducation pour soutenir les jeunes, les familles, les nouveaux arrivants et la communauté à Gatineau et Ottawa.",
+    "mission_en": "To promote inclusion, healthy living, and personal growth through sports, culture, and career integration.",
+    "mission_fr": "Promouvoir l'inclusion, le bien-être et le développement personnel par le sport, la culture et l'intégration professionnelle.",
+    "vision_en": "A strong, inclusive, and connected community across Gatineau and Ottawa.",
+    "vision_fr": "Une communauté forte, inclusive et solidaire reliant Gatineau et Ottawa.",
+}
+
+seed.register("about_content", [DEFAULT_ABOUT])
+
+
 @router.get("/content/about", response_model=AboutContentResponse)
-async def get_about_content():
-    doc = await db.about_content.find_one({})
-    if not doc:
-        default_doc = {
-            "_id": str(uuid.uuid4()),
-            "about_en": "GOSEC is a non-profit community club that uses soccer, culture, and education to support youth, families, newcomers, and community members in Gatineau and Ottawa.",
-            "about_fr": "GOSEC est un organisme à but non lucratif qui utilise le soccer, la culture et l'éducation pour soutenir les jeunes, les familles, les nouveaux arrivants et la communauté à Gatineau et Ottawa.",
-            "mission_en": "To promote inclusion, healthy living, and personal growth through sports, culture, and career integration.",
-            "mission_fr": "Promouvoir l'inclusion, le bien-être et le développement personnel par le sport, la culture et l'intégration professionnelle.",
-            "vision_en": "A strong, inclusive, and connected community across Gatineau and Ottawa.",
-            "vision_fr": "Une communauté forte, inclusive et solidaire reliant Gatineau et Ottawa.",
-        }
-        await db.about_content.insert_one(default_doc)
-        return to_response(default_doc)
-    return to_response(doc)
+async def get_about_content(request: Request, lang: Optional[Lang] = None):
+    return await cached_json(request, "about_content", lambda: _load_about_content(lang), variant=lang)
+
+
+async def _load_about_content(lang: Optional[str] = None) -> bytes:
+    # Fall back to the defaults if the seeder has not run yet
+    doc = await about_repo.first(lang=lang) or to_response(DEFAULT_ABOUT)
+    return render_one(AboutContentResponse, doc, lang)
+
+
+bundle.register("about", "about_content", _load_about_content)
 
 
 class AboutContentUpdate(AboutContentBase):
@@ -153,12 +189,4 @@ class AboutContentUpdate(AboutContentBase):
 
 @router.put("/content/about", response_model=AboutContentResponse, dependencies=[Depends(get_current_admin)])
 async def update_about_content(payload: AboutContentUpdate):
-    data = payload.model_dump()
-    existing = await db.about_content.find_one({})
-    if existing:
-        await db.about_content.update_one({"_id": existing["_id"]}, {"$set": data})
-        doc = await db.about_content.find_one({"_id": existing["_id"]})
-    else:
-        doc = {"_id": str(uuid.uuid4()), **data}
-        await db.about_content.insert_one(doc)
-    return to_response(doc)
+    return await about_repo.upsert_singleton(payload.model_dump())
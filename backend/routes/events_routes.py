@@ -1,47 +1,55 @@
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
-from fastapi.responses import FileResponse
+import functools
+import logging
+from typing import Dict, List, Optional, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, UploadFile, File, Form
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel, Field, ConfigDict
+from pymongo import ASCENDING, IndexModel, UpdateOne
 from datetime import datetime
-import uuid
-import shutil
-from pathlib import Path
 
-from database import db
+import bundle
+import event_dates
+import image_store
+import indexes
+import media
+import migrations
+import seed
+from localization import Lang
+from media import ResolvedMedia
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, encode_cursor, keyset_filter
+from repository import Repository
+from responses import cached_json, localized_response, render_list, uncached_json
+from search import search_index
+from serialization import TrustedJSONRoute
 from routes.auth_routes import get_current_admin
 
-router = APIRouter(prefix="/api", tags=["events"])
+logger = logging.getLogger(__name__)
 
-# Create uploads directory
-UPLOAD_DIR = Path("/app/uploads/events")
-UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+router = APIRouter(
+    prefix="/api",
+    tags=["events"],
+    route_class=TrustedJSONRoute,
+    default_response_class=ORJSONResponse,
+)
 
-# Allowed image extensions
-ALLOWED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp"}
+# Dated listings are paged oldest first on (starts_at, _id)
+_CHRONOLOGICAL = [("starts_at", ASCENDING), ("_id", ASCENDING)]
 
-
-def get_file_extension(filename: str) -> str:
-    return Path(filename).suffix.lower()
-
-
-def is_allowed_file(filename: str) -> bool:
-    return get_file_extension(filename) in ALLOWED_EXTENSIONS
-
-
-# Helper to convert Mongo docs to response format
-def to_response(doc: dict) -> dict:
-    if doc is None:
-        return None
-    result = dict(doc)
-    if "_id" in result:
-        result["id"] = str(result.pop("_id"))
-    return result
+indexes.register(
+    "events",
+    IndexModel([("order", ASCENDING)]),
+    IndexModel(_CHRONOLOGICAL),
+    IndexModel([("ends_at", ASCENDING)]),
+)
 
 
 # Events models
 class EventBase(BaseModel):
-    date_en: str
-    date_fr: str
+    # Derived from starts_at/ends_at; only stored for dates that could not be parsed
+    date_en: str = ""
+    date_fr: str = ""
+    starts_at: Optional[datetime] = None
+    ends_at: Optional[datetime] = None
     title_en: str
     title_fr: str
     location_en: str
@@ -55,6 +63,7 @@ class EventBase(BaseModel):
 
 class EventResponse(EventBase):
     id: str
+    media: Optional[ResolvedMedia] = None
     model_config = ConfigDict(from_attributes=True)
 
 
@@ -65,6 +74,8 @@ class EventCreate(EventBase):
 class EventUpdate(BaseModel):
     date_en: Optional[str] = None
     date_fr: Optional[str] = None
+    starts_at: Optional[datetime] = None
+    ends_at: Optional[datetime] = None
     title_en: Optional[str] = None
     title_fr: Optional[str] = None
     location_en: Optional[str] = None
@@ -76,12 +87,17 @@ class EventUpdate(BaseModel):
     order: Optional[int] = None
 
 
+events_repo = Repository("events", EventResponse, image_field="image_url")
+media.resolves_media("events")
+search_index.register(events_repo, "title", {"title": 3.0, "location": 1.5, "summary": 1.0})
+
+
 # Default events data
 DEFAULT_EVENTS = [
     {
-        "_id": str(uuid.uuid4()),
-        "date_en": "August 15, 2025",
-        "date_fr": "15 août 2025",
+        "_id": "soccer_tournament",
+        "starts_at": event_dates.to_utc(datetime(2025, 8, 15, 9, 0)),
+        "ends_at": event_dates.to_utc(datetime(2025, 8, 15, 17, 0)),
         "title_en": "Summer Soccer Tournament",
         "title_fr": "Tournoi de soccer d'été",
         "location_en": "Gatineau Sports Complex",
@@ -93,9 +109,9 @@ DEFAULT_EVENTS = [
         "order": 1
     },
     {
-        "_id": str(uuid.uuid4()),
-        "date_en": "September 5, 2025",
-        "date_fr": "5 septembre 2025",
+        "_id": "bbq",
+        "starts_at": event_dates.to_utc(datetime(2025, 9, 5, 12, 0)),
+        "ends_at": event_dates.to_utc(datetime(2025, 9, 5, 16, 0)),
         "title_en": "Back to School Family BBQ",
         "title_fr": "BBQ familial de rentrée scolaire",
         "location_en": "GOSEC Community Center",
@@ -107,9 +123,9 @@ DEFAULT_EVENTS = [
         "order": 2
     },
     {
-        "_id": str(uuid.uuid4()),
-        "date_en": "October 12, 2025",
-        "date_fr": "12 octobre 2025",
+        "_id": "cultural_festival",
+        "starts_at": event_dates.to_utc(datetime(2025, 10, 12, 11, 0)),
+        "ends_at": event_dates.to_utc(datetime(2025, 10, 12, 21, 0)),
         "title_en": "Cultural Heritage Festival",
         "title_fr": "Festival du patrimoine culturel",
         "location_en": "Ottawa Convention Centre",
@@ -121,9 +137,9 @@ DEFAULT_EVENTS = [
         "order": 3
     },
     {
-        "_id": str(uuid.uuid4()),
-        "date_en": "November 20, 2025",
-        "date_fr": "20 novembre 2025",
+        "_id": "youth_conference",
+        "starts_at": event_dates.to_utc(datetime(2025, 11, 20, 8, 30)),
+        "ends_at": event_dates.to_utc(datetime(2025, 11, 20, 16, 30)),
         "title_en": "Youth Leadership Conference",
         "title_fr": "Conférence sur le leadership des jeunes",
         "location_en": "University of Ottawa",
@@ -136,31 +152,208 @@ DEFAULT_EVENTS = [
     }
 ]
 
+seed.register("events", DEFAULT_EVENTS)
+
+
+async def _migrate_date_text(db, batch_size: int) -> int:
+    """Parse the date_en/date_fr text of older events into starts_at/ends_at, a batch at a time.
+
+    Events whose text cannot be parsed keep it and are logged.
+    """
+    migrated = 0
+    last_id = None
+    while True:
+        query = {"starts_at": {"$exists": False}}
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        batch = await db.events.find(query, {"date_en": 1, "date_fr": 1}).sort("_id", ASCENDING).to_list(batch_size)
+        if not batch:
+            return migrated
+        ops = []
+        for doc in batch:
+            parsed = event_dates.parse(doc.get("date_en"), "en") or event_dates.parse(doc.get("date_fr"), "fr")
+            if parsed is None:
+                logger.warning("Event %s: could not parse date %r", doc["_id"], doc.get("date_en"))
+                continue
+            ops.append(UpdateOne(
+                {"_id": doc["_id"], "starts_at": {"$exists": False}},
+                {
+                    "$set": {"starts_at": event_dates.to_utc(parsed[0]), "ends_at": event_dates.to_utc(parsed[1])},
+                    "$unset": {"date_en": "", "date_fr": ""},
+                },
+            ))
+        if ops:
+            result = await db.events.bulk_write(ops, ordered=False)
+            migrated += result.modified_count
+        last_id = batch[-1]["_id"]
+
+
+migrations.register("events.starts_at", "events", _migrate_date_text)
+
+
+def _present(doc: Optional[dict]) -> Optional[dict]:
+    """Derive the display dates from starts_at/ends_at, returned in UTC"""
+    if doc is not None and doc.get("starts_at") is not None:
+        starts_at, ends_at = doc["starts_at"], doc.get("ends_at")
+        doc["date_en"] = event_dates.display(starts_at, ends_at, "en")
+        doc["date_fr"] = event_dates.display(starts_at, ends_at, "fr")
+        doc["starts_at"] = event_dates.from_utc(starts_at)
+        if ends_at is not None:
+            doc["ends_at"] = event_dates.from_utc(ends_at)
+    return doc
+
+
+def _parse_date_text(data: dict) -> Optional[Tuple[datetime, datetime]]:
+    """(starts_at, ends_at) from the date_en/date_fr text sent, if any; 400 if it cannot be parsed"""
+    parsed = None
+    for lang in ("en", "fr"):
+        text = data.get(f"date_{lang}")
+        if not text:
+            continue
+        dates = event_dates.parse(text, lang)
+        if dates is None:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Could not parse date_{lang} {text!r}; send starts_at and ends_at instead",
+            )
+        parsed = parsed or dates
+    return parsed
+
+
+def _with_dates(data: dict, stored: Optional[dict] = None) -> dict:
+    """Store starts_at/ends_at in UTC, parsing date_en/date_fr when no starts_at is given.
+
+    On create ends_at defaults to starts_at. On update (stored is the
+    current event) moving only the start moves the end along, keeping the
+    duration, while an end sent alone keeps the stored start; the pair is
+    checked as it will be saved. The display strings are dropped once a
+    start is known, since they are derived on every read.
+    """
+    creating = stored is None
+    stored = stored or {}
+    for field in ("starts_at", "ends_at"):
+        if data.get(field) is None:
+            data.pop(field, None)
+    if "starts_at" not in data:
+        parsed = _parse_date_text(data)
+        if parsed is not None:
+            data["starts_at"] = parsed[0]
+            data.setdefault("ends_at", parsed[1])
+    for field in ("starts_at", "ends_at"):
+        if field in data:
+            data[field] = event_dates.to_utc(data[field])
+    if "starts_at" in data and "ends_at" not in data:
+        if creating or stored.get("ends_at") is None:
+            data["ends_at"] = data["starts_at"]
+        elif stored.get("starts_at") is not None:
+            data["ends_at"] = stored["ends_at"] + (data["starts_at"] - stored["starts_at"])
+    if "starts_at" in data:
+        data.pop("date_en", None)
+        data.pop("date_fr", None)
+    starts_at = data.get("starts_at", stored.get("starts_at"))
+    ends_at = data.get("ends_at", stored.get("ends_at"))
+    if starts_at is not None and ends_at is not None and ends_at < starts_at:
+        raise HTTPException(status_code=400, detail="ends_at must not be before starts_at")
+    return data
+
 
 @router.get("/events", response_model=List[EventResponse])
-async def list_events():
-    items = await db.events.find().sort("order", 1).to_list(100)
-    if not items:
-        for event in DEFAULT_EVENTS:
-            await db.events.insert_one(event)
-        items = await db.events.find().sort("order", 1).to_list(100)
-    return [to_response(item) for item in items]
+async def list_events(
+    request: Request,
+    lang: Optional[Lang] = None,
+    date_from: Optional[datetime] = Query(None, alias="from"),
+    date_to: Optional[datetime] = Query(None, alias="to"),
+    upcoming: bool = False,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+):
+    """All events by order, or one page by date when from, to, upcoming or cursor is set.
+
+    A dated page holds events overlapping [from, to), oldest first;
+    upcoming=true keeps those that have not ended. The next page's cursor
+    is sent in the X-Next-Cursor header.
+    """
+    if date_from is None and date_to is None and not upcoming and cursor is None:
+        return await cached_json(request, "events", lambda: _load_events(lang), variant=lang)
+
+    start = event_dates.to_utc(date_from) if date_from is not None else None
+    end = event_dates.to_utc(date_to) if date_to is not None else None
+    if upcoming and date_from is None and date_to is None and cursor is None and limit == DEFAULT_PAGE_SIZE:
+        # The home page's query, shared with its site bundle; replaced every minute, so not worth the slowest compression
+        return await cached_json(request, "events", lambda: _load_upcoming(lang), variant=_upcoming_variant(lang), best=False)
+    if upcoming:
+        now = _this_minute()
+        start = now if start is None else max(start, now)
+    load = functools.partial(_load_event_page, start, end, cursor, limit, lang)
+    # Other ranges and pages are open-ended, so they stay out of content_cache
+    return await uncached_json(request, load)
+
+
+async def _load_events(lang: Optional[str] = None) -> bytes:
+    docs = [_present(doc) for doc in await events_repo.find(lang=lang)]
+    return render_list(EventResponse, await media.resolve(docs), lang)
+
+
+async def _load_event_page(
+    start: Optional[datetime],
+    end: Optional[datetime],
+    cursor: Optional[str],
+    limit: int,
+    lang: Optional[str],
+) -> Tuple[bytes, Dict[str, str]]:
+    starts_at: dict = {"$ne": None}
+    if end is not None:
+        starts_at["$lt"] = end
+    query = {"starts_at": starts_at, **keyset_filter("starts_at", cursor, direction=1)}
+    if start is not None:
+        query["ends_at"] = {"$gte": start}
+    docs = await events_repo.find(query, sort=_CHRONOLOGICAL, limit=limit + 1, lang=lang)
+
+    headers = {}
+    if len(docs) > limit:
+        docs = docs[:limit]
+        headers["X-Next-Cursor"] = encode_cursor(docs[-1]["starts_at"], docs[-1]["id"])
+    docs = [_present(doc) for doc in docs]
+    return render_list(EventResponse, await media.resolve(docs), lang), headers
+
+
+def _this_minute() -> datetime:
+    """Now, to the minute, so upcoming requests within it share one cached page"""
+    return datetime.utcnow().replace(second=0, microsecond=0)
+
+
+def _upcoming_variant(lang: Optional[str]) -> tuple:
+    return ("upcoming", _this_minute(), lang)
+
+
+async def _load_upcoming(lang: Optional[str] = None) -> Tuple[bytes, Dict[str, str]]:
+    """The first page of upcoming=true"""
+    return await _load_event_page(_this_minute(), None, None, DEFAULT_PAGE_SIZE, lang)
+
+
+bundle.register("events", "events", _load_events)
+bundle.register("upcoming_events", "events", _load_upcoming, variant=_upcoming_variant, best=False)
 
 
 @router.get("/events/{event_id}", response_model=EventResponse)
-async def get_event(event_id: str):
-    doc = await db.events.find_one({"_id": event_id})
+async def get_event(event_id: str, lang: Optional[Lang] = None):
+    doc = await media.resolve_one(_present(await events_repo.get(event_id, lang=lang)))
     if not doc:
         raise HTTPException(status_code=404, detail="Event not found")
-    return to_response(doc)
+    return localized_response(EventResponse, doc, lang)
 
 
 @router.post("/events", response_model=EventResponse, dependencies=[Depends(get_current_admin)])
 async def create_event(event: EventCreate):
-    doc = event.model_dump()
-    doc["_id"] = str(uuid.uuid4())
-    await db.events.insert_one(doc)
-    return to_response(doc)
+    return _present(await events_repo.create(_with_dates(event.model_dump())))
+
+
+async def _stored(event_id: str) -> dict:
+    """The event being updated, to check a partial date change against"""
+    doc = await events_repo.get(event_id)
+    if doc is None:
+        raise HTTPException(status_code=404, detail="Event not found")
+    return doc
 
 
 @router.put("/events/{event_id}", response_model=EventResponse, dependencies=[Depends(get_current_admin)])
@@ -169,77 +362,36 @@ async def update_event(event_id: str, event: EventUpdate):
     if not update_data:
         raise HTTPException(status_code=400, detail="No fields to update")
     
-    res = await db.events.update_one({"_id": event_id}, {"$set": update_data})
-    if res.matched_count == 0:
+    doc = await events_repo.update(event_id, _with_dates(update_data, await _stored(event_id)))
+    if doc is None:
         raise HTTPException(status_code=404, detail="Event not found")
-    
-    doc = await db.events.find_one({"_id": event_id})
-    return to_response(doc)
+    return _present(doc)
 
 
 @router.delete("/events/{event_id}", dependencies=[Depends(get_current_admin)])
 async def delete_event(event_id: str):
-    doc = await db.events.find_one({"_id": event_id})
-    if not doc:
+    doc = await events_repo.delete(event_id)
+    if doc is None:
         raise HTTPException(status_code=404, detail="Event not found")
-    
-    # Delete uploaded image if exists
-    if doc.get("image_url", "").startswith("/api/uploads/"):
-        filename = doc["image_url"].split("/")[-1]
-        file_path = UPLOAD_DIR / filename
-        if file_path.exists():
-            file_path.unlink()
-    
-    await db.events.delete_one({"_id": event_id})
     return {"message": "Event deleted"}
 
 
 # Image upload endpoint
 @router.post("/events/upload", dependencies=[Depends(get_current_admin)])
 async def upload_event_image(file: UploadFile = File(...)):
-    if not file.filename:
-        raise HTTPException(status_code=400, detail="No filename provided")
-    
-    if not is_allowed_file(file.filename):
-        raise HTTPException(
-            status_code=400, 
-            detail=f"File type not allowed. Allowed types: {', '.join(ALLOWED_EXTENSIONS)}"
-        )
-    
-    file_extension = get_file_extension(file.filename)
-    unique_filename = f"{uuid.uuid4()}{file_extension}"
-    file_path = UPLOAD_DIR / unique_filename
-    
-    try:
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to save file: {str(e)}")
-    
-    image_url = f"/api/uploads/events/{unique_filename}"
-    return {"filename": unique_filename, "image_url": image_url, "message": "Image uploaded successfully"}
-
-
-# Serve uploaded images
-@router.get("/uploads/events/{filename}")
-async def get_uploaded_event_image(filename: str):
-    file_path = UPLOAD_DIR / filename
-    if not file_path.exists():
-        raise HTTPException(status_code=404, detail="Image not found")
+    stored = await image_store.put(file)
     
-    extension = get_file_extension(filename)
-    content_types = {
-        ".jpg": "image/jpeg", ".jpeg": "image/jpeg",
-        ".png": "image/png", ".gif": "image/gif", ".webp": "image/webp"
-    }
-    return FileResponse(file_path, media_type=content_types.get(extension, "application/octet-stream"))
+    image_url = stored.url
+    return {"filename": stored.filename, "image_url": image_url, "message": "Image uploaded successfully"}
 
 
 # Create event with image upload
 @router.post("/events/with-image", response_model=EventResponse, dependencies=[Depends(get_current_admin)])
 async def create_event_with_image(
-    date_en: str = Form(...),
-    date_fr: str = Form(...),
+    starts_at: Optional[datetime] = Form(None),
+    ends_at: Optional[datetime] = Form(None),
+    date_en: str = Form(""),
+    date_fr: str = Form(""),
     title_en: str = Form(...),
     title_fr: str = Form(...),
     location_en: str = Form(...),
@@ -250,25 +402,9 @@ async def create_event_with_image(
     order: int = Form(0),
     image: UploadFile = File(None)
 ):
-    image_url = ""
-    
-    if image and image.filename:
-        if not is_allowed_file(image.filename):
-            raise HTTPException(status_code=400, detail=f"File type not allowed")
-        
-        file_extension = get_file_extension(image.filename)
-        unique_filename = f"{uuid.uuid4()}{file_extension}"
-        file_path = UPLOAD_DIR / unique_filename
-        
-        try:
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(image.file, buffer)
-            image_url = f"/api/uploads/events/{unique_filename}"
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Failed to save image: {str(e)}")
-    
     doc = {
-        "_id": str(uuid.uuid4()),
+        "starts_at": starts_at,
+        "ends_at": ends_at,
         "date_en": date_en,
         "date_fr": date_fr,
         "title_en": title_en,
@@ -278,18 +414,25 @@ async def create_event_with_image(
         "summary_en": summary_en,
         "summary_fr": summary_fr,
         "media_key": media_key,
-        "image_url": image_url,
+        "image_url": "",
         "order": order
     }
+    # Checked before the image is stored, so a refused date leaves no upload behind
+    doc = _with_dates(doc)
     
-    await db.events.insert_one(doc)
-    return to_response(doc)
+    if image and image.filename:
+        stored = await image_store.put(image)
+        doc["image_url"] = stored.url
+    
+    return _present(await events_repo.create(doc))
 
 
 # Update event with image upload
 @router.put("/events/{event_id}/with-image", response_model=EventResponse, dependencies=[Depends(get_current_admin)])
 async def update_event_with_image(
     event_id: str,
+    starts_at: Optional[datetime] = Form(None),
+    ends_at: Optional[datetime] = Form(None),
     date_en: str = Form(None),
     date_fr: str = Form(None),
     title_en: str = Form(None),
@@ -302,11 +445,9 @@ async def update_event_with_image(
     order: int = Form(None),
     image: UploadFile = File(None)
 ):
-    doc = await db.events.find_one({"_id": event_id})
-    if not doc:
-        raise HTTPException(status_code=404, detail="Event not found")
-    
     update_data = {}
+    if starts_at is not None: update_data["starts_at"] = starts_at
+    if ends_at is not None: update_data["ends_at"] = ends_at
     if date_en is not None: update_data["date_en"] = date_en
     if date_fr is not None: update_data["date_fr"] = date_fr
     if title_en is not None: update_data["title_en"] = title_en
@@ -317,33 +458,16 @@ async def update_event_with_image(
     if summary_fr is not None: update_data["summary_fr"] = summary_fr
     if media_key is not None: update_data["media_key"] = media_key
     if order is not None: update_data["order"] = order
+    update_data = _with_dates(update_data, await _stored(event_id))
     
     if image and image.filename:
-        if not is_allowed_file(image.filename):
-            raise HTTPException(status_code=400, detail=f"File type not allowed")
-        
-        # Delete old image
-        old_url = doc.get("image_url", "")
-        if old_url.startswith("/api/uploads/"):
-            old_filename = old_url.split("/")[-1]
-            old_path = UPLOAD_DIR / old_filename
-            if old_path.exists():
-                old_path.unlink()
-        
-        file_extension = get_file_extension(image.filename)
-        unique_filename = f"{uuid.uuid4()}{file_extension}"
-        file_path = UPLOAD_DIR / unique_filename
-        
-        try:
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(image.file, buffer)
-            update_data["image_url"] = f"/api/uploads/events/{unique_filename}"
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Failed to save image: {str(e)}")
+        stored = await image_store.put(image)
+        update_data["image_url"] = stored.url
     
     if not update_data:
         raise HTTPException(status_code=400, detail="No fields to update")
     
-    await db.events.update_one({"_id": event_id}, {"$set": update_data})
-    doc = await db.events.find_one({"_id": event_id})
-    return to_response(doc)
+    doc = await events_repo.update(event_id, update_data)
+    if doc is None:
+        raise HTTPException(status_code=404, detail="Event not found")
+    return _present(doc)
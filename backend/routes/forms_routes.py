@@ -1,25 +1,103 @@
-from datetime import datetime
-from typing import List
 import uuid
+from datetime import datetime
+from typing import List, Literal, Optional
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header, Query, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, EmailStr, Field, ConfigDict
-
-from database import db
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+import admission
+import export
+import indexes
+from idempotency import claim_for, fingerprint, idempotency_keys
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, date_range_filter, encode_cursor, keyset_filter
+from repository import Repository, to_response
 from routes.auth_routes import get_current_admin
+from write_behind import FORMS_WRITE_BEHIND, form_queue
 
 router = APIRouter(prefix="/api/forms", tags=["forms"])
 
-
-# Helper to convert Mongo docs to response format
-def to_response(doc: dict) -> dict:
-    """Convert MongoDB doc, converting _id to string id"""
-    if doc is None:
-        return None
-    result = dict(doc)
-    if "_id" in result:
-        result["id"] = str(result.pop("_id"))
-    return result
+# Submission lists are paged newest first on (created_at, _id)
+_NEWEST_FIRST = [("created_at", DESCENDING), ("_id", DESCENDING)]
+
+for _collection in ("join_forms", "donate_forms", "contact_forms"):
+    indexes.register(
+        _collection,
+        IndexModel(_NEWEST_FIRST),
+        IndexModel([("email", ASCENDING)] + _NEWEST_FIRST),
+    )
+indexes.register(
+    "contact_forms",
+    IndexModel([("topic", ASCENDING)] + _NEWEST_FIRST),
+    IndexModel([("city", ASCENDING)] + _NEWEST_FIRST),
+)
+
+admission.register(
+    "forms", "POST", "/api/forms/",
+    per_client=admission.Rate(per_second=0.5, burst=10),
+    overall=admission.Rate(per_second=100, burst=200),
+)
+
+
+async def save_submission(
+    repo: Repository, form: BaseModel, response: Response, idempotency_key: Optional[str]
+) -> dict:
+    """Store a submission once, or journal it for a batched insert when FORMS_WRITE_BEHIND is set.
+
+    A repeat of the same Idempotency-Key, or of the same content within
+    DUPLICATE_WINDOW_SECONDS without one, gets the first response back
+    with Idempotent-Replayed: true instead of being stored again.
+    """
+    payload = form.model_dump()
+    now = datetime.utcnow()
+    # MongoDB keeps milliseconds, so a replayed created_at matches the first one
+    created_at = now.replace(microsecond=now.microsecond // 1000 * 1000)
+    doc = {**payload, "_id": str(uuid.uuid4()), "created_at": created_at}
+    claim = claim_for(repo.name, idempotency_key, fingerprint(payload), to_response(doc))
+
+    # Claimed before acknowledging even with write-behind, so a replay on any worker finds the first id
+    previous = await idempotency_keys.find(claim)
+    if previous is None:
+        previous = await idempotency_keys.claim(claim)
+    if previous is not None:
+        response.headers["Idempotent-Replayed"] = "true"
+        return previous
+    try:
+        if FORMS_WRITE_BEHIND:
+            return await form_queue.submit(repo, doc)
+        return await repo.create(doc)
+    except Exception:
+        await idempotency_keys.release(claim)
+        raise
+
+
+async def list_submissions(
+    repo: Repository,
+    response: Response,
+    filters: dict,
+    cursor: Optional[str],
+    limit: int,
+    include_total: bool,
+) -> List[dict]:
+    """Return one page of submissions, newest first.
+
+    The cursor for the next page is sent in the X-Next-Cursor header and,
+    when requested, the total matching count in X-Total-Count.
+    """
+    query = {k: v for k, v in filters.items() if v is not None}
+    page_query = {**query, **keyset_filter("created_at", cursor)}
+    items = await repo.find(page_query, sort=_NEWEST_FIRST, limit=limit + 1)
+
+    if len(items) > limit:
+        items = items[:limit]
+        last = items[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(last["created_at"], last["id"])
+
+    if include_total:
+        response.headers["X-Total-Count"] = str(await repo.count(query))
+
+    return items
 
 
 # Join form
@@ -37,19 +115,26 @@ class JoinFormResponse(JoinFormBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+join_repo = Repository("join_forms", JoinFormResponse, sort=_NEWEST_FIRST, cached=False)
+
+
 @router.post("/join", response_model=JoinFormResponse)
-async def submit_join(form: JoinFormBase):
-    doc = form.model_dump()
-    doc["_id"] = str(uuid.uuid4())
-    doc["created_at"] = datetime.utcnow()
-    await db.join_forms.insert_one(doc)
-    return to_response(doc)
+async def submit_join(form: JoinFormBase, response: Response, idempotency_key: Optional[str] = Header(None)):
+    return await save_submission(join_repo, form, response, idempotency_key)
 
 
 @router.get("/join", response_model=List[JoinFormResponse], dependencies=[Depends(get_current_admin)])
-async def list_join():
-    items = await db.join_forms.find().sort("created_at", -1).to_list(500)
-    return [to_response(item) for item in items]
+async def list_join(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    date_from: Optional[datetime] = Query(None, alias="from"),
+    date_to: Optional[datetime] = Query(None, alias="to"),
+    email: Optional[str] = None,
+    include_total: bool = False,
+):
+    filters = {**date_range_filter("created_at", date_from, date_to), "email": email}
+    return await list_submissions(join_repo, response, filters, cursor, limit, include_total)
 
 
 # Donate form (pledge only)
@@ -67,19 +152,26 @@ class DonateFormResponse(DonateFormBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+donate_repo = Repository("donate_forms", DonateFormResponse, sort=_NEWEST_FIRST, cached=False)
+
+
 @router.post("/donate", response_model=DonateFormResponse)
-async def submit_donate(form: DonateFormBase):
-    doc = form.model_dump()
-    doc["_id"] = str(uuid.uuid4())
-    doc["created_at"] = datetime.utcnow()
-    await db.donate_forms.insert_one(doc)
-    return to_response(doc)
+async def submit_donate(form: DonateFormBase, response: Response, idempotency_key: Optional[str] = Header(None)):
+    return await save_submission(donate_repo, form, response, idempotency_key)
 
 
 @router.get("/donate", response_model=List[DonateFormResponse], dependencies=[Depends(get_current_admin)])
-async def list_donate():
-    items = await db.donate_forms.find().sort("created_at", -1).to_list(500)
-    return [to_response(item) for item in items]
+async def list_donate(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    date_from: Optional[datetime] = Query(None, alias="from"),
+    date_to: Optional[datetime] = Query(None, alias="to"),
+    email: Optional[str] = None,
+    include_total: bool = False,
+):
+    filters = {**date_range_filter("created_at", date_from, date_to), "email": email}
+    return await list_submissions(donate_repo, response, filters, cursor, limit, include_total)
 
 
 # Contact form
@@ -101,16 +193,71 @@ class ContactFormResponse(ContactFormBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+contact_repo = Repository("contact_forms", ContactFormResponse, sort=_NEWEST_FIRST, cached=False)
+
+for _repo in (join_repo, donate_repo, contact_repo):
+    form_queue.register(_repo)
+
+
 @router.post("/contact", response_model=ContactFormResponse)
-async def submit_contact(form: ContactFormBase):
-    doc = form.model_dump()
-    doc["_id"] = str(uuid.uuid4())
-    doc["created_at"] = datetime.utcnow()
-    await db.contact_forms.insert_one(doc)
-    return to_response(doc)
+async def submit_contact(form: ContactFormBase, response: Response, idempotency_key: Optional[str] = Header(None)):
+    return await save_submission(contact_repo, form, response, idempotency_key)
 
 
 @router.get("/contact", response_model=List[ContactFormResponse], dependencies=[Depends(get_current_admin)])
-async def list_contact():
-    items = await db.contact_forms.find().sort("created_at", -1).to_list(500)
-    return [to_response(item) for item in items]
+async def list_contact(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    date_from: Optional[datetime] = Query(None, alias="from"),
+    date_to: Optional[datetime] = Query(None, alias="to"),
+    email: Optional[str] = None,
+    topic: Optional[str] = None,
+    city: Optional[str] = None,
+    include_total: bool = False,
+):
+    filters = {
+        **date_range_filter("created_at", date_from, date_to),
+        "email": email,
+        "topic": topic,
+        "city": city,
+    }
+    return await list_submissions(contact_repo, response, filters, cursor, limit, include_total)
+
+
+# Export
+_EXPORTS = {"join": join_repo, "donate": donate_repo, "contact": contact_repo}
+_OLDEST_FIRST = [("created_at", ASCENDING), ("_id", ASCENDING)]
+
+
+@router.get("/{kind}/export", dependencies=[Depends(get_current_admin)])
+async def export_submissions(
+    kind: Literal["join", "donate", "contact"],
+    export_format: Literal["csv", "ndjson"] = Query("csv", alias="format"),
+    date_from: Optional[datetime] = Query(None, alias="from"),
+    date_to: Optional[datetime] = Query(None, alias="to"),
+    gzip: bool = False,
+):
+    """Every submission of one kind, oldest first, streamed from the cursor as CSV or NDJSON"""
+    repo = _EXPORTS[kind]
+    docs = repo.stream(date_range_filter("created_at", date_from, date_to), sort=_OLDEST_FIRST)
+    if export_format == "csv":
+        # id and created_at lead, then the form's own fields
+        columns = ["id", "created_at"] + [
+            name for name in repo.response_model.model_fields if name not in ("id", "created_at")
+        ]
+        chunks = export.csv_chunks(docs, columns)
+        media_type = "text/csv; charset=utf-8"
+    else:
+        chunks = export.ndjson_chunks(docs, repo.response_model)
+        media_type = "application/x-ndjson"
+    filename = f"{kind}-submissions-{datetime.utcnow():%Y%m%d}.{export_format}"
+    if gzip:
+        chunks = export.gzipped(chunks)
+        media_type = "application/gzip"
+        filename += ".gz"
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"', "Cache-Control": "no-store"},
+    )
@@ -1,44 +1,30 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, HTTPException, Request, UploadFile, File, Form
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel, Field, ConfigDict
-import uuid
-import os
-import shutil
-from pathlib import Path
-
-from database import db
+from pymongo import ASCENDING, IndexModel
+
+import bundle
+import image_store
+import indexes
+import media
+import seed
+from localization import Lang
+from media import ResolvedMedia
+from repository import Repository
+from responses import cached_json, localized_response, render_list
+from search import search_index
+from serialization import TrustedJSONRoute
 from routes.auth_routes import get_current_admin
 
-router = APIRouter(prefix="/api", tags=["gallery"])
-
-# Create uploads directory
-UPLOAD_DIR = Path("/app/uploads/gallery")
-UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
-
-# Allowed image extensions
-ALLOWED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp"}
-
-
-def get_file_extension(filename: str) -> str:
-    """Get file extension from filename"""
-    return Path(filename).suffix.lower()
+router = APIRouter(
+    prefix="/api",
+    tags=["gallery"],
+    route_class=TrustedJSONRoute,
+    default_response_class=ORJSONResponse,
+)
 
-
-def is_allowed_file(filename: str) -> bool:
-    """Check if file extension is allowed"""
-    return get_file_extension(filename) in ALLOWED_EXTENSIONS
-
-
-# Helper to convert Mongo docs to response format
-def to_response(doc: dict) -> dict:
-    """Convert MongoDB doc, converting _id to string id"""
-    if doc is None:
-        return None
-    result = dict(doc)
-    if "_id" in result:
-        result["id"] = str(result.pop("_id"))
-    return result
+indexes.register("gallery", IndexModel([("order", ASCENDING)]))
 
 
 # Gallery models
@@ -52,6 +38,7 @@ class GalleryItemBase(BaseModel):
 
 class GalleryItemResponse(GalleryItemBase):
     id: str
+    media: Optional[ResolvedMedia] = None
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -68,10 +55,15 @@ class GalleryItemUpdate(BaseModel):
     order: Optional[int] = None
 
 
+gallery_repo = Repository("gallery", GalleryItemResponse, image_field="image_url")
+media.resolves_media("gallery")
+search_index.register(gallery_repo, "title", {"title": 3.0})
+
+
 # Default gallery items
 DEFAULT_GALLERY = [
     {
-        "_id": str(uuid.uuid4()),
+        "_id": "soccer1",
         "title_en": "Community Soccer Day",
         "title_fr": "Journée de soccer communautaire",
         "media_key": "gallery.soccer1",
@@ -79,7 +71,7 @@ DEFAULT_GALLERY = [
         "order": 1
     },
     {
-        "_id": str(uuid.uuid4()),
+        "_id": "youth1",
         "title_en": "Youth Leadership Workshop",
         "title_fr": "Atelier de leadership pour les jeunes",
         "media_key": "gallery.youth1",
@@ -87,7 +79,7 @@ DEFAULT_GALLERY = [
         "order": 2
     },
     {
-        "_id": str(uuid.uuid4()),
+        "_id": "family1",
         "title_en": "Family Fun Day",
         "title_fr": "Journée amusante en famille",
         "media_key": "gallery.family1",
@@ -95,7 +87,7 @@ DEFAULT_GALLERY = [
         "order": 3
     },
     {
-        "_id": str(uuid.uuid4()),
+        "_id": "culture1",
         "title_en": "Cultural Celebration",
         "title_fr": "Célébration culturelle",
         "media_key": "gallery.culture1",
@@ -103,7 +95,7 @@ DEFAULT_GALLERY = [
         "order": 4
     },
     {
-        "_id": str(uuid.uuid4()),
+        "_id": "soccer2",
         "title_en": "Summer Tournament",
         "title_fr": "Tournoi d'été",
         "media_key": "gallery.soccer2",
@@ -111,7 +103,7 @@ DEFAULT_GALLERY = [
         "order": 5
     },
     {
-        "_id": str(uuid.uuid4()),
+        "_id": "community1",
         "title_en": "Community BBQ",
         "title_fr": "BBQ communautaire",
         "media_key": "gallery.community1",
@@ -120,35 +112,35 @@ DEFAULT_GALLERY = [
     }
 ]
 
+seed.register("gallery", DEFAULT_GALLERY)
+
 
 @router.get("/gallery", response_model=List[GalleryItemResponse])
-async def list_gallery():
+async def list_gallery(request: Request, lang: Optional[Lang] = None):
     """Get all gallery items sorted by order"""
-    items = await db.gallery.find().sort("order", 1).to_list(100)
-    if not items:
-        # Insert default gallery items
-        for item in DEFAULT_GALLERY:
-            await db.gallery.insert_one(item)
-        items = await db.gallery.find().sort("order", 1).to_list(100)
-    return [to_response(item) for item in items]
+    return await cached_json(request, "gallery", lambda: _load_gallery(lang), variant=lang)
+
+
+async def _load_gallery(lang: Optional[str] = None) -> bytes:
+    return render_list(GalleryItemResponse, await media.resolve(await gallery_repo.find(lang=lang)), lang)
+
+
+bundle.register("gallery", "gallery", _load_gallery)
 
 
 @router.get("/gallery/{gallery_id}", response_model=GalleryItemResponse)
-async def get_gallery_item(gallery_id: str):
+async def get_gallery_item(gallery_id: str, lang: Optional[Lang] = None):
     """Get a single gallery item by ID"""
-    doc = await db.gallery.find_one({"_id": gallery_id})
+    doc = await media.resolve_one(await gallery_repo.get(gallery_id, lang=lang))
     if not doc:
         raise HTTPException(status_code=404, detail="Gallery item not found")
-    return to_response(doc)
+    return localized_response(GalleryItemResponse, doc, lang)
 
 
 @router.post("/gallery", response_model=GalleryItemResponse, dependencies=[Depends(get_current_admin)])
 async def create_gallery_item(item: GalleryItemCreate):
     """Create a new gallery item (admin only)"""
-    doc = item.model_dump()
-    doc["_id"] = str(uuid.uuid4())
-    await db.gallery.insert_one(doc)
-    return to_response(doc)
+    return await gallery_repo.create(item.model_dump())
 
 
 @router.put("/gallery/{gallery_id}", response_model=GalleryItemResponse, dependencies=[Depends(get_current_admin)])
@@ -158,30 +150,18 @@ async def update_gallery_item(gallery_id: str, item: GalleryItemUpdate):
     if not update_data:
         raise HTTPException(status_code=400, detail="No fields to update")
     
-    res = await db.gallery.update_one({"_id": gallery_id}, {"$set": update_data})
-    if res.matched_count == 0:
+    doc = await gallery_repo.update(gallery_id, update_data)
+    if doc is None:
         raise HTTPException(status_code=404, detail="Gallery item not found")
-    
-    doc = await db.gallery.find_one({"_id": gallery_id})
-    return to_response(doc)
+    return doc
 
 
 @router.delete("/gallery/{gallery_id}", dependencies=[Depends(get_current_admin)])
 async def delete_gallery_item(gallery_id: str):
     """Delete a gallery item (admin only)"""
-    # Get the item first to check for uploaded image
-    doc = await db.gallery.find_one({"_id": gallery_id})
-    if not doc:
+    doc = await gallery_repo.delete(gallery_id)
+    if doc is None:
         raise HTTPException(status_code=404, detail="Gallery item not found")
-    
-    # Delete the uploaded image file if it exists
-    if doc.get("image_url", "").startswith("/api/uploads/"):
-        filename = doc["image_url"].split("/")[-1]
-        file_path = UPLOAD_DIR / filename
-        if file_path.exists():
-            file_path.unlink()
-    
-    res = await db.gallery.delete_one({"_id": gallery_id})
     return {"message": "Gallery item deleted"}
 
 
@@ -189,62 +169,18 @@ async def delete_gallery_item(gallery_id: str):
 @router.post("/gallery/upload", dependencies=[Depends(get_current_admin)])
 async def upload_gallery_image(file: UploadFile = File(...)):
     """Upload an image for gallery (admin only)"""
-    
-    # Validate file type
-    if not file.filename:
-        raise HTTPException(status_code=400, detail="No filename provided")
-    
-    if not is_allowed_file(file.filename):
-        raise HTTPException(
-            status_code=400, 
-            detail=f"File type not allowed. Allowed types: {', '.join(ALLOWED_EXTENSIONS)}"
-        )
-    
-    # Generate unique filename
-    file_extension = get_file_extension(file.filename)
-    unique_filename = f"{uuid.uuid4()}{file_extension}"
-    file_path = UPLOAD_DIR / unique_filename
-    
-    # Save the file
-    try:
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to save file: {str(e)}")
+    stored = await image_store.put(file)
     
     # Return the URL path to access the image
-    image_url = f"/api/uploads/gallery/{unique_filename}"
+    image_url = stored.url
     
     return {
-        "filename": unique_filename,
+        "filename": stored.filename,
         "image_url": image_url,
         "message": "Image uploaded successfully"
     }
 
 
-# Serve uploaded images
-@router.get("/uploads/gallery/{filename}")
-async def get_uploaded_image(filename: str):
-    """Serve uploaded gallery images"""
-    file_path = UPLOAD_DIR / filename
-    
-    if not file_path.exists():
-        raise HTTPException(status_code=404, detail="Image not found")
-    
-    # Determine content type
-    extension = get_file_extension(filename)
-    content_types = {
-        ".jpg": "image/jpeg",
-        ".jpeg": "image/jpeg",
-        ".png": "image/png",
-        ".gif": "image/gif",
-        ".webp": "image/webp"
-    }
-    content_type = content_types.get(extension, "application/octet-stream")
-    
-    return FileResponse(file_path, media_type=content_type)
-
-
 # Create gallery item with image upload in one request
 @router.post("/gallery/with-image", response_model=GalleryItemResponse, dependencies=[Depends(get_current_admin)])
 async def create_gallery_with_image(
@@ -260,26 +196,11 @@ async def create_gallery_with_image(
     
     # Handle image upload if provided
     if image and image.filename:
-        if not is_allowed_file(image.filename):
-            raise HTTPException(
-                status_code=400, 
-                detail=f"File type not allowed. Allowed types: {', '.join(ALLOWED_EXTENSIONS)}"
-            )
-        
-        file_extension = get_file_extension(image.filename)
-        unique_filename = f"{uuid.uuid4()}{file_extension}"
-        file_path = UPLOAD_DIR / unique_filename
-        
-        try:
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(image.file, buffer)
-            image_url = f"/api/uploads/gallery/{unique_filename}"
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Failed to save image: {str(e)}")
+        stored = await image_store.put(image)
+        image_url = stored.url
     
     # Create gallery item
     doc = {
-        "_id": str(uuid.uuid4()),
         "title_en": title_en,
         "title_fr": title_fr,
         "media_key": media_key,
@@ -287,8 +208,7 @@ async def create_gallery_with_image(
         "order": order
     }
     
-    await db.gallery.insert_one(doc)
-    return to_response(doc)
+    return await gallery_repo.create(doc)
 
 
 # Update gallery item with image upload
@@ -303,11 +223,6 @@ async def update_gallery_with_image(
 ):
     """Update gallery item with optional new image upload (admin only)"""
     
-    # Check if item exists
-    doc = await db.gallery.find_one({"_id": gallery_id})
-    if not doc:
-        raise HTTPException(status_code=404, detail="Gallery item not found")
-    
     update_data = {}
     
     # Add form fields if provided
@@ -322,35 +237,13 @@ async def update_gallery_with_image(
     
     # Handle image upload if provided
     if image and image.filename:
-        if not is_allowed_file(image.filename):
-            raise HTTPException(
-                status_code=400, 
-                detail=f"File type not allowed. Allowed types: {', '.join(ALLOWED_EXTENSIONS)}"
-            )
-        
-        # Delete old uploaded image if exists
-        old_url = doc.get("image_url", "")
-        if old_url.startswith("/api/uploads/"):
-            old_filename = old_url.split("/")[-1]
-            old_path = UPLOAD_DIR / old_filename
-            if old_path.exists():
-                old_path.unlink()
-        
-        # Save new image
-        file_extension = get_file_extension(image.filename)
-        unique_filename = f"{uuid.uuid4()}{file_extension}"
-        file_path = UPLOAD_DIR / unique_filename
-        
-        try:
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(image.file, buffer)
-            update_data["image_url"] = f"/api/uploads/gallery/{unique_filename}"
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Failed to save image: {str(e)}")
+        stored = await image_store.put(image)
+        update_data["image_url"] = stored.url
     
     if not update_data:
         raise HTTPException(status_code=400, detail="No fields to update")
     
-    await db.gallery.update_one({"_id": gallery_id}, {"$set": update_data})
-    doc = await db.gallery.find_one({"_id": gallery_id})
-    return to_response(doc)
+    doc = await gallery_repo.update(gallery_id, update_data)
+    if doc is None:
+        raise HTTPException(status_code=404, detail="Gallery item not found")
+    return doc
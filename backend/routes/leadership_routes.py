@@ -1,39 +1,28 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, HTTPException, Request, UploadFile, File, Form
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel, Field, ConfigDict
-import uuid
-import shutil
-from pathlib import Path
-
-from database import db
+from pymongo import ASCENDING, IndexModel
+
+import bundle
+import image_store
+import indexes
+import seed
+from localization import Lang
+from repository import Repository
+from responses import cached_json, localized_response, render_list
+from search import search_index
+from serialization import TrustedJSONRoute
 from routes.auth_routes import get_current_admin
 
-router = APIRouter(prefix="/api", tags=["leadership"])
-
-# Create uploads directory
-UPLOAD_DIR = Path("/app/uploads/leadership")
-UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
-
-# Allowed image extensions
-ALLOWED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp"}
-
-
-def get_file_extension(filename: str) -> str:
-    return Path(filename).suffix.lower()
+router = APIRouter(
+    prefix="/api",
+    tags=["leadership"],
+    route_class=TrustedJSONRoute,
+    default_response_class=ORJSONResponse,
+)
 
-
-def is_allowed_file(filename: str) -> bool:
-    return get_file_extension(filename) in ALLOWED_EXTENSIONS
-
-
-def to_response(doc: dict) -> dict:
-    if doc is None:
-        return None
-    result = dict(doc)
-    if "_id" in result:
-        result["id"] = str(result.pop("_id"))
-    return result
+indexes.register("leadership", IndexModel([("order", ASCENDING)]))
 
 
 # Leadership models
@@ -70,10 +59,14 @@ class LeadershipMemberUpdate(BaseModel):
     order: Optional[int] = None
 
 
+leadership_repo = Repository("leadership", LeadershipMemberResponse, image_field="image_url")
+search_index.register(leadership_repo, "name", {"name": 3.0, "role": 2.0, "bio": 1.0})
+
+
 # Default leadership team members
 DEFAULT_LEADERSHIP = [
     {
-        "_id": str(uuid.uuid4()),
+        "_id": "jean-pierre-mbeki",
         "name": "Jean-Pierre Mbeki",
         "role_en": "Founder & President",
         "role_fr": "Fondateur et Président",
@@ -85,7 +78,7 @@ DEFAULT_LEADERSHIP = [
         "order": 1
     },
     {
-        "_id": str(uuid.uuid4()),
+        "_id": "aminata-diallo",
         "name": "Aminata Diallo",
         "role_en": "Vice President",
         "role_fr": "Vice-Présidente",
@@ -97,7 +90,7 @@ DEFAULT_LEADERSHIP = [
         "order": 2
     },
     {
-        "_id": str(uuid.uuid4()),
+        "_id": "emmanuel-okonkwo",
         "name": "Emmanuel Okonkwo",
         "role_en": "Director of Soccer Programs",
         "role_fr": "Directeur des programmes de soccer",
@@ -109,7 +102,7 @@ DEFAULT_LEADERSHIP = [
         "order": 3
     },
     {
-        "_id": str(uuid.uuid4()),
+        "_id": "marie-claire-beaumont",
         "name": "Marie-Claire Beaumont",
         "role_en": "Director of Youth Development",
         "role_fr": "Directrice du développement des jeunes",
@@ -121,7 +114,7 @@ DEFAULT_LEADERSHIP = [
         "order": 4
     },
     {
-        "_id": str(uuid.uuid4()),
+        "_id": "david-ndongo",
         "name": "David Ndongo",
         "role_en": "Director of Cultural Programs",
         "role_fr": "Directeur des programmes culturels",
@@ -133,7 +126,7 @@ DEFAULT_LEADERSHIP = [
         "order": 5
     },
     {
-        "_id": str(uuid.uuid4()),
+        "_id": "fatou-sow",
         "name": "Fatou Sow",
         "role_en": "Director of Family Programs",
         "role_fr": "Directrice des programmes familiaux",
@@ -145,7 +138,7 @@ DEFAULT_LEADERSHIP = [
         "order": 6
     },
     {
-        "_id": str(uuid.uuid4()),
+        "_id": "michel-tremblay",
         "name": "Michel Tremblay",
         "role_en": "Treasurer",
         "role_fr": "Trésorier",
@@ -157,7 +150,7 @@ DEFAULT_LEADERSHIP = [
         "order": 7
     },
     {
-        "_id": str(uuid.uuid4()),
+        "_id": "aisha-mohammed",
         "name": "Aisha Mohammed",
         "role_en": "Secretary & Communications",
         "role_fr": "Secrétaire et Communications",
@@ -170,34 +163,35 @@ DEFAULT_LEADERSHIP = [
     }
 ]
 
+seed.register("leadership", DEFAULT_LEADERSHIP)
+
 
 @router.get("/leadership", response_model=List[LeadershipMemberResponse])
-async def list_leadership():
+async def list_leadership(request: Request, lang: Optional[Lang] = None):
     """Get all leadership team members sorted by order"""
-    items = await db.leadership.find().sort("order", 1).to_list(100)
-    if not items:
-        for member in DEFAULT_LEADERSHIP:
-            await db.leadership.insert_one(member)
-        items = await db.leadership.find().sort("order", 1).to_list(100)
-    return [to_response(item) for item in items]
+    return await cached_json(request, "leadership", lambda: _load_leadership(lang), variant=lang)
+
+
+async def _load_leadership(lang: Optional[str] = None) -> bytes:
+    return render_list(LeadershipMemberResponse, await leadership_repo.find(lang=lang), lang)
+
+
+bundle.register("leadership", "leadership", _load_leadership)
 
 
 @router.get("/leadership/{member_id}", response_model=LeadershipMemberResponse)
-async def get_leadership_member(member_id: str):
+async def get_leadership_member(member_id: str, lang: Optional[Lang] = None):
     """Get a single leadership member by ID"""
-    doc = await db.leadership.find_one({"_id": member_id})
+    doc = await leadership_repo.get(member_id, lang=lang)
     if not doc:
         raise HTTPException(status_code=404, detail="Leadership member not found")
-    return to_response(doc)
+    return localized_response(LeadershipMemberResponse, doc, lang)
 
 
 @router.post("/leadership", response_model=LeadershipMemberResponse, dependencies=[Depends(get_current_admin)])
 async def create_leadership_member(member: LeadershipMemberCreate):
     """Create a new leadership member (admin only)"""
-    doc = member.model_dump()
-    doc["_id"] = str(uuid.uuid4())
-    await db.leadership.insert_one(doc)
-    return to_response(doc)
+    return await leadership_repo.create(member.model_dump())
 
 
 @router.put("/leadership/{member_id}", response_model=LeadershipMemberResponse, dependencies=[Depends(get_current_admin)])
@@ -207,29 +201,18 @@ async def update_leadership_member(member_id: str, member: LeadershipMemberUpdat
     if not update_data:
         raise HTTPException(status_code=400, detail="No fields to update")
     
-    res = await db.leadership.update_one({"_id": member_id}, {"$set": update_data})
-    if res.matched_count == 0:
+    doc = await leadership_repo.update(member_id, update_data)
+    if doc is None:
         raise HTTPException(status_code=404, detail="Leadership member not found")
-    
-    doc = await db.leadership.find_one({"_id": member_id})
-    return to_response(doc)
+    return doc
 
 
 @router.delete("/leadership/{member_id}", dependencies=[Depends(get_current_admin)])
 async def delete_leadership_member(member_id: str):
     """Delete a leadership member (admin only)"""
-    doc = await db.leadership.find_one({"_id": member_id})
-    if not doc:
+    doc = await leadership_repo.delete(member_id)
+    if doc is None:
         raise HTTPException(status_code=404, detail="Leadership member not found")
-    
-    # Delete uploaded image if exists
-    if doc.get("image_url", "").startswith("/api/uploads/"):
-        filename = doc["image_url"].split("/")[-1]
-        file_path = UPLOAD_DIR / filename
-        if file_path.exists():
-            file_path.unlink()
-    
-    await db.leadership.delete_one({"_id": member_id})
     return {"message": "Leadership member deleted"}
 
 
@@ -237,43 +220,10 @@ async def delete_leadership_member(member_id: str):
 @router.post("/leadership/upload", dependencies=[Depends(get_current_admin)])
 async def upload_leadership_image(file: UploadFile = File(...)):
     """Upload a photo for leadership team (admin only)"""
-    if not file.filename:
-        raise HTTPException(status_code=400, detail="No filename provided")
+    stored = await image_store.put(file)
     
-    if not is_allowed_file(file.filename):
-        raise HTTPException(
-            status_code=400, 
-            detail=f"File type not allowed. Allowed types: {', '.join(ALLOWED_EXTENSIONS)}"
-        )
-    
-    file_extension = get_file_extension(file.filename)
-    unique_filename = f"{uuid.uuid4()}{file_extension}"
-    file_path = UPLOAD_DIR / unique_filename
-    
-    try:
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to save file: {str(e)}")
-    
-    image_url = f"/api/uploads/leadership/{unique_filename}"
-    return {"filename": unique_filename, "image_url": image_url, "message": "Image uploaded successfully"}
-
-
-# Serve uploaded images
-@router.get("/uploads/leadership/{filename}")
-async def get_uploaded_leadership_image(filename: str):
-    """Serve uploaded leadership photos"""
-    file_path = UPLOAD_DIR / filename
-    if not file_path.exists():
-        raise HTTPException(status_code=404, detail="Image not found")
-    
-    extension = get_file_extension(filename)
-    content_types = {
-        ".jpg": "image/jpeg", ".jpeg": "image/jpeg",
-        ".png": "image/png", ".gif": "image/gif", ".webp": "image/webp"
-    }
-    return FileResponse(file_path, media_type=content_types.get(extension, "application/octet-stream"))
+    image_url = stored.url
+    return {"filename": stored.filename, "image_url": image_url, "message": "Image uploaded successfully"}
 
 
 # Create leadership member with image upload
@@ -293,22 +243,10 @@ async def create_leadership_with_image(
     image_url = ""
     
     if image and image.filename:
-        if not is_allowed_file(image.filename):
-            raise HTTPException(status_code=400, detail=f"File type not allowed")
-        
-        file_extension = get_file_extension(image.filename)
-        unique_filename = f"{uuid.uuid4()}{file_extension}"
-        file_path = UPLOAD_DIR / unique_filename
-        
-        try:
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(image.file, buffer)
-            image_url = f"/api/uploads/leadership/{unique_filename}"
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Failed to save image: {str(e)}")
+        stored = await image_store.put(image)
+        image_url = stored.url
     
     doc = {
-        "_id": str(uuid.uuid4()),
         "name": name,
         "role_en": role_en,
         "role_fr": role_fr,
@@ -320,8 +258,7 @@ async def create_leadership_with_image(
         "order": order
     }
     
-    await db.leadership.insert_one(doc)
-    return to_response(doc)
+    return await leadership_repo.create(doc)
 
 
 # Update leadership member with image upload
@@ -339,10 +276,6 @@ async def update_leadership_with_image(
     image: UploadFile = File(None)
 ):
     """Update leadership member with optional new image upload (admin only)"""
-    doc = await db.leadership.find_one({"_id": member_id})
-    if not doc:
-        raise HTTPException(status_code=404, detail="Leadership member not found")
-    
     update_data = {}
     if name is not None: update_data["name"] = name
     if role_en is not None: update_data["role_en"] = role_en
@@ -354,31 +287,13 @@ async def update_leadership_with_image(
     if order is not None: update_data["order"] = order
     
     if image and image.filename:
-        if not is_allowed_file(image.filename):
-            raise HTTPException(status_code=400, detail=f"File type not allowed")
-        
-        # Delete old image
-        old_url = doc.get("image_url", "")
-        if old_url.startswith("/api/uploads/"):
-            old_filename = old_url.split("/")[-1]
-            old_path = UPLOAD_DIR / old_filename
-            if old_path.exists():
-                old_path.unlink()
-        
-        file_extension = get_file_extension(image.filename)
-        unique_filename = f"{uuid.uuid4()}{file_extension}"
-        file_path = UPLOAD_DIR / unique_filename
-        
-        try:
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(image.file, buffer)
-            update_data["image_url"] = f"/api/uploads/leadership/{unique_filename}"
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Failed to save image: {str(e)}")
+        stored = await image_store.put(image)
+        update_data["image_url"] = stored.url
     
     if not update_data:
         raise HTTPException(status_code=400, detail="No fields to update")
     
-    await db.leadership.update_one({"_id": member_id}, {"$set": update_data})
-    doc = await db.leadership.find_one({"_id": member_id})
-    return to_response(doc)
+    doc = await leadership_repo.update(member_id, update_data)
+    if doc is None:
+        raise HTTPException(status_code=404, detail="Leadership member not found")
+    return doc
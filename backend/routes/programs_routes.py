@@ -1,23 +1,29 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel, Field, ConfigDict
-import uuid
-
-from database import db
+from pymongo import ASCENDING, IndexModel
+
+import bundle
+import indexes
+import media
+import seed
+from localization import Lang
+from media import ResolvedMedia
+from repository import Repository
+from responses import cached_json, localized_response, render_list
+from search import search_index
+from serialization import TrustedJSONRoute
 from routes.auth_routes import get_current_admin
 
-router = APIRouter(prefix="/api", tags=["programs"])
-
+router = APIRouter(
+    prefix="/api",
+    tags=["programs"],
+    route_class=TrustedJSONRoute,
+    default_response_class=ORJSONResponse,
+)
 
-# Helper to convert Mongo docs to response format
-def to_response(doc: dict) -> dict:
-    """Convert MongoDB doc, converting _id to string id"""
-    if doc is None:
-        return None
-    result = dict(doc)
-    if "_id" in result:
-        result["id"] = str(result.pop("_id"))
-    return result
+indexes.register("programs", IndexModel([("order", ASCENDING)]))
 
 
 # Program models
@@ -34,6 +40,7 @@ class ProgramBase(BaseModel):
 
 class ProgramResponse(ProgramBase):
     id: str
+    media: Optional[ResolvedMedia] = None
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -53,6 +60,11 @@ class ProgramUpdate(BaseModel):
     order: Optional[int] = None
 
 
+programs_repo = Repository("programs", ProgramResponse)
+media.resolves_media("programs")
+search_index.register(programs_repo, "title", {"title": 3.0, "description": 1.0, "bullets": 1.0})
+
+
 # Default programs data
 DEFAULT_PROGRAMS = [
     {
@@ -112,35 +124,35 @@ DEFAULT_PROGRAMS = [
     }
 ]
 
+seed.register("programs", DEFAULT_PROGRAMS)
+
 
 @router.get("/programs", response_model=List[ProgramResponse])
-async def list_programs():
+async def list_programs(request: Request, lang: Optional[Lang] = None):
     """Get all programs sorted by order"""
-    items = await db.programs.find().sort("order", 1).to_list(100)
-    if not items:
-        # Insert default programs
-        for prog in DEFAULT_PROGRAMS:
-            await db.programs.insert_one(prog)
-        items = await db.programs.find().sort("order", 1).to_list(100)
-    return [to_response(item) for item in items]
+    return await cached_json(request, "programs", lambda: _load_programs(lang), variant=lang)
+
+
+async def _load_programs(lang: Optional[str] = None) -> bytes:
+    return render_list(ProgramResponse, await media.resolve(await programs_repo.find(lang=lang)), lang)
+
+
+bundle.register("programs", "programs", _load_programs)
 
 
 @router.get("/programs/{program_id}", response_model=ProgramResponse)
-async def get_program(program_id: str):
+async def get_program(program_id: str, lang: Optional[Lang] = None):
     """Get a single program by ID"""
-    doc = await db.programs.find_one({"_id": program_id})
+    doc = await media.resolve_one(await programs_repo.get(program_id, lang=lang))
     if not doc:
         raise HTTPException(status_code=404, detail="Program not found")
-    return to_response(doc)
+    return localized_response(ProgramResponse, doc, lang)
 
 
 @router.post("/programs", response_model=ProgramResponse, dependencies=[Depends(get_current_admin)])
 async def create_program(program: ProgramCreate):
     """Create a new program (admin only)"""
-    doc = program.model_dump()
-    doc["_id"] = str(uuid.uuid4())
-    await db.programs.insert_one(doc)
-    return to_response(doc)
+    return await programs_repo.create(program.model_dump())
 
 
 @router.put("/programs/{program_id}", response_model=ProgramResponse, dependencies=[Depends(get_current_admin)])
@@ -150,18 +162,15 @@ async def update_program(program_id: str, program: ProgramUpdate):
     if not update_data:
         raise HTTPException(status_code=400, detail="No fields to update")
     
-    res = await db.programs.update_one({"_id": program_id}, {"$set": update_data})
-    if res.matched_count == 0:
+    doc = await programs_repo.update(program_id, update_data)
+    if doc is None:
         raise HTTPException(status_code=404, detail="Program not found")
-    
-    doc = await db.programs.find_one({"_id": program_id})
-    return to_response(doc)
+    return doc
 
 
 @router.delete("/programs/{program_id}", dependencies=[Depends(get_current_admin)])
 async def delete_program(program_id: str):
     """Delete a program (admin only)"""
-    res = await db.programs.delete_one({"_id": program_id})
-    if res.deleted_count == 0:
+    if await programs_repo.delete(program_id) is None:
         raise HTTPException(status_code=404, detail="Program not found")
     return {"message": "Program deleted"}
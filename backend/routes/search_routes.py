@@ -0,0 +1,60 @@
+from typing import List, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+
+from localization import Lang
+from search import search_index
+from serialization import TrustedJSONRoute
+
+router = APIRouter(
+    prefix="/api",
+    tags=["search"],
+    route_class=TrustedJSONRoute,
+    default_response_class=ORJSONResponse,
+)
+
+MAX_QUERY_LENGTH = 200
+
+
+class SearchHighlight(BaseModel):
+    field: str
+    text: str
+    # [start, end) character offsets of matched words within text
+    matches: List[List[int]]
+
+
+class SearchResult(BaseModel):
+    collection: str
+    id: str
+    lang: str
+    title: str
+    score: float
+    highlights: List[SearchHighlight]
+
+
+class SearchResponse(BaseModel):
+    query: str
+    total: int
+    results: List[SearchResult]
+
+
+@router.get("/search", response_model=SearchResponse)
+async def search(
+    q: str = Query(..., min_length=1, max_length=MAX_QUERY_LENGTH),
+    lang: Optional[Lang] = None,
+    limit: int = Query(20, ge=1, le=100),
+    collections: Optional[str] = Query(None, description="Comma-separated collections to search, e.g. programs,events"),
+):
+    """Ranked bilingual search over programs, events, gallery and leadership"""
+    wanted = None
+    if collections is not None:
+        wanted = [name.strip() for name in collections.split(",") if name.strip()]
+        unknown = set(wanted) - set(search_index.sources)
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown collections. Allowed: {', '.join(sorted(search_index.sources))}",
+            )
+    return search_index.search(q, lang, limit, wanted)
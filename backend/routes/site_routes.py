@@ -0,0 +1,30 @@
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request
+
+import bundle
+from localization import Lang
+from responses import cached_json
+
+router = APIRouter(prefix="/api", tags=["site"])
+
+
+@router.get("/site/bundle")
+async def get_site_bundle(
+    request: Request,
+    page: Optional[str] = Query(None, description="Limit the bundle to what one page needs"),
+    lang: Optional[Lang] = None,
+):
+    """Public content for a page (or the whole site) in one response with one ETag"""
+    if page is not None and page not in bundle.PAGES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown page. Allowed pages: {', '.join(sorted(bundle.PAGES))}",
+        )
+    return await cached_json(
+        request,
+        "site_bundle",
+        lambda: bundle.render(page, lang),
+        variant=bundle.variant(page, lang),
+        depends_on=bundle.collections_for(page),
+    )
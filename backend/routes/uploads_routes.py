@@ -0,0 +1,65 @@
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from fastapi import APIRouter, HTTPException, Query, Request
+
+import derivatives
+import image_store
+from static_files import IMMUTABLE_CACHE_CONTROL, SAFE_FILENAME, FileInfo, StaticFileResponse, lookup
+from uploads import CONTENT_TYPES, get_file_extension
+
+router = APIRouter(prefix="/api", tags=["uploads"])
+
+# Served in place of a derivative that is not ready yet; short so the derivative replaces it
+PENDING_VARIANT_CACHE_CONTROL = "public, max-age=60"
+
+
+async def _first_existing(candidates: List[Tuple[Path, str]]) -> Optional[Tuple[FileInfo, str]]:
+    for path, content_type in candidates:
+        info = await lookup(path)
+        if info is not None:
+            return info, content_type
+    return None
+
+
+@router.api_route("/uploads/{bucket}/{filename}", methods=["GET", "HEAD"])
+async def get_uploaded_image(
+    request: Request,
+    bucket: str,
+    filename: str,
+    w: Optional[int] = Query(None, ge=1, description="Display width in pixels; serves the smallest derivative at least this wide"),
+):
+    """Serve an uploaded image from the shared store or a legacy section directory"""
+    if not SAFE_FILENAME.match(filename):
+        raise HTTPException(status_code=404, detail="Image not found")
+
+    if bucket == "store":
+        parsed = image_store.parse_store_name(filename)
+        file_path = image_store.blob_path(*parsed) if parsed else None
+    else:
+        file_path = image_store.legacy_file(bucket, filename)
+    if file_path is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+
+    cache_control = IMMUTABLE_CACHE_CONTROL
+    headers = None
+    if w is not None and bucket == "store":
+        headers = {"vary": "Accept"}
+        candidates = derivatives.variant_candidates(file_path, w, request.headers.get("accept", ""))
+        variant = await _first_existing(candidates)
+        if variant is None and candidates:
+            if await image_store.derivatives_settled(*parsed):
+                # Settling may have just dropped stale misses, so look once more
+                variant = await _first_existing(candidates)
+            else:
+                cache_control = PENDING_VARIANT_CACHE_CONTROL
+        if variant is not None:
+            info, content_type = variant
+            return StaticFileResponse(request, info, content_type, headers=headers)
+        # Otherwise no derivative that wide exists or ever will: the original is final
+
+    info = await lookup(file_path)
+    if info is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+    media_type = CONTENT_TYPES.get(get_file_extension(filename), "application/octet-stream")
+    return StaticFileResponse(request, info, media_type, cache_control, headers)
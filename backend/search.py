@@ -0,0 +1,477 @@
+import asyncio
+import bisect
+import functools
+import heapq
+import logging
+import math
+import os
+import re
+import time
+import unicodedata
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+import metrics
+from localization import LANGUAGES
+from repository import Repository
+
+logger = logging.getLogger(__name__)
+
+# Safety net for writes made by other workers, like the content cache TTL
+SEARCH_INDEX_TTL_SECONDS = float(os.environ.get("SEARCH_INDEX_TTL_SECONDS", "300"))
+SNIPPET_CHARS = 160
+# Index terms a partial last word may expand to
+MAX_PREFIX_TERMS = 50
+# Shorter partial words would expand to much of the vocabulary
+MIN_PREFIX_CHARS = 3
+PREFIX_WEIGHT = 0.7
+# Extra weight for a word found in a result's title
+TITLE_BOOST = 1.5
+
+STOPWORDS = {
+    "en": frozenset(
+        "a an and are as at be by for from in is it its of on or our that the this to we with you your".split()
+    ),
+    "fr": frozenset(
+        "a au aux avec ce ces d dans de des du en est et l la le les leur leurs n ne nos notre nous ou par pas "
+        "plus pour qu que qui s sa se ses son sont sur un une vos votre vous".split()
+    ),
+}
+
+_WORD = re.compile(r"\w+")
+
+
+def fold(text: str) -> str:
+    """Lowercase and strip accents, so "Événement" and "evenement" compare equal"""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def _stem_en(word: str) -> str:
+    if len(word) > 4 and word.endswith("ies"):
+        word = word[:-3] + "y"
+    elif len(word) > 3 and word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        word = word[:-1]
+    for suffix in ("ing", "ed"):
+        if len(word) > len(suffix) + 3 and word.endswith(suffix):
+            word = word[: -len(suffix)]
+            if len(word) > 3 and word[-1] == word[-2] and word[-1] not in "lsz":
+                word = word[:-1]
+            break
+    return word
+
+
+def _stem_fr(word: str) -> str:
+    # Light stemmer in the spirit of Savoy's: plurals, feminine and -ment endings
+    if len(word) > 5 and word.endswith("aux"):
+        word = word[:-3] + "al"
+    elif len(word) > 3 and word.endswith(("s", "x")):
+        word = word[:-1]
+    if len(word) > 8 and word.endswith("ment"):
+        word = word[:-4]
+    for suffix, replacement in (("euse", "eux"), ("ienne", "ien"), ("ere", "er"), ("ive", "if")):
+        if len(word) > len(suffix) + 2 and word.endswith(suffix):
+            word = word[: -len(suffix)] + replacement
+            break
+    if len(word) > 4 and word.endswith("e"):
+        word = word[:-1]
+    return word
+
+
+_STEMMERS = {"en": _stem_en, "fr": _stem_fr}
+
+
+class Token(NamedTuple):
+    term: str
+    start: int
+    end: int
+
+
+@functools.lru_cache(maxsize=65536)
+def _term(word: str, lang: str) -> Optional[str]:
+    """Index term for a word, or None for a stopword; cached since most words recur"""
+    word = fold(word)
+    if word in STOPWORDS[lang]:
+        return None
+    return _STEMMERS[lang](word)
+
+
+def tokenize(text: str, lang: str) -> Iterator[Token]:
+    """Stemmed, accent-folded terms of a text with their offsets, stopwords skipped"""
+    for match in _WORD.finditer(text):
+        term = _term(match.group(), lang)
+        if term is not None:
+            yield Token(term, match.start(), match.end())
+
+
+class Source(NamedTuple):
+    collection: str
+    title: str
+    # Field base name -> weight; title_en/title_fr are both read for "title"
+    fields: Dict[str, float]
+
+
+class _Entry(NamedTuple):
+    title: str
+    texts: Dict[str, str]
+
+
+DocKey = Tuple[str, str]
+
+
+class _Match(NamedTuple):
+    top: List[Tuple[float, DocKey]]
+    # Every matching document is in one of these
+    postings: List[Dict[DocKey, float]]
+    terms: Set[str]
+
+
+class _LanguageIndex:
+    """Inverted index over one language's fields"""
+
+    def __init__(self, lang: str):
+        self.lang = lang
+        # term -> document -> saturated, title-boosted weight, so scoring is a lookup and a multiply
+        self.postings: Dict[str, Dict[DocKey, float]] = {}
+        self.doc_terms: Dict[DocKey, Set[str]] = {}
+        self.entries: Dict[DocKey, _Entry] = {}
+        # term -> (weight, document) ascending, built on first query and kept sorted after
+        self._ranking: Dict[str, List[Tuple[float, DocKey]]] = {}
+        # term -> lowercased words it was indexed from, to find highlights with one regex; never pruned
+        self.surfaces: Dict[str, Set[str]] = {}
+        # Sorted terms for prefix lookups; may hold terms with no postings left
+        self.vocabulary: List[str] = []
+
+    def add(self, key: DocKey, entry: _Entry, weights: Dict[str, float]):
+        self.remove(key)
+        frequencies: Dict[str, float] = {}
+        for field, text in entry.texts.items():
+            weight = weights[field]
+            for token in tokenize(text, self.lang):
+                frequencies[token.term] = frequencies.get(token.term, 0.0) + weight
+                self.surfaces.setdefault(token.term, set()).add(text[token.start:token.end].lower())
+        title_terms = {token.term for token in tokenize(entry.title, self.lang)}
+        for term, frequency in frequencies.items():
+            posting = self.postings.get(term)
+            if posting is None:
+                posting = self.postings[term] = {}
+                bisect.insort(self.vocabulary, term)
+            boost = TITLE_BOOST if term in title_terms else 1.0
+            posting[key] = boost * frequency / (frequency + 1.0)
+            ranked = self._ranking.get(term)
+            if ranked is not None:
+                bisect.insort(ranked, (posting[key], key))
+        self.doc_terms[key] = set(frequencies)
+        self.entries[key] = entry
+
+    def remove(self, key: DocKey):
+        for term in self.doc_terms.pop(key, ()):
+            posting = self.postings[term]
+            ranked = self._ranking.get(term)
+            if ranked is not None:
+                del ranked[bisect.bisect_left(ranked, (posting[key], key))]
+            del posting[key]
+            if not posting:
+                del self.postings[term]
+                self._ranking.pop(term, None)
+        self.entries.pop(key, None)
+
+    def expand(self, prefix: str) -> List[str]:
+        """Indexed terms starting with prefix, at most MAX_PREFIX_TERMS"""
+        terms = []
+        i = bisect.bisect_left(self.vocabulary, prefix)
+        while i < len(self.vocabulary) and len(terms) < MAX_PREFIX_TERMS:
+            term = self.vocabulary[i]
+            if not term.startswith(prefix):
+                break
+            if term in self.postings and term != prefix:
+                terms.append(term)
+            i += 1
+        return terms
+
+    def match(self, query: str, collections: Optional[Set[str]], limit: int) -> Optional[_Match]:
+        """The best limit documents for a query, the postings it matched, and the terms looked up"""
+        tokens = list(tokenize(query, self.lang))
+        if not tokens:
+            return None
+        terms = list(dict.fromkeys(token.term for token in tokens))
+        # A last word with nothing after it may still be being typed, so it also matches as a prefix
+        last = tokens[-1]
+        prefix = fold(query[last.start:last.end]) if last.end == len(query) else None
+
+        total = max(len(self.entries), 1)
+        # Per query word, the postings it matches with their idf-weighted factors
+        groups: List[List[Tuple[str, Dict[DocKey, float], float]]] = []
+        looked_up: Set[str] = set()
+        for term in terms:
+            candidates = [(term, 1.0)]
+            if term == last.term and prefix is not None and len(prefix) >= MIN_PREFIX_CHARS:
+                candidates += [(t, PREFIX_WEIGHT) for t in self.expand(prefix) if t not in terms]
+            group = []
+            for candidate, weight in candidates:
+                posting = self.postings.get(candidate)
+                if posting:
+                    group.append((candidate, posting, weight * math.log(1.0 + total / len(posting))))
+                    looked_up.add(candidate)
+            groups.append(group)
+
+        postings = [posting for group in groups for _, posting, _ in group]
+        if not postings:
+            return _Match([], [], looked_up)
+        pairs = [(self._ranked(term), posting, factor) for group in groups for term, posting, factor in group]
+        scoring = [[(posting, factor) for _, posting, factor in group] for group in groups]
+
+        # Fagin's threshold algorithm: walk the postings from their heaviest
+        # entries down, stopping once no document not yet seen could beat
+        # the limit-th best, so common words don't score every document
+        ceiling = (sum(1 for group in groups if group) / len(groups)) ** 2
+        top: List[Tuple[float, DocKey]] = []
+        seen: Set[DocKey] = set()
+        full = len(scoring)
+        walks = [(ranked, factor) for ranked, _, factor in pairs]
+        depth = 0
+        while walks:
+            threshold = 0.0
+            position = -1 - depth
+            for ranked, factor in walks:
+                weight, key = ranked[position]
+                threshold += weight * factor
+                if key in seen:
+                    continue
+                seen.add(key)
+                if collections is not None and key[0] not in collections:
+                    continue
+                score = 0.0
+                matched = 0
+                for group in scoring:
+                    hit = 0
+                    for posting, weighting in group:
+                        found = posting.get(key)
+                        if found is not None:
+                            score += found * weighting
+                            hit = 1
+                    matched += hit
+                if matched < full:
+                    # Documents matching every word rank above partial matches
+                    score *= (matched / full) ** 2
+                if len(top) < limit:
+                    heapq.heappush(top, (score, key))
+                elif score > top[0][0]:
+                    heapq.heapreplace(top, (score, key))
+            if len(top) >= limit and top[0][0] >= threshold * ceiling:
+                break
+            depth += 1
+            walks = [walk for walk in walks if len(walk[0]) > depth]
+        return _Match(sorted(top, reverse=True), postings, looked_up)
+
+    def pattern(self, terms: Set[str]) -> "re.Pattern[str]":
+        """Regex finding, in lowercased text, the words indexed as any of terms.
+
+        Word starts are checked by _highlights: a leading lookbehind or
+        IGNORECASE would stop re from skipping ahead to candidate letters.
+        """
+        words = sorted({word for term in terms for word in self.surfaces.get(term, ())}, key=len, reverse=True)
+        alternatives = "|".join(map(re.escape, words)) or r"(?!)"
+        return re.compile(rf"(?:{alternatives})(?!\w)")
+
+    def _ranked(self, term: str) -> List[Tuple[float, DocKey]]:
+        ranked = self._ranking.get(term)
+        if ranked is None:
+            ranked = self._ranking[term] = sorted((weight, key) for key, weight in self.postings[term].items())
+        return ranked
+
+
+def _snippet(text: str, matches: List[Tuple[int, int]]) -> Tuple[str, List[Tuple[int, int]]]:
+    """A window of text around the first match, with match offsets relative to it"""
+    if len(text) <= SNIPPET_CHARS:
+        return text, matches
+    start = max(0, matches[0][0] - SNIPPET_CHARS // 4)
+    if start > 0:
+        space = text.rfind(" ", 0, start)
+        start = space + 1 if space >= 0 else start
+    end = min(len(text), start + SNIPPET_CHARS)
+    if end < len(text):
+        space = text.rfind(" ", start, end)
+        end = space if space > start else end
+    prefix = "…" if start > 0 else ""
+    suffix = "…" if end < len(text) else ""
+    shift = len(prefix) - start
+    inside = [(s + shift, e + shift) for s, e in matches if s >= start and e <= end]
+    return prefix + text[start:end] + suffix, inside
+
+
+def _word_start(text: str, start: int) -> bool:
+    return start == 0 or not (text[start - 1].isalnum() or text[start - 1] == "_")
+
+
+def _highlights(entry: _Entry, pattern: "re.Pattern[str]") -> List[dict]:
+    highlights = []
+    for field, text in entry.texts.items():
+        lowered = text.lower()
+        if len(lowered) == len(text):
+            matches = [match.span() for match in pattern.finditer(lowered) if _word_start(lowered, match.start())]
+        else:
+            # Lowercasing changed the length (e.g. "İ"), so match the original to keep offsets
+            insensitive = re.compile(pattern.pattern, re.IGNORECASE)
+            matches = [match.span() for match in insensitive.finditer(text) if _word_start(text, match.start())]
+        if matches:
+            snippet, offsets = _snippet(text, matches)
+            highlights.append({"field": field, "text": snippet, "matches": [list(m) for m in offsets]})
+    return highlights
+
+
+class SearchIndex:
+    """In-memory bilingual full-text index over registered repositories.
+
+    Each document is indexed once per language from its <field>_<lang>
+    values, accent-folded and stemmed. Repository writes update it in
+    place. It is rebuilt from MongoDB at startup and, as a safety net for
+    other workers' writes, when it is older than SEARCH_INDEX_TTL_SECONDS.
+    """
+
+    def __init__(self):
+        self.sources: Dict[str, Source] = {}
+        self.languages = {lang: _LanguageIndex(lang) for lang in LANGUAGES}
+        self._repositories: Dict[str, Repository] = {}
+        self.built_at: Optional[float] = None
+        self._rebuilding: Optional[asyncio.Task] = None
+        # Writes seen while a rebuild loads and indexes, to replay onto its result
+        self._pending: Optional[List[Tuple[Source, str, Optional[dict]]]] = None
+        metrics.register_collector("search.index", self.stats)
+
+    def register(self, repository: Repository, title: str, fields: Dict[str, float]):
+        """Index a repository's documents; title names the field shown as each result's title"""
+        source = Source(repository.name, title, fields)
+        self.sources[source.collection] = source
+        self._repositories[source.collection] = repository
+        repository.subscribe(lambda doc_id, doc: self._on_write(source, doc_id, doc))
+
+    def _on_write(self, source: Source, doc_id, doc: Optional[dict]):
+        if self._pending is not None:
+            self._pending.append((source, str(doc_id), doc))
+        self._apply(self.languages, source, str(doc_id), doc)
+
+    def _apply(self, languages: Dict[str, _LanguageIndex], source: Source, doc_id: str, doc: Optional[dict]):
+        key = (source.collection, doc_id)
+        for lang, index in languages.items():
+            if doc is None:
+                index.remove(key)
+            else:
+                index.add(key, self._entry(source, doc, lang), source.fields)
+
+    def _entry(self, source: Source, doc: dict, lang: str) -> _Entry:
+        texts = {}
+        for field in source.fields:
+            value = doc.get(f"{field}_{lang}", doc.get(field))
+            if isinstance(value, list):
+                value = "\n".join(str(item) for item in value)
+            if value:
+                texts[field] = str(value)
+        title = doc.get(f"{source.title}_{lang}", doc.get(source.title)) or ""
+        return _Entry(str(title), texts)
+
+    def add(self, source: Source, doc: dict):
+        self._apply(self.languages, source, str(doc["id"]), doc)
+
+    def remove(self, collection: str, doc_id: str):
+        self._apply(self.languages, self.sources[collection], doc_id, None)
+
+    def _build(self, loaded: List[Tuple[Source, List[dict]]]) -> Dict[str, _LanguageIndex]:
+        languages = {lang: _LanguageIndex(lang) for lang in LANGUAGES}
+        for source, docs in loaded:
+            for doc in docs:
+                self._apply(languages, source, str(doc["id"]), doc)
+        return languages
+
+    async def rebuild(self):
+        """Reload every registered collection into a fresh index.
+
+        Tokenizing takes seconds at scale, so the index is built in a
+        worker thread. Writes made meanwhile are replayed onto it before
+        it replaces the current one.
+        """
+        if self._pending is not None:
+            return
+        started = time.perf_counter()
+        self._pending = []
+        try:
+            loaded = [
+                (self.sources[collection], await repository.find(limit=None))
+                for collection, repository in self._repositories.items()
+            ]
+            languages = await run_in_threadpool(self._build, loaded)
+            for source, doc_id, doc in self._pending:
+                self._apply(languages, source, doc_id, doc)
+            self.languages = languages
+        finally:
+            self._pending = None
+        self.built_at = time.monotonic()
+        metrics.timer("search.rebuild").observe(time.perf_counter() - started)
+
+    def _refresh_if_stale(self):
+        stale = self.built_at is None or time.monotonic() - self.built_at > SEARCH_INDEX_TTL_SECONDS
+        if stale and (self._rebuilding is None or self._rebuilding.done()):
+            self._rebuilding = asyncio.get_running_loop().create_task(self._rebuild_logged())
+
+    async def _rebuild_logged(self):
+        try:
+            await self.rebuild()
+        except Exception:
+            logger.exception("Search index rebuild failed")
+
+    def search(
+        self,
+        query: str,
+        lang: Optional[str] = None,
+        limit: int = 20,
+        collections: Optional[Iterable[str]] = None,
+    ) -> dict:
+        """Ranked matches for a query, in one language or in whichever matches best"""
+        started = time.perf_counter()
+        self._refresh_if_stale()
+        wanted = set(collections) if collections is not None else None
+        languages: Sequence[str] = (lang,) if lang is not None else LANGUAGES
+
+        # Each language's own top limit holds every document of the merged top limit
+        best: Dict[DocKey, Tuple[float, str]] = {}
+        patterns: Dict[str, "re.Pattern[str]"] = {}
+        postings: List[Dict[DocKey, float]] = []
+        for code in languages:
+            found = self.languages[code].match(query, wanted, limit)
+            if found is None:
+                continue
+            patterns[code] = self.languages[code].pattern(found.terms)
+            postings += found.postings
+            for score, key in found.top:
+                if key not in best or score > best[key][0]:
+                    best[key] = (score, code)
+
+        top = heapq.nlargest(limit, best.items(), key=lambda item: (item[1][0], item[0]))
+        results = []
+        for key, (score, code) in top:
+            entry = self.languages[code].entries[key]
+            results.append({
+                "collection": key[0],
+                "id": key[1],
+                "lang": code,
+                "title": entry.title,
+                "score": round(score, 4),
+                "highlights": _highlights(entry, patterns[code]),
+            })
+        if wanted is None and len(postings) == 1:
+            total = len(postings[0])
+        else:
+            matching = set().union(*postings)
+            total = len(matching if wanted is None else [key for key in matching if key[0] in wanted])
+        metrics.timer("search.query").observe(time.perf_counter() - started)
+        return {"query": query, "total": total, "results": results}
+
+    def stats(self) -> dict:
+        return {
+            "documents": len(self.languages[LANGUAGES[0]].entries),
+            "terms": {lang: len(index.postings) for lang, index in self.languages.items()},
+        }
+
+
+search_index = SearchIndex()
@@ -0,0 +1,122 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from cache import content_cache
+
+logger = logging.getLogger(__name__)
+
+# Default documents each route module contributes, keyed by collection
+_defaults: Dict[str, List[dict]] = {}
+
+SEED_LOCK_ID = "default-content"
+# Pins the seed version, e.g. to the deploy id; defaults to a hash of the registered defaults
+SEED_VERSION = os.environ.get("SEED_VERSION", "")
+# A worker that dies mid-seed gives up its lock after this long
+SEED_LOCK_LEASE = timedelta(seconds=int(os.environ.get("SEED_LOCK_LEASE_SECONDS", "300")))
+# How long a worker that lost the lock waits for the seed before it starts serving
+SEED_WAIT_SECONDS = float(os.environ.get("SEED_WAIT_SECONDS", "60"))
+SEED_POLL_SECONDS = 0.2
+
+
+def register(collection: str, docs: List[dict]):
+    """Declare default documents for a collection. Every doc needs a stable _id."""
+    _defaults[collection] = docs
+
+
+def seed_version() -> str:
+    """Identify the registered seed set, so a release that changes it seeds again."""
+    if SEED_VERSION:
+        return SEED_VERSION
+    payload = json.dumps(_defaults, sort_keys=True, default=str).encode()
+    return hashlib.sha256(payload).hexdigest()[:16]
+
+
+async def _acquire_lock(db, lock_id: str) -> bool:
+    now = datetime.utcnow()
+    try:
+        await db.seed_state.insert_one({"_id": lock_id, "locked_at": now})
+        return True
+    except DuplicateKeyError:
+        pass
+    # Take over a lock abandoned before the seed completed
+    stale = await db.seed_state.find_one_and_update(
+        {
+            "_id": lock_id,
+            "completed_at": {"$exists": False},
+            "locked_at": {"$lt": now - SEED_LOCK_LEASE},
+        },
+        {"$set": {"locked_at": now}},
+    )
+    return stale is not None
+
+
+async def _previous_ids(db, lock_id: str) -> Dict[str, List[str]]:
+    """Default _ids offered by the last completed seed of a different version."""
+    cursor = db.seed_state.find(
+        {"_id": {"$ne": lock_id}, "completed_at": {"$exists": True}}
+    ).sort("completed_at", -1).limit(1)
+    async for state in cursor:
+        return state.get("seeded_ids") or {}
+    return {}
+
+
+async def _wait_for_seed(db, lock_id: str) -> bool:
+    """Wait until the worker holding lock_id has finished; False on timeout"""
+    deadline = time.monotonic() + SEED_WAIT_SECONDS
+    while True:
+        if await db.seed_state.find_one({"_id": lock_id, "completed_at": {"$exists": True}}, {"_id": 1}):
+            return True
+        if time.monotonic() >= deadline:
+            return False
+        await asyncio.sleep(SEED_POLL_SECONDS)
+
+
+async def seed_defaults(db) -> bool:
+    """Insert default content once per seed version.
+
+    The lock document is keyed on seed_version(), so only one worker seeds a
+    given set and a release with changed defaults seeds once more. Empty
+    collections get every default; other collections only get defaults added
+    since the previous seed, so documents an admin deleted stay deleted.
+    Upserts on stable _ids keep a retried or overlapping run from duplicating
+    anything. Workers that lose the lock wait for the seed to finish, so
+    none of them caches a collection while it is still empty. Returns
+    whether this worker did the seeding.
+    """
+    lock_id = f"{SEED_LOCK_ID}:{seed_version()}"
+    if not await _acquire_lock(db, lock_id):
+        if not await _wait_for_seed(db, lock_id):
+            logger.warning("Default content still being seeded after %.0fs; serving anyway", SEED_WAIT_SECONDS)
+        return False
+
+    previous = await _previous_ids(db, lock_id)
+    for collection, docs in _defaults.items():
+        if await db[collection].find_one({}, {"_id": 1}) is not None:
+            if not previous:
+                # Nothing recorded about earlier seeds: leave populated collections alone
+                continue
+            offered = set(previous.get(collection, []))
+            docs = [doc for doc in docs if doc["_id"] not in offered]
+        if not docs:
+            continue
+        ops = [UpdateOne({"_id": doc["_id"]}, {"$setOnInsert": doc}, upsert=True) for doc in docs]
+        result = await db[collection].bulk_write(ops, ordered=False)
+        # Written around the repositories, so drop whatever was cached meanwhile
+        content_cache.invalidate(collection)
+        logger.info("Seeded %d default documents into %s", result.upserted_count, collection)
+
+    seeded_ids = {collection: [doc["_id"] for doc in docs] for collection, docs in _defaults.items()}
+    await db.seed_state.update_one(
+        {"_id": lock_id},
+        {"$set": {"completed_at": datetime.utcnow(), "seeded_ids": seeded_ids}},
+    )
+    return True
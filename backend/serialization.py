@@ -0,0 +1,159 @@
+import functools
+import inspect
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Type, Union, get_args, get_origin
+
+from fastapi import Response
+from fastapi.datastructures import Default, DefaultPlaceholder
+from fastapi.routing import APIRoute
+from pydantic import BaseModel, TypeAdapter
+from typing_extensions import TypedDict
+
+# Per model: the TypedDict mirroring it, its field names, their defaults, and nested-model fields
+_shapes: Dict[type, type] = {}
+_fields: Dict[type, Tuple[str, ...]] = {}
+_defaults: Dict[type, dict] = {}
+_nested: Dict[type, Dict[str, Tuple[Type[BaseModel], bool]]] = {}
+
+
+def _model_in(annotation: Any) -> Optional[Tuple[Type[BaseModel], bool]]:
+    """(model, is_list) for Model, List[Model] and Optional of either"""
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation, False
+    origin = get_origin(annotation)
+    if origin is Union:
+        for arg in get_args(annotation):
+            found = _model_in(arg)
+            if found is not None:
+                return found
+    elif origin is list:
+        args = get_args(annotation)
+        found = _model_in(args[0]) if args else None
+        if found is not None and not found[1]:
+            return found[0], True
+    return None
+
+
+def _shape_annotation(annotation: Any) -> Any:
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return shape(annotation)
+    origin = get_origin(annotation)
+    if origin is Union:
+        return Union[tuple(_shape_annotation(arg) for arg in get_args(annotation))]
+    if origin is list and get_args(annotation):
+        return List[_shape_annotation(get_args(annotation)[0])]
+    return annotation
+
+
+def shape(model: Type[BaseModel]) -> type:
+    """TypedDict with the fields of a response model, nested models included.
+
+    pydantic-core serializes plain dicts against it directly, dropping
+    undeclared keys, with no model instance built per document.
+    """
+    typed = _shapes.get(model)
+    if typed is None:
+        fields = {name: _shape_annotation(info.annotation) for name, info in model.model_fields.items()}
+        typed = _shapes[model] = TypedDict(f"{model.__name__}Dict", fields, total=False)
+        _fields[model] = tuple(fields)
+        _defaults[model] = {
+            name: info.get_default(call_default_factory=True)
+            for name, info in model.model_fields.items()
+            if not info.is_required()
+        }
+        _nested[model] = {
+            name: found
+            for name, info in model.model_fields.items()
+            if (found := _model_in(info.annotation)) is not None
+        }
+    return typed
+
+
+def prepare(model: Type[BaseModel], doc: dict) -> dict:
+    """A stored doc with the model's defaults filled in, trusted as valid otherwise"""
+    shape(model)
+    defaults = _defaults[model]
+    # Rebuilt in field order, since dicts are serialized in key order
+    doc = {
+        name: doc[name] if name in doc else defaults[name]
+        for name in _fields[model]
+        if name in doc or name in defaults
+    }
+    for name, (inner, many) in _nested[model].items():
+        value = doc.get(name)
+        if many and isinstance(value, list):
+            doc[name] = [prepare(inner, item) if isinstance(item, dict) else item for item in value]
+        elif not many and isinstance(value, dict):
+            doc[name] = prepare(inner, value)
+    return doc
+
+
+def _prepare(annotation: Any, value: Any) -> Any:
+    found = _model_in(annotation)
+    if found is None:
+        return value
+    model, many = found
+    if many and isinstance(value, list):
+        return [prepare(model, item) if isinstance(item, dict) else item for item in value]
+    if isinstance(value, dict):
+        return prepare(model, value)
+    return value
+
+
+@functools.lru_cache(maxsize=None)
+def adapter(annotation: Any) -> TypeAdapter:
+    """TypeAdapter serializing dicts shaped like annotation, e.g. List[EventResponse], built once"""
+    return TypeAdapter(_shape_annotation(annotation))
+
+
+def encode(annotation: Any, value: Any) -> bytes:
+    """JSON for trusted data shaped like annotation, skipping validation.
+
+    Documents we stored ourselves are already valid, so this gives the
+    same JSON FastAPI's validate-then-encode path would, in one pass
+    through pydantic-core.
+    """
+    if isinstance(value, BaseModel):
+        return value.model_dump_json()
+    return adapter(annotation).dump_json(_prepare(annotation, value), warnings=False)
+
+
+def encode_one(model: Type[BaseModel], doc: dict) -> bytes:
+    return encode(model, doc)
+
+
+def encode_list(model: Type[BaseModel], docs: Iterable[dict]) -> bytes:
+    return encode(List[model], list(docs))
+
+
+class TrustedJSONRoute(APIRoute):
+    """Route that encodes handler results with serialization.encode instead of validating them.
+
+    Set as route_class on routers whose handlers return documents read
+    from our own database. FastAPI would otherwise validate each one
+    against response_model and run it through jsonable_encoder. Handlers
+    returning a Response are left alone.
+    """
+
+    def __init__(self, path: str, endpoint, *, response_model: Any = Default(None), **kwargs):
+        if (
+            response_model is not None
+            and not isinstance(response_model, DefaultPlaceholder)
+            and inspect.iscoroutinefunction(endpoint)
+        ):
+            endpoint = _encoding_endpoint(endpoint, response_model, kwargs.get("status_code") or 200)
+        super().__init__(path, endpoint, response_model=response_model, **kwargs)
+
+
+def _encoding_endpoint(endpoint, response_model: Any, status_code: int):
+    @functools.wraps(endpoint)
+    async def encoded(*args, **kwargs):
+        result = await endpoint(*args, **kwargs)
+        if isinstance(result, Response):
+            return result
+        return Response(
+            content=encode(response_model, result),
+            status_code=status_code,
+            media_type="application/json",
+        )
+
+    return encoded
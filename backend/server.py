@@ -1,7 +1,8 @@
-from fastapi import FastAPI, APIRouter
+from fastapi import FastAPI, APIRouter, Depends
+from fastapi.responses import JSONResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
+from contextlib import asynccontextmanager
 import os
 import logging
 from pathlib import Path
@@ -10,26 +11,90 @@ from typing import List
 import uuid
 from datetime import datetime, timezone
 
+import admission
+import compression
+import derivatives
+import idempotency
+import indexes
+import metrics
+import migrations
+import seed
+import upload_gc
+import uploads
+import write_behind
+from database import client, db, ping, pool_info
+from search import search_index
+
 # Import route modules
-from routes.auth_routes import router as auth_router
+from routes.auth_routes import router as auth_router, get_current_admin, ensure_default_admin
 from routes.content_routes import router as content_router
 from routes.forms_routes import router as forms_router
 from routes.programs_routes import router as programs_router
 from routes.gallery_routes import router as gallery_router
 from routes.events_routes import router as events_router
 from routes.leadership_routes import router as leadership_router
+from routes.uploads_routes import router as uploads_router
+from routes.site_routes import router as site_router
+from routes.search_routes import router as search_router
 
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm the connection pool before the first request arrives
+    try:
+        latency_ms = await ping()
+        logger.info("MongoDB ping %.1f ms", latency_ms)
+    except Exception as e:
+        logger.warning("MongoDB ping failed at startup: %s", e)
+    try:
+        await indexes.ensure_indexes(db)
+    except Exception as e:
+        logger.warning("Could not create indexes: %s", e)
+    try:
+        await seed.seed_defaults(db)
+    except Exception as e:
+        logger.warning("Could not seed default content: %s", e)
+    try:
+        await migrations.run_migrations(db)
+    except Exception as e:
+        logger.warning("Could not run data migrations: %s", e)
+    try:
+        await search_index.rebuild()
+    except Exception as e:
+        logger.warning("Could not build the search index: %s", e)
+    try:
+        await idempotency.idempotency_keys.warm()
+    except Exception as e:
+        logger.warning("Could not load idempotency keys: %s", e)
+    try:
+        await ensure_default_admin()
+    except Exception as e:
+        logger.warning("Could not store the default admin: %s", e)
+    if write_behind.FORMS_WRITE_BEHIND:
+        await write_behind.form_queue.start()
+    upload_gc.start()
+    admission.start()
+    yield
+    await admission.stop()
+    await upload_gc.stop()
+    await write_behind.form_queue.stop()
+    derivatives.shutdown()
+    client.close()
+
 
 # Create the main app without a prefix
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -75,6 +140,33 @@ async def get_status_checks():
     
     return status_checks
 
+@api_router.get("/health/ready")
+async def readiness():
+    """Report MongoDB reachability, ping latency and connection pool usage"""
+    try:
+        latency_ms = await ping()
+    except Exception as e:
+        return JSONResponse(
+            status_code=503,
+            content={"status": "unavailable", "error": str(e), "pool": pool_info()},
+        )
+    return {"status": "ready", "ping_ms": round(latency_ms, 2), "pool": pool_info()}
+
+@api_router.get("/metrics", dependencies=[Depends(get_current_admin)])
+async def get_metrics():
+    """In-process counters and timings for this worker (admin only)"""
+    return metrics.snapshot()
+
+@api_router.get("/admin/indexes", dependencies=[Depends(get_current_admin)])
+async def get_index_report():
+    """Declared indexes that are missing, undeclared ones, and ones never used (admin only)"""
+    return await indexes.index_report(db)
+
+@api_router.post("/admin/uploads/gc", dependencies=[Depends(get_current_admin)])
+async def collect_orphaned_uploads():
+    """Check every upload file now and queue orphans for deletion (admin only)"""
+    return await upload_gc.sweep_all()
+
 # Include the router in the main app
 app.include_router(api_router)
 
@@ -86,22 +178,19 @@ app.include_router(programs_router)
 app.include_router(gallery_router)
 app.include_router(events_router)
 app.include_router(leadership_router)
-
+app.include_router(uploads_router)
+app.include_router(site_router)
+app.include_router(search_router)
+
+app.add_middleware(uploads.UploadLimitMiddleware)
+app.add_middleware(compression.CompressionMiddleware)
+# Inside CORS, so browsers can read the 429 and 503 refusals
+app.add_middleware(admission.AdmissionMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Total-Count", "Retry-After", "Idempotent-Replayed"],
 )
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-logger = logging.getLogger(__name__)
-
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
\ No newline at end of file
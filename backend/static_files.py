@@ -0,0 +1,206 @@
+import os
+import re
+import stat
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from typing import NamedTuple, Optional, Tuple
+
+import anyio
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.types import Receive, Scope, Send
+
+import metrics
+from cache import TTLCache
+from responses import etag_matches
+
+# Uploaded files never change once written, so browsers may keep them for a year
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+STAT_CACHE_TTL_SECONDS = float(os.environ.get("STAT_CACHE_TTL_SECONDS", "300"))
+# A file that does not exist yet (e.g. a derivative being generated) is rechecked sooner
+STAT_CACHE_MISS_TTL_SECONDS = 5.0
+CHUNK_SIZE = 256 * 1024
+
+# Plain file names only: no separators, no "..", nothing starting with a dot
+SAFE_FILENAME = re.compile(r"^[A-Za-z0-9_-][A-Za-z0-9_.-]{0,127}$")
+
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+stat_index = TTLCache("uploads.stat", maxsize=4096, ttl=STAT_CACHE_TTL_SECONDS)
+
+
+class FileInfo(NamedTuple):
+    path: Path
+    size: int
+    mtime: float
+    etag: str
+    last_modified: str
+
+
+def _stat(path: Path) -> Optional[FileInfo]:
+    try:
+        st = os.stat(path)
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+    if not stat.S_ISREG(st.st_mode):
+        return None
+    etag = '"%x-%x"' % (st.st_mtime_ns, st.st_size)
+    return FileInfo(path, st.st_size, st.st_mtime, etag, formatdate(st.st_mtime, usegmt=True))
+
+
+async def lookup(path: Path) -> Optional[FileInfo]:
+    """Stat a file through the index, hitting the disk only on a miss"""
+    cached = stat_index.get(path)
+    if cached is not None:
+        return cached or None
+    info = await anyio.to_thread.run_sync(_stat, path)
+    if info is None:
+        stat_index.set(path, False, ttl=STAT_CACHE_MISS_TTL_SECONDS)
+    else:
+        stat_index.set(path, info)
+    return info
+
+
+def forget(path: Path):
+    """Drop a file from the index after it is deleted"""
+    stat_index.invalidate(path)
+
+
+def _not_modified(request: Request, info: FileInfo) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag_matches(if_none_match, info.etag)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(info.mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def _byte_range(request: Request, info: FileInfo) -> Optional[Tuple[int, int]]:
+    """The single (start, end) range requested, inclusive; None to send the whole file.
+
+    Raises ValueError for a range that cannot be satisfied. Multi-range
+    requests are answered with the whole file, which RFC 9110 allows.
+    """
+    header = request.headers.get("range")
+    if not header:
+        return None
+    if_range = request.headers.get("if-range")
+    if if_range and if_range != info.etag and if_range != info.last_modified:
+        return None
+    match = _RANGE.match(header.strip())
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        length = int(last)
+        if length == 0:
+            raise ValueError("empty suffix range")
+        return max(0, info.size - length), info.size - 1
+    start = int(first)
+    end = min(int(last), info.size - 1) if last else info.size - 1
+    if start >= info.size or start > end:
+        raise ValueError("range not satisfiable")
+    return start, end
+
+
+class StaticFileResponse(Response):
+    """Send a file known to FileInfo, honouring conditional and Range requests.
+
+    The body goes out via the server's zero-copy extension when it has one
+    (http.response.zerocopysend, or http.response.pathsend for whole files),
+    otherwise in chunks read off the event loop.
+    """
+
+    def __init__(
+        self,
+        request: Request,
+        info: FileInfo,
+        media_type: str,
+        cache_control: str = IMMUTABLE_CACHE_CONTROL,
+        headers: Optional[dict] = None,
+    ):
+        self.info = info
+        self.media_type = media_type
+        self.background = None
+        self.body = b""
+        self.offset = 0
+        self.count = info.size
+        self.status_code = 200
+
+        base = {
+            "accept-ranges": "bytes",
+            "cache-control": cache_control,
+            "etag": info.etag,
+            "last-modified": info.last_modified,
+            **(headers or {}),
+        }
+        if _not_modified(request, info):
+            self.status_code = 304
+            self.count = 0
+            self.init_headers(base)
+            metrics.counter("uploads.not_modified").inc()
+            return
+
+        try:
+            byte_range = _byte_range(request, info)
+        except ValueError:
+            self.status_code = 416
+            self.count = 0
+            self.init_headers({**base, "content-range": f"bytes */{info.size}", "content-length": "0"})
+            return
+        if byte_range is not None:
+            start, end = byte_range
+            self.status_code = 206
+            self.offset, self.count = start, end - start + 1
+            base["content-range"] = f"bytes {start}-{end}/{info.size}"
+            metrics.counter("uploads.partial").inc()
+        base["content-type"] = media_type
+        base["content-length"] = str(self.count)
+        self.init_headers(base)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        start = {"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers}
+        if self.count == 0 or scope["method"].upper() == "HEAD":
+            await send(start)
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        extensions = scope.get("extensions") or {}
+        whole_file = self.offset == 0 and self.count == self.info.size
+        if whole_file and "http.response.pathsend" in extensions:
+            await send(start)
+            await send({"type": "http.response.pathsend", "path": str(self.info.path)})
+            metrics.counter("uploads.bytes_sent").inc(self.count)
+            return
+
+        try:
+            file = await anyio.open_file(self.info.path, mode="rb")
+        except FileNotFoundError:
+            # Deleted since it was indexed
+            forget(self.info.path)
+            await JSONResponse({"detail": "Image not found"}, status_code=404)(scope, receive, send)
+            return
+
+        async with file:
+            await send(start)
+            if "http.response.zerocopysend" in extensions:
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": file.wrapped.fileno(),
+                    "offset": self.offset,
+                    "count": self.count,
+                })
+            else:
+                await file.seek(self.offset)
+                remaining = self.count
+                while remaining > 0:
+                    chunk = await file.read(min(CHUNK_SIZE, remaining))
+                    remaining = remaining - len(chunk) if chunk else 0
+                    await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+        metrics.counter("uploads.bytes_sent").inc(self.count)
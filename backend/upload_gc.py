@@ -0,0 +1,245 @@
+import asyncio
+import logging
+import os
+import re
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Iterator, List, NamedTuple, Optional, Set
+
+from pymongo import UpdateOne
+from starlette.concurrency import run_in_threadpool
+
+import image_store
+import metrics
+import migrations
+import static_files
+import uploads
+from database import db
+
+logger = logging.getLogger(__name__)
+
+# Seconds between sweep batches; 0 turns the background sweeper off
+UPLOAD_GC_INTERVAL_SECONDS = float(os.environ.get("UPLOAD_GC_INTERVAL_SECONDS", "300"))
+# Files younger than this are never collected, so an upload has time to be attached
+UPLOAD_GC_GRACE_SECONDS = float(os.environ.get("UPLOAD_GC_GRACE_SECONDS", str(24 * 3600)))
+UPLOAD_GC_BATCH_SIZE = int(os.environ.get("UPLOAD_GC_BATCH_SIZE", "500"))
+
+# Fields that may hold an /api/uploads/... URL, by collection
+REFERENCE_FIELDS = {
+    "gallery": "image_url",
+    "events": "image_url",
+    "leadership": "image_url",
+    "media_assets": "url",
+}
+
+_UPLOAD_URL = re.compile(r"/api/uploads/[^?#\s\"']+")
+# <sha>.<ext> originals and <sha>.w<width>.<ext> derivatives
+_STORE_FILE = re.compile(r"^([0-9a-f]{64})(?:\.w\d+)?\.[a-z]+$")
+
+_walk: Optional[Iterator["_File"]] = None
+# The walk is a single generator, so batches must not overlap
+_sweep_lock = asyncio.Lock()
+_tasks: List[asyncio.Task] = []
+
+
+class _File(NamedTuple):
+    path: Path
+    size: int
+    mtime: float
+
+
+def _iter_files() -> Iterator[_File]:
+    """Every file under the upload directories, one directory at a time"""
+    directories = [image_store.UPLOAD_ROOT / bucket for bucket in image_store.LEGACY_BUCKETS]
+    if image_store.STORE_DIR.is_dir():
+        directories.extend(Path(root) for root, _, _ in os.walk(image_store.STORE_DIR))
+    for directory in directories:
+        try:
+            entries = list(os.scandir(directory))
+        except FileNotFoundError:
+            continue
+        for entry in entries:
+            try:
+                if entry.is_file(follow_symlinks=False):
+                    st = entry.stat(follow_symlinks=False)
+                    yield _File(Path(entry.path), st.st_size, st.st_mtime)
+            except FileNotFoundError:
+                continue
+
+
+def _take(walk: Iterator[_File], limit: int) -> List[_File]:
+    batch = []
+    for item in walk:
+        batch.append(item)
+        if len(batch) >= limit:
+            break
+    return batch
+
+
+async def _referenced_urls() -> Set[str]:
+    urls = set()
+    for collection, field in REFERENCE_FIELDS.items():
+        for value in await db[collection].distinct(field, {field: {"$regex": "/api/uploads/"}}):
+            if isinstance(value, str):
+                urls.update(_UPLOAD_URL.findall(value))
+    return urls
+
+
+async def _count_store_refs(db, batch_size: int) -> int:
+    """Raise each image_blobs refs to the number of documents pointing at the blob.
+
+    Media assets were not counted before their repository tracked url, so
+    a blob they shared with a deleted item could lose its record. $max
+    never lowers a count, which keeps a rerun or a racing acquire() safe.
+    """
+    counts: Dict[str, int] = {}
+    extensions: Dict[str, str] = {}
+    for collection, field in REFERENCE_FIELDS.items():
+        cursor = db[collection].find(
+            {field: {"$regex": f"^{re.escape(image_store.STORE_URL_PREFIX)}"}}, {field: 1}
+        ).batch_size(batch_size)
+        async for doc in cursor:
+            parsed = image_store.parse_store_url(doc.get(field))
+            if parsed:
+                counts[parsed[0]] = counts.get(parsed[0], 0) + 1
+                extensions[parsed[0]] = parsed[1]
+    ops = [
+        UpdateOne(
+            {"_id": digest},
+            {"$max": {"refs": refs}, "$setOnInsert": {"ext": extensions[digest], "created_at": datetime.utcnow()}},
+            upsert=True,
+        )
+        for digest, refs in counts.items()
+    ]
+    changed = 0
+    for start in range(0, len(ops), batch_size):
+        result = await db.image_blobs.bulk_write(ops[start:start + batch_size], ordered=False)
+        changed += result.modified_count + result.upserted_count
+    return changed
+
+
+migrations.register("image_blobs.refs", "image_blobs", _count_store_refs)
+
+
+async def _orphans(batch: List[_File], referenced: Set[str]) -> List[_File]:
+    referenced_digests = {parsed[0] for parsed in map(image_store.parse_store_url, referenced) if parsed}
+    orphans = []
+    store_files: Dict[str, List[_File]] = {}
+    for item in batch:
+        if item.path.is_relative_to(image_store.STORE_DIR):
+            match = _STORE_FILE.match(item.path.name)
+            if match is None:
+                # Leftover .part file from an interrupted upload
+                orphans.append(item)
+            elif match.group(1) not in referenced_digests:
+                store_files.setdefault(match.group(1), []).append(item)
+        else:
+            url = f"/api/uploads/{item.path.parent.name}/{item.path.name}"
+            if url not in referenced:
+                orphans.append(item)
+
+    if store_files:
+        records = {
+            doc["_id"]: doc["refs"]
+            async for doc in db.image_blobs.find({"_id": {"$in": list(store_files)}}, {"refs": 1})
+        }
+        for digest, files in store_files.items():
+            if digest in records:
+                if records[digest] > 0:
+                    continue
+                # Drop the record first; if an acquire() won the race, keep the files
+                if await db.image_blobs.find_one_and_delete({"_id": digest, "refs": {"$lte": 0}}) is None:
+                    continue
+            orphans.extend(files)
+    return orphans
+
+
+def _still_unused(path: Path) -> Optional[Callable[[], Awaitable[bool]]]:
+    """For a stored image, a check before unlinking that its content was not uploaded again"""
+    match = _STORE_FILE.match(path.name)
+    if match is None or not path.is_relative_to(image_store.STORE_DIR):
+        return None
+    digest = match.group(1)
+    return lambda: image_store.unrecorded(digest)
+
+
+async def sweep_once(limit: int = UPLOAD_GC_BATCH_SIZE) -> dict:
+    """Check the next batch of upload files and queue the orphans for deletion.
+
+    A file is an orphan once it is older than the grace period, no
+    document URL points at it and, for stored images, its image_blobs
+    record has no references. Successive calls walk the directories a
+    batch at a time and start over after the last one.
+    """
+    async with _sweep_lock:
+        return await _sweep_batch(limit)
+
+
+async def _sweep_batch(limit: int) -> dict:
+    global _walk
+    started = time.perf_counter()
+    if _walk is None:
+        _walk = _iter_files()
+    batch = await run_in_threadpool(_take, _walk, limit)
+    finished = len(batch) < limit
+    if finished:
+        _walk = None
+
+    cutoff = time.time() - UPLOAD_GC_GRACE_SECONDS
+    old_enough = [item for item in batch if item.mtime < cutoff]
+    orphans = await _orphans(old_enough, await _referenced_urls()) if old_enough else []
+    for item in orphans:
+        uploads.schedule_delete([item.path], _still_unused(item.path))
+        static_files.forget(item.path)
+
+    queued_bytes = sum(item.size for item in orphans)
+    metrics.counter("uploads.gc.orphans").inc(len(orphans))
+    metrics.timer("uploads.gc.sweep").observe(time.perf_counter() - started)
+    if orphans:
+        logger.info("Upload GC queued %d orphaned files (%d bytes)", len(orphans), queued_bytes)
+    return {
+        "scanned": len(batch),
+        "orphans": len(orphans),
+        "orphan_bytes": queued_bytes,
+        "cycle_complete": finished,
+    }
+
+
+async def sweep_all() -> dict:
+    """Run batches until every upload file has been checked once"""
+    global _walk
+    totals = {"scanned": 0, "orphans": 0, "orphan_bytes": 0}
+    async with _sweep_lock:
+        _walk = None
+        while True:
+            report = await _sweep_batch(UPLOAD_GC_BATCH_SIZE)
+            for key in totals:
+                totals[key] += report[key]
+            if report["cycle_complete"]:
+                return totals
+
+
+async def _sweep_forever():
+    while True:
+        await asyncio.sleep(UPLOAD_GC_INTERVAL_SECONDS)
+        try:
+            await sweep_once()
+        except Exception:
+            logger.exception("Upload GC sweep failed")
+
+
+def start():
+    """Start the deletion worker and, unless disabled, the periodic sweeper"""
+    _tasks.append(asyncio.create_task(uploads.process_deletions()))
+    if UPLOAD_GC_INTERVAL_SECONDS > 0:
+        _tasks.append(asyncio.create_task(_sweep_forever()))
+
+
+async def stop(timeout: float = 5.0):
+    """Finish queued deletions, then stop the background tasks"""
+    await uploads.drain_deletions(timeout)
+    for task in _tasks:
+        task.cancel()
+    await asyncio.gather(*_tasks, return_exceptions=True)
+    _tasks.clear()
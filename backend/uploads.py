@@ -0,0 +1,231 @@
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Awaitable, Callable, Iterable, NamedTuple, Optional, Tuple
+
+from fastapi import HTTPException, UploadFile
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_ROOT = Path(os.environ.get("UPLOAD_ROOT", "/app/uploads"))
+UPLOAD_MAX_BYTES = int(os.environ.get("UPLOAD_MAX_BYTES", str(10 * 1024 * 1024)))
+# A multipart body also holds part headers and the other form fields
+UPLOAD_MAX_REQUEST_BYTES = UPLOAD_MAX_BYTES + 64 * 1024
+UPLOAD_CHUNK_SIZE = 256 * 1024
+
+# Limit how many uploads write to disk at once
+_upload_slots = asyncio.Semaphore(int(os.environ.get("UPLOAD_CONCURRENCY", "4")))
+
+# Files waiting to be unlinked by process_deletions(), so requests never do it inline
+_deletions: "asyncio.Queue[Tuple[Path, Optional[Callable[[], Awaitable[bool]]]]]" = asyncio.Queue()
+
+# Allowed image extensions
+ALLOWED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp"}
+
+CONTENT_TYPES = {
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".png": "image/png",
+    ".gif": "image/gif",
+    ".webp": "image/webp",
+}
+
+
+class StoredUpload(NamedTuple):
+    extension: str
+    path: Path
+    size: int
+    sha256: str
+    content_type: str
+
+
+def get_file_extension(filename: str) -> str:
+    """Get file extension from filename"""
+    return Path(filename).suffix.lower()
+
+
+def is_allowed_file(filename: str) -> bool:
+    """Check if file extension is allowed"""
+    return get_file_extension(filename) in ALLOWED_EXTENSIONS
+
+
+def sniff_image_extension(head: bytes) -> Optional[str]:
+    """Detect the real image type from its magic bytes"""
+    if head.startswith(b"\xff\xd8\xff"):
+        return ".jpg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return ".png"
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return ".gif"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return ".webp"
+    return None
+
+
+def _write_chunk(out, hasher, chunk: bytes):
+    hasher.update(chunk)
+    out.write(chunk)
+
+
+def discard(path):
+    """Remove a file, ignoring one that is already gone"""
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+def _too_large() -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"File too large. Maximum size is {UPLOAD_MAX_BYTES / (1024 * 1024):.1f} MB",
+    )
+
+
+class UploadLimitMiddleware:
+    """Refuse multipart bodies over UPLOAD_MAX_REQUEST_BYTES while they are received.
+
+    Starlette spools a whole multipart body before the route runs, so a
+    cap checked by the route only applies once an oversized upload has
+    been received and written to disk. A Content-Length over the cap is
+    answered 413 without reading the body; a body that grows past it is
+    cut off with 413.
+    """
+
+    def __init__(self, app: ASGIApp, max_bytes: int = UPLOAD_MAX_REQUEST_BYTES):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        if not headers.get("content-type", "").startswith("multipart/form-data"):
+            await self.app(scope, receive, send)
+            return
+        declared = headers.get("content-length", "")
+        if declared.isdigit() and int(declared) > self.max_bytes:
+            metrics.counter("uploads.rejected_too_large").inc()
+            refusal = _too_large()
+            await JSONResponse({"detail": refusal.detail}, status_code=refusal.status_code)(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    metrics.counter("uploads.rejected_too_large").inc()
+                    # Re-raised by FastAPI's body parsing and answered by its exception handler
+                    raise _too_large()
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+async def stream_upload(file: UploadFile, dest_dir: Path) -> StoredUpload:
+    """Copy an uploaded image into a temp file in dest_dir without blocking the event loop.
+
+    By the time the route runs, Starlette has already spooled the request
+    body, which UploadLimitMiddleware capped as it arrived. Here the file is
+    hashed as it is copied, checked against UPLOAD_MAX_BYTES, and typed
+    from its magic bytes rather than its name. The returned path is the
+    temp file; the caller must move it into place (same filesystem, so
+    os.replace is atomic) or discard it.
+    """
+    if not file.filename:
+        raise HTTPException(status_code=400, detail="No filename provided")
+    if not is_allowed_file(file.filename):
+        raise HTTPException(
+            status_code=400,
+            detail=f"File type not allowed. Allowed types: {', '.join(sorted(ALLOWED_EXTENSIONS))}"
+        )
+    if file.size is not None and file.size > UPLOAD_MAX_BYTES:
+        raise _too_large()
+
+    dest_dir.mkdir(parents=True, exist_ok=True)
+    async with _upload_slots:
+        fd, tmp_path = tempfile.mkstemp(dir=dest_dir, prefix=".upload-", suffix=".part")
+        hasher = hashlib.sha256()
+        size = 0
+        head = b""
+        try:
+            with os.fdopen(fd, "wb") as out:
+                while True:
+                    chunk = await file.read(UPLOAD_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if size > UPLOAD_MAX_BYTES:
+                        raise _too_large()
+                    if len(head) < 16:
+                        head += chunk[:16 - len(head)]
+                    await run_in_threadpool(_write_chunk, out, hasher, chunk)
+
+            extension = sniff_image_extension(head)
+            if extension is None:
+                raise HTTPException(status_code=400, detail="File is not a supported image")
+        except BaseException:
+            await run_in_threadpool(discard, tmp_path)
+            raise
+
+    return StoredUpload(extension, Path(tmp_path), size, hasher.hexdigest(), CONTENT_TYPES[extension])
+
+
+def schedule_delete(paths: Iterable[Path], still_unused: Optional[Callable[[], Awaitable[bool]]] = None):
+    """Queue files for removal by the background deletion worker.
+
+    still_unused, if given, is awaited just before each unlink; a False
+    result keeps the file (e.g. because it was reused in the meantime).
+    """
+    for path in paths:
+        _deletions.put_nowait((path, still_unused))
+    metrics.gauge("uploads.deletion_queue").set(_deletions.qsize())
+
+
+def _unlink(path: Path) -> int:
+    try:
+        size = os.stat(path).st_size
+        os.unlink(path)
+    except FileNotFoundError:
+        return 0
+    return size
+
+
+async def process_deletions():
+    """Unlink queued files one at a time until cancelled, counting reclaimed bytes"""
+    while True:
+        path, still_unused = await _deletions.get()
+        try:
+            if still_unused is not None and not await still_unused():
+                continue
+            reclaimed = await run_in_threadpool(_unlink, path)
+            if reclaimed:
+                metrics.counter("uploads.reclaimed_bytes").inc(reclaimed)
+                metrics.counter("uploads.deleted_files").inc()
+        except Exception as e:
+            logger.warning("Could not delete %s: %s", path, e)
+        finally:
+            _deletions.task_done()
+            metrics.gauge("uploads.deletion_queue").set(_deletions.qsize())
+
+
+async def drain_deletions(timeout: float):
+    """Wait for queued deletions to finish, giving up after timeout seconds"""
+    try:
+        await asyncio.wait_for(_deletions.join(), timeout)
+    except asyncio.TimeoutError:
+        logger.warning("%d file deletions still queued at shutdown", _deletions.qsize())
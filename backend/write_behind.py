@@ -0,0 +1,228 @@
+import asyncio
+import fcntl
+import logging
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import BinaryIO, Dict, List, NamedTuple, Optional
+
+from bson import json_util
+from starlette.concurrency import run_in_threadpool
+
+import metrics
+from repository import Repository, to_response
+
+logger = logging.getLogger(__name__)
+
+# Acknowledge form submissions once journaled to disk and insert them in batches
+FORMS_WRITE_BEHIND = os.environ.get("FORMS_WRITE_BEHIND", "false").lower() in ("1", "true", "yes")
+FORMS_JOURNAL_DIR = Path(os.environ.get("FORMS_JOURNAL_DIR", "/app/journal"))
+# A flush starts once this many submissions are waiting, or after the interval
+FORMS_FLUSH_BATCH_SIZE = int(os.environ.get("FORMS_FLUSH_BATCH_SIZE", "500"))
+FORMS_FLUSH_INTERVAL_SECONDS = float(os.environ.get("FORMS_FLUSH_INTERVAL_SECONDS", "1"))
+
+_SEGMENT_GLOB = "journal-*.ndjson"
+
+
+class _Record(NamedTuple):
+    collection: str
+    doc: dict
+
+
+class _Segment:
+    """One journal file, flock'd for as long as this process owns it"""
+
+    def __init__(self, path: Path, file: BinaryIO):
+        self.path = path
+        self.file = file
+
+    def discard(self):
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+        self.file.close()
+
+
+def _discard_all(segments: List[_Segment]):
+    for segment in segments:
+        segment.discard()
+
+
+def _lock(file: BinaryIO) -> bool:
+    try:
+        fcntl.flock(file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return False
+    # Another worker may have replayed and removed the file before we locked it
+    return os.fstat(file.fileno()).st_nlink > 0
+
+
+class WriteBehindQueue:
+    """Durable write-behind for inserts into registered repositories.
+
+    submit() appends the document to an fsynced journal segment and
+    returns at once. A background task seals the segment and inserts what
+    it holds with insert_many, then deletes it. Segments left by a worker
+    that stopped are replayed at startup; documents carry their _id from
+    submission, so one inserted twice is skipped.
+    """
+
+    def __init__(self, directory: Path, batch_size: int, interval: float):
+        self.directory = directory
+        self.batch_size = batch_size
+        self.interval = interval
+        self._repositories: Dict[str, Repository] = {}
+        # Guards the active segment and the record lists, used from threadpool appends
+        self._lock = threading.Lock()
+        self._active: Optional[_Segment] = None
+        self._pending: List[_Record] = []
+        # Segments no longer written to, and their records, until inserted
+        self._sealed: List[_Segment] = []
+        self._unflushed: List[_Record] = []
+        self._flushing = asyncio.Lock()
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        metrics.register_collector("forms.write_behind", self.stats)
+
+    def register(self, repository: Repository):
+        self._repositories[repository.name] = repository
+
+    @property
+    def depth(self) -> int:
+        return len(self._pending) + len(self._unflushed)
+
+    async def submit(self, repository: Repository, data: dict) -> dict:
+        """Journal a new document and return it as create() would"""
+        doc = dict(data)
+        doc.setdefault("_id", str(uuid.uuid4()))
+        record = _Record(repository.name, doc)
+        entry = {"collection": record.collection, "doc": doc}
+        line = json_util.dumps(entry).encode() + b"\n"
+        await run_in_threadpool(self._append, record, line)
+        if self._wake is not None and self.depth >= self.batch_size:
+            self._wake.set()
+        return to_response(doc)
+
+    def _append(self, record: _Record, line: bytes):
+        with self._lock:
+            if self._active is None:
+                self._active = self._open_segment()
+            self._active.file.write(line)
+            self._active.file.flush()
+            os.fsync(self._active.file.fileno())
+            self._pending.append(record)
+
+    def _open_segment(self) -> _Segment:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        while True:
+            path = self.directory / f"journal-{time.time_ns():020d}-{os.getpid()}.ndjson"
+            file = open(path, "ab")
+            if _lock(file):
+                return _Segment(path, file)
+            file.close()
+
+    def _seal(self):
+        with self._lock:
+            if self._active is not None:
+                self._sealed.append(self._active)
+                self._active = None
+            self._unflushed.extend(self._pending)
+            self._pending = []
+
+    def _replay(self) -> int:
+        """Take over journal segments no running worker holds"""
+        if not self.directory.is_dir():
+            return 0
+        records = []
+        for path in sorted(self.directory.glob(_SEGMENT_GLOB)):
+            try:
+                file = open(path, "rb")
+            except FileNotFoundError:
+                continue
+            if not _lock(file):
+                file.close()
+                continue
+            for number, line in enumerate(file.read().splitlines(), 1):
+                try:
+                    entry = json_util.loads(line)
+                    records.append(_Record(entry["collection"], entry["doc"]))
+                except (ValueError, KeyError):
+                    # A line cut short by a crash was never acknowledged
+                    logger.warning("Skipping unreadable line %d of %s", number, path.name)
+            self._sealed.append(_Segment(path, file))
+        with self._lock:
+            self._unflushed.extend(records)
+        return len(records)
+
+    async def flush(self) -> int:
+        """Insert every journaled document; returns the number newly inserted"""
+        async with self._flushing:
+            await run_in_threadpool(self._seal)
+            if not self._unflushed:
+                return 0
+            started = time.perf_counter()
+            inserted = 0
+            try:
+                by_collection: Dict[str, List[dict]] = {}
+                for record in self._unflushed:
+                    by_collection.setdefault(record.collection, []).append(record.doc)
+                for collection, docs in by_collection.items():
+                    repository = self._repositories[collection]
+                    for i in range(0, len(docs), self.batch_size):
+                        inserted += await repository.insert_many(docs[i:i + self.batch_size])
+            except Exception:
+                metrics.counter("forms.write_behind.flush_failures").inc()
+                raise
+            finally:
+                metrics.timer("forms.write_behind.flush").observe(time.perf_counter() - started)
+            sealed, self._sealed = self._sealed, []
+            self._unflushed = []
+            await run_in_threadpool(_discard_all, sealed)
+            metrics.counter("forms.write_behind.inserted").inc(inserted)
+            return inserted
+
+    async def _flush_forever(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+            except Exception:
+                # Kept in the journal and retried on the next round
+                logger.exception("Write-behind flush of %d documents failed", self.depth)
+
+    async def start(self):
+        """Replay journals left behind, then start flushing in the background"""
+        replayed = await run_in_threadpool(self._replay)
+        if replayed:
+            logger.info("Replaying %d journaled submissions", replayed)
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._flush_forever())
+
+    async def stop(self, timeout: float = 5.0):
+        """Stop the background task and flush what is left; anything unflushed stays journaled"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        try:
+            await asyncio.wait_for(self.flush(), timeout)
+        except Exception as e:
+            logger.warning("Leaving %d submissions in the journal: %s", self.depth, e)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": FORMS_WRITE_BEHIND,
+            "queue_depth": self.depth,
+            "segments": len(self._sealed) + (self._active is not None),
+        }
+
+
+form_queue = WriteBehindQueue(FORMS_JOURNAL_DIR, FORMS_FLUSH_BATCH_SIZE, FORMS_FLUSH_INTERVAL_SECONDS)
@@ -6,11 +6,16 @@ Tests all backend endpoints as specified in the review request
 
 import requests
 import json
+import struct
 import sys
+import time
+import zlib
 from datetime import datetime
 
 # Get backend URL from frontend .env
 BACKEND_URL = "https://black-youth-dev-1.preview.emergentagent.com/api"
+# Server default for UPLOAD_MAX_BYTES
+UPLOAD_MAX_BYTES = 10 * 1024 * 1024
 
 class Colors:
     GREEN = '\033[92m'
@@ -37,6 +42,15 @@ def print_header(msg):
     print(f"{Colors.BOLD}{Colors.BLUE}{msg}{Colors.ENDC}")
     print(f"{Colors.BOLD}{Colors.BLUE}{'='*60}{Colors.ENDC}")
 
+def make_png(text=""):
+    """A valid 1x1 PNG; a distinct text gives distinct bytes, and so a distinct stored file"""
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+    png = b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", 1, 1, 8, 2, 0, 0, 0))
+    if text:
+        png += chunk(b"tEXt", b"Comment\x00" + text.encode())
+    return png + chunk(b"IDAT", zlib.compress(b"\x00\xff\xff\xff")) + chunk(b"IEND", b"")
+
 class GOSECAPITester:
     def __init__(self):
         self.base_url = BACKEND_URL
@@ -119,6 +133,33 @@ class GOSECAPITester:
             self.test_results["errors"].append(f"Login failed with status {response.status_code}")
             return False
 
+    def test_admin_removal(self):
+        """Test: a removed admin's token is refused with 401"""
+        print_header("Testing Admin Removal")
+
+        username = f"test-admin-{datetime.now().strftime('%Y%m%d%H%M%S%f')}"
+        response = self.make_request("POST", "/auth/admins", {"username": username, "password": "test-password"}, auth_required=True)
+        if not response or response.status_code != 201:
+            print_error(f"Could not create admin: {response.status_code if response else 'No response'}")
+            self.test_results["failed"] += 1
+            self.test_results["errors"].append("Admin removal test setup failed")
+            return
+
+        login = requests.post(f"{self.base_url}/auth/login", data={"username": username, "password": "test-password"}, timeout=30)
+        headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+        # Caches the new admin as an authenticated principal
+        before = requests.get(f"{self.base_url}/auth/admins", headers=headers, timeout=30)
+
+        self.make_request("DELETE", f"/auth/admins/{username}", auth_required=True)
+        after = requests.get(f"{self.base_url}/auth/admins", headers=headers, timeout=30)
+        if before.status_code == 200 and after.status_code == 401:
+            print_success("A removed admin's token is refused with 401")
+            self.test_results["passed"] += 1
+        else:
+            print_error(f"Removed admin's token: before {before.status_code}, after {after.status_code} (expected 200, 401)")
+            self.test_results["failed"] += 1
+            self.test_results["errors"].append("Removed admin still authenticated")
+
     def test_content_apis(self):
         """Test 2: Content APIs (Hero & About)"""
         print_header("Testing Content APIs")
@@ -169,6 +210,43 @@ class GOSECAPITester:
             self.test_results["failed"] += 1
             self.test_results["errors"].append("About content API failed")
 
+    def test_media_duplicate_key(self):
+        """Test: a media key already in use is refused with 409"""
+        print_header("Testing Media Duplicate Key")
+
+        asset = {
+            "key": f"test.duplicate.{datetime.now().strftime('%Y%m%d%H%M%S%f')}",
+            "url": "https://images.unsplash.com/photo-1431324155629-1a6deb1dec8d?w=800",
+            "alt_en": "Duplicate key test",
+            "alt_fr": "Test de clé en double"
+        }
+        first = self.make_request("POST", "/media", asset, auth_required=True)
+        if not first or first.status_code != 200:
+            print_error(f"Could not create media asset: {first.status_code if first else 'No response'}")
+            self.test_results["failed"] += 1
+            self.test_results["errors"].append("Media duplicate key test setup failed")
+            return
+
+        response = self.make_request("POST", "/media", asset, auth_required=True)
+        if response and response.status_code == 409:
+            print_success("Creating a second asset with the same key returns 409")
+            self.test_results["passed"] += 1
+        else:
+            print_error(f"Duplicate media key create should return 409, got: {response.status_code if response else 'No response'}")
+            self.test_results["failed"] += 1
+            self.test_results["errors"].append("Duplicate media key create not refused with 409")
+
+        other = self.make_request("POST", "/media", {**asset, "key": asset["key"] + ".other"}, auth_required=True)
+        if other and other.status_code == 200:
+            response = self.make_request("PUT", f"/media/{other.json()['id']}", asset, auth_required=True)
+            if response and response.status_code == 409:
+                print_success("Renaming an asset to a key in use returns 409")
+                self.test_results["passed"] += 1
+            else:
+                print_error(f"Duplicate media key update should return 409, got: {response.status_code if response else 'No response'}")
+                self.test_results["failed"] += 1
+                self.test_results["errors"].append("Duplicate media key update not refused with 409")
+
     def test_programs_api(self):
         """Test 3: Programs API"""
         print_header("Testing Programs API")
@@ -221,6 +299,93 @@ class GOSECAPITester:
             self.test_results["failed"] += 1
             self.test_results["errors"].append("Programs API failed")
 
+    def test_search_api(self):
+        """Test: search folds accents and word forms, ranks full matches first, and follows writes"""
+        print_header("Testing Search API")
+
+        # Letters only, so the made-up words are not split or stemmed unexpectedly
+        tag = "".join(chr(ord("a") + int(digit)) for digit in datetime.now().strftime("%H%M%S%f"))
+        word, renamed = f"zephyr{tag}", f"qorvex{tag}"
+        programs = [
+            {"title_en": f"{word.capitalize()} club", "title_fr": f"Club zéphyr{tag}",
+             "description_en": "Weekly workshops", "description_fr": "Ateliers chaque semaine"},
+            {"title_en": f"{word.capitalize()} league", "title_fr": f"Ligue zéphyr{tag}",
+             # Mentions the word twice, so it only ranks second when full coverage counts first
+             "description_en": f"Friendly {word} games", "description_fr": f"Matchs amicaux zéphyr{tag}"},
+        ]
+        ids = []
+        for program in programs:
+            response = self.make_request("POST", "/programs", program, auth_required=True)
+            if not response or response.status_code != 200:
+                print_error(f"Could not create program: {response.status_code if response else 'No response'}")
+                self.test_results["failed"] += 1
+                self.test_results["errors"].append("Search test setup failed")
+                for program_id in ids:
+                    self.make_request("DELETE", f"/programs/{program_id}", auth_required=True)
+                return
+            ids.append(response.json()["id"])
+        full, partial = ids
+
+        def search(query, lang=None):
+            params = f"?q={query}&collections=programs" + (f"&lang={lang}" if lang else "")
+            response = self.make_request("GET", f"/search{params}")
+            return response.json()["results"] if response and response.status_code == 200 else None
+
+        def check(ok, success, failure):
+            if ok:
+                print_success(success)
+                self.test_results["passed"] += 1
+            else:
+                print_error(failure)
+                self.test_results["failed"] += 1
+                self.test_results["errors"].append(failure)
+
+        try:
+            results = search(f"zephyr{tag}", lang="fr")
+            check(results is not None and {r["id"] for r in results} == set(ids),
+                  "An unaccented query matches the accented French titles",
+                  f"Accent folding: expected both programs, got {results}")
+
+            # "workshop" first: the last word also matches as a prefix, which would hide a stemming miss
+            results = search(f"workshop {word}", lang="en")
+            order = [r["id"] for r in results or []]
+            check(order[:2] == [full, partial],
+                  "The program matching every word (workshops ~ workshop) ranks first",
+                  f"Ranking/stemming: expected {[full, partial]}, got {order}")
+            scores = [r["score"] for r in results or []]
+            check(scores == sorted(scores, reverse=True),
+                  "Results come back in descending score order",
+                  f"Scores not descending: {scores}")
+
+            top = (results or [{}])[0]
+            marked = [
+                highlight["text"][start:end].lower()
+                for highlight in top.get("highlights", [])
+                for start, end in highlight["matches"]
+            ]
+            check(word in marked and "workshops" in marked,
+                  "Highlights mark the matched words in the title and description",
+                  f"Unexpected highlights: {top.get('highlights')}")
+
+            self.make_request("PUT", f"/programs/{full}", {
+                "title_en": f"{renamed.capitalize()} club", "title_fr": f"Club {renamed}"
+            }, auth_required=True)
+            renamed_results = search(renamed)
+            old_results = search(word)
+            check([r["id"] for r in renamed_results or []] == [full]
+                  and [r["id"] for r in old_results or []] == [partial],
+                  "An updated program is found by its new title only, without a rebuild",
+                  f"Update not reflected: {renamed_results}, {old_results}")
+
+            self.make_request("DELETE", f"/programs/{full}", auth_required=True)
+            results = search(renamed)
+            check(results == [],
+                  "A deleted program drops out of search",
+                  f"Deleted program still found: {results}")
+        finally:
+            for program_id in ids:
+                self.make_request("DELETE", f"/programs/{program_id}", auth_required=True)
+
     def test_gallery_api(self):
         """Test 4: Gallery API"""
         print_header("Testing Gallery API")
@@ -287,6 +452,85 @@ class GOSECAPITester:
             self.test_results["failed"] += 1
             self.test_results["errors"].append("Events API failed")
 
+    def test_event_queries(self):
+        """Test: events by date range, upcoming, cursor pages, a moved start and the home bundle"""
+        print_header("Testing Event Date Queries")
+
+        # Far enough ahead to be the only events in their range, and past enough to never be upcoming
+        fixtures = [
+            ("Range Test Past", "2000-01-01T10:00:00Z", "2000-01-01T12:00:00Z"),
+            ("Range Test January", "2100-01-10T10:00:00Z", "2100-01-12T10:00:00Z"),
+            ("Range Test February A", "2100-02-01T10:00:00Z", "2100-02-01T12:00:00Z"),
+            ("Range Test February B", "2100-02-01T10:00:00Z", "2100-02-01T12:00:00Z"),
+        ]
+        created = []
+        try:
+            for title, starts_at, ends_at in fixtures:
+                response = self.make_request("POST", "/events", {
+                    "title_en": title, "title_fr": title,
+                    "location_en": "Test", "location_fr": "Test",
+                    "summary_en": "Test", "summary_fr": "Test",
+                    "starts_at": starts_at, "ends_at": ends_at,
+                }, auth_required=True)
+                if not response or response.status_code != 200:
+                    print_error(f"Could not create event {title}: {response.status_code if response else 'No response'}")
+                    self.test_results["failed"] += 1
+                    self.test_results["errors"].append("Event query test setup failed")
+                    return
+                created.append(response.json()["id"])
+            past, january, february_a, february_b = created
+            february = sorted([february_a, february_b])
+
+            def ids(endpoint):
+                response = self.make_request("GET", endpoint)
+                return [event["id"] for event in response.json()] if response and response.status_code == 200 else None
+
+            failures = []
+            if ids("/events?from=2100-01-01T00:00:00Z&to=2100-02-01T00:00:00Z") != [january]:
+                failures.append("from/to did not return only the January event")
+            if ids("/events?from=2100-01-11T00:00:00Z&to=2100-01-11T01:00:00Z") != [january]:
+                failures.append("from/to missed an event that overlaps the range")
+            upcoming = ids("/events?upcoming=true") or []
+            if past in upcoming or not set(created[1:]) <= set(upcoming):
+                failures.append("upcoming=true did not keep exactly the events that have not ended")
+
+            # Equal starts are ordered by id, so paging one at a time neither repeats nor skips
+            paged, endpoint = [], "/events?from=2100-01-01T00:00:00Z&limit=1"
+            for _ in range(len(created) + 1):
+                response = self.make_request("GET", endpoint)
+                if not response or response.status_code != 200:
+                    break
+                paged += [event["id"] for event in response.json()]
+                cursor = response.headers.get("X-Next-Cursor")
+                if not cursor:
+                    break
+                endpoint = f"/events?from=2100-01-01T00:00:00Z&limit=1&cursor={cursor}"
+            if paged != [january] + february:
+                failures.append(f"cursor pages returned {paged}, expected {[january] + february}")
+
+            response = self.make_request("PUT", f"/events/{january}", {"starts_at": "2100-01-20T10:00:00Z"}, auth_required=True)
+            moved = response.json() if response and response.status_code == 200 else {}
+            if not moved.get("ends_at", "").startswith("2100-01-22T10:00:00"):
+                failures.append(f"moving only the start did not keep the duration: {response.status_code if response else 'No response'} {moved.get('ends_at')}")
+
+            response = self.make_request("GET", "/site/bundle?page=home")
+            upcoming_page = self.make_request("GET", "/events?upcoming=true")
+            bundle = response.json() if response and response.status_code == 200 else {}
+            if "events" in bundle or bundle.get("upcoming_events") != (upcoming_page.json() if upcoming_page else None):
+                failures.append("home bundle does not hold the upcoming events page")
+
+            if not failures:
+                print_success("Date ranges, upcoming, cursor pages, moved starts and the home bundle all work")
+                self.test_results["passed"] += 1
+            else:
+                for failure in failures:
+                    print_error(failure)
+                self.test_results["failed"] += 1
+                self.test_results["errors"].append("Event date queries failed")
+        finally:
+            for event_id in created:
+                self.make_request("DELETE", f"/events/{event_id}", auth_required=True)
+
     def test_leadership_api(self):
         """Test 6: Leadership API - NEW FEATURE"""
         print_header("Testing Leadership API (NEW FEATURE)")
@@ -332,6 +576,47 @@ class GOSECAPITester:
             self.test_results["failed"] += 1
             self.test_results["errors"].append("Leadership API failed")
 
+    def test_site_bundle_invalidation(self):
+        """Test: each page's site bundle is rebuilt after a write to a collection it includes"""
+        print_header("Testing Site Bundle Invalidation")
+
+        response = self.make_request("POST", "/leadership", {
+            "name": "Bundle Test Leader",
+            "role_en": "Tester",
+            "role_fr": "Testeur"
+        }, auth_required=True)
+        if not response or response.status_code != 200:
+            print_error(f"Could not create leadership member: {response.status_code if response else 'No response'}")
+            self.test_results["failed"] += 1
+            self.test_results["errors"].append("Site bundle test setup failed")
+            return
+        member_id = response.json()["id"]
+
+        # Cache both pages; only "about" includes leadership
+        self.make_request("GET", "/site/bundle?page=about")
+        programs_before = self.make_request("GET", "/site/bundle?page=programs")
+        self.make_request("PUT", f"/leadership/{member_id}", {"name": "Bundle Test Leader Renamed"}, auth_required=True)
+
+        about = self.make_request("GET", "/site/bundle?page=about")
+        programs_after = self.make_request("GET", "/site/bundle?page=programs")
+        if about and about.status_code == 200 and "Bundle Test Leader Renamed" in about.text:
+            print_success("About bundle reflects the leadership update")
+            self.test_results["passed"] += 1
+        else:
+            print_error("About bundle still serves the old leadership member")
+            self.test_results["failed"] += 1
+            self.test_results["errors"].append("Site bundle not invalidated for page about")
+
+        if programs_before and programs_after and programs_before.headers.get("ETag") == programs_after.headers.get("ETag"):
+            print_success("Programs bundle kept its ETag, since it does not include leadership")
+            self.test_results["passed"] += 1
+        else:
+            print_error("Programs bundle changed after a leadership update")
+            self.test_results["failed"] += 1
+            self.test_results["errors"].append("Site bundle for page programs invalidated by an unrelated write")
+
+        self.make_request("DELETE", f"/leadership/{member_id}", auth_required=True)
+
     def test_events_upload_api(self):
         """Test 7: Events Upload API - NEW FEATURE"""
         print_header("Testing Events Upload API (NEW FEATURE)")
@@ -344,10 +629,10 @@ class GOSECAPITester:
         
         # Create a simple test image file
         import io
-        test_image_content = b"fake_image_data_for_testing"
+        test_image_content = make_png()
         
         # Test events upload endpoint
-        files = {"file": ("test_image.jpg", io.BytesIO(test_image_content), "image/jpeg")}
+        files = {"file": ("test_image.png", io.BytesIO(test_image_content), "image/png")}
         headers = {"Authorization": f"Bearer {self.access_token}"}
         
         try:
@@ -367,7 +652,7 @@ class GOSECAPITester:
                         
                         # Test if the uploaded image can be accessed
                         image_url = result["image_url"]
-                        if image_url.startswith("/api/uploads/events/"):
+                        if image_url.startswith("/api/uploads/store/"):
                             print_success("Events upload returns correct image URL format")
                         else:
                             print_warning(f"Unexpected image URL format: {image_url}")
@@ -400,7 +685,7 @@ class GOSECAPITester:
         
         # Create a simple test image file
         import io
-        test_image_content = b"fake_image_data_for_testing"
+        test_image_content = make_png()
         
         # Test gallery upload endpoint
         files = {"file": ("test_gallery.png", io.BytesIO(test_image_content), "image/png")}
@@ -423,12 +708,12 @@ class GOSECAPITester:
                         
                         # Test if the uploaded image can be accessed
                         image_url = result["image_url"]
-                        if image_url.startswith("/api/uploads/gallery/"):
+                        if image_url.startswith("/api/uploads/store/"):
                             print_success("Gallery upload returns correct image URL format")
                             
                             # Test accessing the uploaded image
                             filename = image_url.split("/")[-1]
-                            image_response = self.make_request("GET", f"/uploads/gallery/{filename}")
+                            image_response = self.make_request("GET", f"/uploads/store/{filename}")
                             if image_response and image_response.status_code == 200:
                                 print_success("Uploaded gallery image is accessible via URL")
                                 self.test_results["passed"] += 1
@@ -455,6 +740,103 @@ class GOSECAPITester:
             self.test_results["failed"] += 1
             self.test_results["errors"].append(f"Gallery upload request failed: {str(e)}")
 
+    def test_image_store_references(self):
+        """Test: identical uploads share one file, which is removed with its last reference"""
+        print_header("Testing Image Store References")
+
+        import io
+        headers = {"Authorization": f"Bearer {self.access_token}"}
+        content = make_png(f"references {datetime.now().isoformat()}")
+
+        urls = []
+        for _ in range(2):
+            files = {"file": ("same.png", io.BytesIO(content), "image/png")}
+            response = requests.post(f"{self.base_url}/gallery/upload", files=files, headers=headers, timeout=30)
+            if response.status_code != 200:
+                print_error(f"Upload failed with status {response.status_code}: {response.text}")
+                self.test_results["failed"] += 1
+                self.test_results["errors"].append("Image store reference test upload failed")
+                return
+            urls.append(response.json()["image_url"])
+        image_url = urls[0]
+        image_path = image_url[len("/api"):]
+
+        if urls[0] == urls[1]:
+            print_success("Uploading the same bytes twice returns the same URL")
+            self.test_results["passed"] += 1
+        else:
+            print_error(f"Same bytes stored twice: {urls}")
+            self.test_results["failed"] += 1
+            self.test_results["errors"].append("Identical uploads not deduplicated")
+
+        items = []
+        for title in ("First", "Second"):
+            response = self.make_request("POST", "/gallery", {
+                "title_en": f"{title} reference", "title_fr": f"{title} référence", "image_url": image_url
+            }, auth_required=True)
+            items.append(response.json()["id"])
+        asset = self.make_request("POST", "/media", {
+            "key": f"test.references.{datetime.now().strftime('%Y%m%d%H%M%S%f')}",
+            "url": image_url,
+        }, auth_required=True).json()
+
+        self.make_request("DELETE", f"/gallery/{items[0]}", auth_required=True)
+        self.make_request("DELETE", f"/gallery/{items[1]}", auth_required=True)
+        response = self.make_request("GET", image_path)
+        if response and response.status_code == 200:
+            print_success("The file is kept while a media asset still uses it")
+            self.test_results["passed"] += 1
+        else:
+            print_error(f"File still used by a media asset is gone: {response.status_code if response else 'No response'}")
+            self.test_results["failed"] += 1
+            self.test_results["errors"].append("Image deleted while a media asset references it")
+
+        self.make_request("PUT", f"/media/{asset['id']}", {
+            "key": asset["key"],
+            "url": "https://images.unsplash.com/photo-1431324155629-1a6deb1dec8d?w=800",
+        }, auth_required=True)
+        # Files are unlinked by a background queue
+        for _ in range(20):
+            response = self.make_request("GET", image_path)
+            if response and response.status_code == 404:
+                break
+            time.sleep(0.25)
+        if response and response.status_code == 404:
+            print_success("The file is removed once its last reference goes")
+            self.test_results["passed"] += 1
+        else:
+            print_error(f"File without references still served: {response.status_code if response else 'No response'}")
+            self.test_results["failed"] += 1
+            self.test_results["errors"].append("Image not removed after its last reference")
+
+    def test_upload_validation(self):
+        """Test: uploads that are too large or not images are refused"""
+        print_header("Testing Upload Validation")
+
+        import io
+        headers = {"Authorization": f"Bearer {self.access_token}"}
+
+        files = {"file": ("fake.png", io.BytesIO(b"fake_image_data_for_testing"), "image/png")}
+        response = requests.post(f"{self.base_url}/gallery/upload", files=files, headers=headers, timeout=30)
+        if response.status_code == 400:
+            print_success("A file that is not an image is refused with 400")
+            self.test_results["passed"] += 1
+        else:
+            print_error(f"Non-image upload should return 400, got: {response.status_code}")
+            self.test_results["failed"] += 1
+            self.test_results["errors"].append("Non-image upload not refused with 400")
+
+        oversized = b"\x89PNG\r\n\x1a\n" + b"\0" * UPLOAD_MAX_BYTES
+        files = {"file": ("big.png", io.BytesIO(oversized), "image/png")}
+        response = requests.post(f"{self.base_url}/gallery/upload", files=files, headers=headers, timeout=60)
+        if response.status_code == 413:
+            print_success("An upload over the size limit is refused with 413")
+            self.test_results["passed"] += 1
+        else:
+            print_error(f"Oversized upload should return 413, got: {response.status_code}")
+            self.test_results["failed"] += 1
+            self.test_results["errors"].append("Oversized upload not refused with 413")
+
     def test_forms_api(self):
         """Test 9: Forms API (Contact, Join, Donate)"""
         print_header("Testing Forms API")
@@ -543,6 +925,77 @@ class GOSECAPITester:
             self.test_results["failed"] += 1
             self.test_results["errors"].append("Donate form API failed")
 
+    def test_forms_idempotency(self):
+        """Test: a repeated Idempotency-Key returns the first response; reusing it for other data is refused"""
+        print_header("Testing Forms Idempotency")
+
+        key = f"test-{datetime.now().strftime('%Y%m%d%H%M%S%f')}"
+        submission = {
+            "first_name": "Replay",
+            "last_name": "Test",
+            "email": "replay.test@example.com",
+            "message": f"Idempotency test {key}"
+        }
+        headers = {"Content-Type": "application/json", "Idempotency-Key": key}
+        first = requests.post(f"{self.base_url}/forms/contact", json=submission, headers=headers, timeout=30)
+        replay = requests.post(f"{self.base_url}/forms/contact", json=submission, headers=headers, timeout=30)
+        if (first.status_code == 200 and replay.status_code == 200
+                and replay.json().get("id") == first.json().get("id")
+                and replay.headers.get("Idempotent-Replayed") == "true"):
+            print_success("A replayed Idempotency-Key returns the first id with Idempotent-Replayed")
+            self.test_results["passed"] += 1
+        else:
+            print_error(f"Replay not answered with the first response: {first.status_code}, {replay.status_code}")
+            self.test_results["failed"] += 1
+            self.test_results["errors"].append("Idempotent replay did not return the first response")
+
+        changed = requests.post(f"{self.base_url}/forms/contact", json={**submission, "message": "Something else"}, headers=headers, timeout=30)
+        if changed.status_code == 422:
+            print_success("Reusing an Idempotency-Key for a different submission returns 422")
+            self.test_results["passed"] += 1
+        else:
+            print_error(f"Key reused for a different payload should return 422, got: {changed.status_code}")
+            self.test_results["failed"] += 1
+            self.test_results["errors"].append("Idempotency-Key reuse with a different payload not refused")
+
+    def test_forms_rate_limit(self):
+        """Test: form posts are limited per client with 429 and Retry-After; reads and admin routes are not"""
+        print_header("Testing Forms Rate Limit")
+
+        # Invalid bodies still spend tokens, since the limit applies before the route
+        limited = None
+        for _ in range(50):
+            response = self.make_request("POST", "/forms/contact", {})
+            if response is not None and response.status_code == 429:
+                limited = response
+                break
+        retry_after = limited.headers.get("Retry-After", "") if limited is not None else ""
+        if limited is not None and retry_after.isdigit() and int(retry_after) >= 1:
+            print_success(f"Form posts are refused with 429 once the bucket is empty (Retry-After: {retry_after})")
+            self.test_results["passed"] += 1
+        else:
+            print_error(f"Expected 429 with Retry-After, got: {limited.status_code if limited is not None else 'no 429'} {retry_after!r}")
+            self.test_results["failed"] += 1
+            self.test_results["errors"].append("Forms rate limit did not answer 429 with Retry-After")
+
+        checks = [
+            ("GET", "/programs", None, False),
+            ("GET", "/forms/contact", None, True),
+            ("PUT", "/media/missing-rate-limit-test", {"key": "test.missing", "url": "https://example.com/x.png"}, True),
+        ]
+        throttled = []
+        for method, endpoint, data, auth in checks:
+            response = self.make_request(method, endpoint, data, auth_required=auth)
+            if response is None or response.status_code == 429:
+                throttled.append(f"{method} {endpoint}")
+        if not throttled:
+            print_success("Reads and admin routes still answer while the forms limit is hit")
+            self.test_results["passed"] += 1
+        else:
+            print_error(f"Throttled by the forms limit: {throttled}")
+            self.test_results["failed"] += 1
+            self.test_results["errors"].append("Forms rate limit applied to other routes")
+
     def run_all_tests(self):
         """Run all API tests"""
         print_info(f"Starting GOSEC Backend API Tests - Focus on NEW UPLOAD FEATURES")
@@ -551,18 +1004,29 @@ class GOSECAPITester:
         
         # Run tests in order - Auth first for token
         self.test_auth_login()
+        self.test_admin_removal()
         
         # Test existing APIs
         self.test_content_apis()
+        self.test_media_duplicate_key()
         self.test_programs_api()
+        self.test_search_api()
         self.test_gallery_api()
         self.test_events_api()
+        self.test_event_queries()
         self.test_forms_api()
+        self.test_forms_idempotency()
         
         # Test NEW FEATURES - Leadership and Upload APIs
         self.test_leadership_api()
         self.test_events_upload_api()
         self.test_gallery_upload_api()
+        self.test_upload_validation()
+        self.test_image_store_references()
+        self.test_site_bundle_invalidation()
+
+        # Last: leaves this client's forms bucket empty
+        self.test_forms_rate_limit()
         
         # Print summary
         self.print_summary()
@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from "react";
 import { useLanguage } from "@/contexts/LanguageContext";
-import { leadershipApi, contentApi, isBackendConfigured } from "@/services/api";
+import { siteApi, isBackendConfigured } from "@/services/api";
 import { staticLeadership, staticAboutContent } from "@/data/staticData";
 import { Loader2, Mail, Linkedin } from "lucide-react";
 
@@ -25,12 +25,9 @@ export const AboutSection = () => {
       }
 
       try {
-        const [leadershipRes, aboutRes] = await Promise.all([
-          leadershipApi.getAll(),
-          contentApi.getAbout()
-        ]);
-        setLeadership(leadershipRes.data);
-        setAboutContent(aboutRes.data);
+        const { data } = await siteApi.getBundle('about');
+        setLeadership(data.leadership);
+        setAboutContent(data.about);
       } catch (err) {
         console.error('Error fetching about data, using static fallback:', err);
         // Fall back to static data on error
@@ -43,8 +40,12 @@ export const AboutSection = () => {
     fetchData();
   }, []);
 
-  const getImageUrl = (url) => {
+  const getImageUrl = (url, width) => {
     if (!url) return '';
+    // Stored uploads have resized copies; ask for one that fits the card
+    if (width && url.startsWith('/api/uploads/store/')) {
+      url = `${url}?w=${width}`;
+    }
     if (url.startsWith('/api/') && API_BASE_URL) {
       return `${API_BASE_URL}${url}`;
     }
@@ -122,7 +123,7 @@ export const AboutSection = () => {
                   <div className="aspect-square bg-gray-100 overflow-hidden">
                     {member.image_url ? (
                       <img 
-                        src={getImageUrl(member.image_url)} 
+                        src={getImageUrl(member.image_url, 640)}
                         alt={member.name}
                         className="w-full h-full object-cover group-hover:scale-105 transition-transform duration-300"
                       />
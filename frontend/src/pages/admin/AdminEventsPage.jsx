@@ -11,6 +11,16 @@ import { toast } from 'sonner';
 
 const API_BASE_URL = process.env.REACT_APP_BACKEND_URL || '';
 
+// ISO timestamp from the API -> value for a datetime-local input, in the browser's time zone
+const toLocalInput = (iso) => {
+  if (!iso) return '';
+  const d = new Date(iso);
+  const pad = (n) => String(n).padStart(2, '0');
+  return `${d.getFullYear()}-${pad(d.getMonth() + 1)}-${pad(d.getDate())}T${pad(d.getHours())}:${pad(d.getMinutes())}`;
+};
+
+const toIso = (localValue) => (localValue ? new Date(localValue).toISOString() : undefined);
+
 const AdminEventsPage = () => {
   const [events, setEvents] = useState([]);
   const [loading, setLoading] = useState(true);
@@ -47,12 +57,16 @@ const AdminEventsPage = () => {
 
   const openEditDialog = (event = null) => {
     if (event) {
-      setCurrentEvent({ ...event });
+      setCurrentEvent({
+        ...event,
+        starts_at: toLocalInput(event.starts_at),
+        ends_at: toLocalInput(event.ends_at),
+      });
       setPreviewUrl(getImageUrl(event.image_url));
     } else {
       setCurrentEvent({
-        date_en: '',
-        date_fr: '',
+        starts_at: '',
+        ends_at: '',
         title_en: '',
         title_fr: '',
         location_en: '',
@@ -92,25 +106,37 @@ const AdminEventsPage = () => {
   };
 
   const saveEvent = async () => {
-    if (!currentEvent.title_en || !currentEvent.title_fr || !currentEvent.date_en) {
-      toast.error('Please fill in required fields (Title and Date)');
+    if (!currentEvent.title_en || !currentEvent.title_fr || !currentEvent.starts_at) {
+      toast.error('Please fill in required fields (Title and Start)');
+      return;
+    }
+    if (currentEvent.ends_at && currentEvent.ends_at < currentEvent.starts_at) {
+      toast.error('The event cannot end before it starts');
       return;
     }
+    const payload = {
+      ...currentEvent,
+      starts_at: toIso(currentEvent.starts_at),
+      ends_at: toIso(currentEvent.ends_at),
+    };
+    // The display dates are derived from starts_at/ends_at on the server
+    delete payload.date_en;
+    delete payload.date_fr;
 
     setSaving(true);
     try {
       if (currentEvent.id) {
         if (selectedFile) {
-          await eventsApi.updateWithImage(currentEvent.id, currentEvent, selectedFile);
+          await eventsApi.updateWithImage(currentEvent.id, payload, selectedFile);
         } else {
-          await eventsApi.update(currentEvent.id, currentEvent);
+          await eventsApi.update(currentEvent.id, payload);
         }
         toast.success('Event updated!');
       } else {
         if (selectedFile) {
-          await eventsApi.createWithImage(currentEvent, selectedFile);
+          await eventsApi.createWithImage(payload, selectedFile);
         } else {
-          await eventsApi.create(currentEvent);
+          await eventsApi.create(payload);
         }
         toast.success('Event created!');
       }
@@ -249,19 +275,19 @@ const AdminEventsPage = () => {
 
               <div className="grid md:grid-cols-2 gap-4">
                 <div>
-                  <label className="block mb-2 text-sm font-medium">Date (English) *</label>
+                  <label className="block mb-2 text-sm font-medium">Starts *</label>
                   <Input
-                    value={currentEvent?.date_en || ''}
-                    onChange={(e) => handleChange('date_en', e.target.value)}
-                    placeholder="August 15, 2025"
+                    type="datetime-local"
+                    value={currentEvent?.starts_at || ''}
+                    onChange={(e) => handleChange('starts_at', e.target.value)}
                   />
                 </div>
                 <div>
-                  <label className="block mb-2 text-sm font-medium">Date (French) *</label>
+                  <label className="block mb-2 text-sm font-medium">Ends</label>
                   <Input
-                    value={currentEvent?.date_fr || ''}
-                    onChange={(e) => handleChange('date_fr', e.target.value)}
-                    placeholder="15 août 2025"
+                    type="datetime-local"
+                    value={currentEvent?.ends_at || ''}
+                    onChange={(e) => handleChange('ends_at', e.target.value)}
                   />
                 </div>
               </div>
@@ -12,6 +12,17 @@ const AdminFormsPage = () => {
   const [joins, setJoins] = useState([]);
   const [donations, setDonations] = useState([]);
   const [loading, setLoading] = useState(true);
+  // Cursor of each list's next page, from the X-Next-Cursor header; null once all are loaded
+  const [cursors, setCursors] = useState({});
+  const [loadingMore, setLoadingMore] = useState(null);
+
+  const sources = {
+    contacts: { load: formsApi.getContactForms, setItems: setContacts },
+    joins: { load: formsApi.getJoinForms, setItems: setJoins },
+    donations: { load: formsApi.getDonateForms, setItems: setDonations }
+  };
+
+  const nextCursor = (res) => res.headers['x-next-cursor'] || null;
 
   useEffect(() => {
     fetchForms();
@@ -27,6 +38,11 @@ const AdminFormsPage = () => {
       setContacts(contactRes.data);
       setJoins(joinRes.data);
       setDonations(donateRes.data);
+      setCursors({
+        contacts: nextCursor(contactRes),
+        joins: nextCursor(joinRes),
+        donations: nextCursor(donateRes)
+      });
     } catch (err) {
       console.error('Error fetching forms:', err);
       toast.error('Failed to load form submissions');
@@ -35,6 +51,30 @@ const AdminFormsPage = () => {
     }
   };
 
+  const loadMore = async (kind) => {
+    const { load, setItems } = sources[kind];
+    setLoadingMore(kind);
+    try {
+      const res = await load({ cursor: cursors[kind] });
+      setItems((items) => [...items, ...res.data]);
+      setCursors((current) => ({ ...current, [kind]: nextCursor(res) }));
+    } catch (err) {
+      console.error('Error fetching more forms:', err);
+      toast.error('Failed to load more submissions');
+    } finally {
+      setLoadingMore(null);
+    }
+  };
+
+  const renderLoadMore = (kind) => cursors[kind] && (
+    <div className="flex justify-center">
+      <Button variant="outline" onClick={() => loadMore(kind)} disabled={loadingMore === kind}>
+        {loadingMore === kind && <Loader2 size={16} className="mr-2 animate-spin" />}
+        Load more
+      </Button>
+    </div>
+  );
+
   const formatDate = (dateStr) => {
     return new Date(dateStr).toLocaleDateString('en-CA', {
       year: 'numeric',
@@ -70,15 +110,15 @@ const AdminFormsPage = () => {
           <TabsList>
             <TabsTrigger value="contacts" className="flex items-center gap-2">
               <Mail size={16} />
-              Contacts ({contacts.length})
+              Contacts ({contacts.length}{cursors.contacts ? '+' : ''})
             </TabsTrigger>
             <TabsTrigger value="joins" className="flex items-center gap-2">
               <User size={16} />
-              Join Requests ({joins.length})
+              Join Requests ({joins.length}{cursors.joins ? '+' : ''})
             </TabsTrigger>
             <TabsTrigger value="donations" className="flex items-center gap-2">
               <DollarSign size={16} />
-              Donations ({donations.length})
+              Donations ({donations.length}{cursors.donations ? '+' : ''})
             </TabsTrigger>
           </TabsList>
 
@@ -112,6 +152,7 @@ const AdminFormsPage = () => {
                   </Card>
                 ))
               )}
+              {renderLoadMore('contacts')}
             </div>
           </TabsContent>
 
@@ -144,6 +185,7 @@ const AdminFormsPage = () => {
                   </Card>
                 ))
               )}
+              {renderLoadMore('joins')}
             </div>
           </TabsContent>
 
@@ -176,6 +218,7 @@ const AdminFormsPage = () => {
                   </Card>
                 ))
               )}
+              {renderLoadMore('donations')}
             </div>
           </TabsContent>
         </Tabs>
@@ -99,6 +99,7 @@ export const galleryApi = {
 // Events APIs
 export const eventsApi = {
   getAll: () => api.get('/api/events'),
+  getUpcoming: (params = {}) => api.get('/api/events', { params: { upcoming: true, ...params } }),
   getOne: (id) => api.get(`/api/events/${id}`),
   create: (data) => api.post('/api/events', data),
   update: (id, data) => api.put(`/api/events/${id}`, data),
@@ -114,8 +115,8 @@ export const eventsApi = {
   // Create with image upload
   createWithImage: (data, imageFile) => {
     const formData = new FormData();
-    formData.append('date_en', data.date_en);
-    formData.append('date_fr', data.date_fr);
+    formData.append('starts_at', data.starts_at);
+    if (data.ends_at) formData.append('ends_at', data.ends_at);
     formData.append('title_en', data.title_en);
     formData.append('title_fr', data.title_fr);
     formData.append('location_en', data.location_en);
@@ -134,8 +135,8 @@ export const eventsApi = {
   // Update with image upload
   updateWithImage: (id, data, imageFile) => {
     const formData = new FormData();
-    if (data.date_en !== undefined) formData.append('date_en', data.date_en);
-    if (data.date_fr !== undefined) formData.append('date_fr', data.date_fr);
+    if (data.starts_at !== undefined) formData.append('starts_at', data.starts_at);
+    if (data.ends_at !== undefined) formData.append('ends_at', data.ends_at);
     if (data.title_en !== undefined) formData.append('title_en', data.title_en);
     if (data.title_fr !== undefined) formData.append('title_fr', data.title_fr);
     if (data.location_en !== undefined) formData.append('location_en', data.location_en);
@@ -213,15 +214,22 @@ export const mediaApi = {
   update: (id, data) => api.put(`/api/media/${id}`, data),
 };
 
+// Site bundle API: everything a page shows on first load, in one request
+export const siteApi = {
+  getBundle: (page) => api.get('/api/site/bundle', { params: page ? { page } : {} }),
+};
+
 // Forms APIs
 export const formsApi = {
   submitJoin: (data) => api.post('/api/forms/join', data),
   submitDonate: (data) => api.post('/api/forms/donate', data),
   submitContact: (data) => api.post('/api/forms/contact', data),
-  // Admin only
-  getJoinForms: () => api.get('/api/forms/join'),
-  getDonateForms: () => api.get('/api/forms/donate'),
-  getContactForms: () => api.get('/api/forms/contact'),
+  // Admin only. Pass { cursor } from the X-Next-Cursor header to get the next page.
+  getJoinForms: (params) => api.get('/api/forms/join', { params }),
+  getDonateForms: (params) => api.get('/api/forms/donate', { params }),
+  getContactForms: (params) => api.get('/api/forms/contact', { params }),
+  // Admin only. Every submission as a file; params: { format: 'csv' | 'ndjson', from, to, gzip }
+  exportForms: (kind, params) => api.get(`/api/forms/${kind}/export`, { params, responseType: 'blob' }),
 };
 
 // Auth APIs
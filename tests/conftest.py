@@ -0,0 +1,61 @@
+"""Fixtures for the in-process backend tests.
+
+The app runs against the MongoDB in MONGO_URL (or backend/.env), in a
+throwaway TEST_DB_NAME database, with uploads and the write-behind
+journal under temp directories.
+Tests that need it are skipped when no MongoDB answers.
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+from dotenv import load_dotenv
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+# Set before any backend module reads them: never touch the real database or upload root
+load_dotenv(BACKEND_DIR / ".env")
+os.environ["DB_NAME"] = os.environ.get("TEST_DB_NAME", "gosec_test")
+os.environ["UPLOAD_ROOT"] = tempfile.mkdtemp(prefix="gosec-uploads-")
+os.environ["FORMS_JOURNAL_DIR"] = tempfile.mkdtemp(prefix="gosec-journal-")
+# The tests drive the collectors themselves
+os.environ.setdefault("UPLOAD_GC_INTERVAL_SECONDS", "0")
+
+
+@pytest.fixture(scope="session")
+def client():
+    from pymongo import MongoClient
+    from pymongo.errors import PyMongoError
+
+    if not os.environ.get("MONGO_URL"):
+        pytest.skip("MONGO_URL is not set")
+    mongo = MongoClient(os.environ["MONGO_URL"], serverSelectionTimeoutMS=2000)
+    try:
+        mongo.drop_database(os.environ["DB_NAME"])
+    except PyMongoError as e:
+        pytest.skip(f"MongoDB is not reachable: {e}")
+    finally:
+        mongo.close()
+
+    from fastapi.testclient import TestClient
+
+    import server
+
+    with TestClient(server.app) as test_client:
+        yield test_client
+
+
+@pytest.fixture(scope="session")
+def admin_headers(client):
+    response = client.post("/api/auth/login", data={"username": "admin", "password": "gosec_admin"})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture
+def run(client):
+    """Call an async function on the app's event loop, e.g. run(db.events.count_documents, {})"""
+    return client.portal.call
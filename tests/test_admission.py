@@ -0,0 +1,24 @@
+import admission
+
+
+def test_token_bucket_refills_at_its_rate():
+    buckets = admission.TokenBuckets(admission.Rate(per_second=0.5, burst=2))
+    for _ in range(2):
+        buckets.take("client", buckets.available("client", 0.0), 0.0)
+    assert buckets.available("client", 0.0) == 0.0
+    assert buckets.retry_after(0.0) == 2.0
+    assert buckets.available("client", 2.0) == 1.0
+    assert buckets.available("other", 0.0) == 2.0
+
+
+def test_overloaded_worker_sheds_writes_but_serves_reads(client, monkeypatch):
+    monkeypatch.setattr(admission, "SHED_MAX_IN_FLIGHT", 0)
+    response = client.post("/api/forms/contact", json={})
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+    assert client.get("/api/programs").status_code == 200
+
+
+def test_event_loop_lag_sheds_writes(client, monkeypatch):
+    monkeypatch.setattr(admission, "_loop_lag_ms", admission.SHED_MAX_LOOP_LAG_MS)
+    assert client.post("/api/forms/contact", json={}).status_code == 503
@@ -0,0 +1,35 @@
+from datetime import datetime
+
+
+def test_date_text_migration_parses_legacy_events_and_keeps_the_rest(client, run):
+    import database
+    from routes import events_routes
+
+    db = database.client["gosec_test_event_dates"]
+
+    async def migrate():
+        await db.client.drop_database(db.name)
+        await db.events.insert_many([
+            {"_id": "en", "date_en": "August 15-17, 2025", "date_fr": "15-17 août 2025"},
+            {"_id": "fr", "date_en": "", "date_fr": "1er août 2025"},
+            {"_id": "unparsed", "date_en": "Summer 2025", "date_fr": "Été 2025"},
+            {"_id": "dated", "starts_at": datetime(2025, 1, 1, 5), "ends_at": datetime(2025, 1, 1, 6)},
+        ])
+        # A batch smaller than the collection, so the migration has to page
+        assert await events_routes._migrate_date_text(db, 2) == 2
+        assert await events_routes._migrate_date_text(db, 2) == 0
+
+        en = await db.events.find_one({"_id": "en"})
+        # Toronto is UTC-4 in August; a day runs to its last second
+        assert en["starts_at"] == datetime(2025, 8, 15, 4)
+        assert en["ends_at"] == datetime(2025, 8, 18, 3, 59, 59)
+        assert "date_en" not in en and "date_fr" not in en
+        fr = await db.events.find_one({"_id": "fr"})
+        assert (fr["starts_at"], fr["ends_at"]) == (datetime(2025, 8, 1, 4), datetime(2025, 8, 2, 3, 59, 59))
+        unparsed = await db.events.find_one({"_id": "unparsed"})
+        assert "starts_at" not in unparsed and unparsed["date_en"] == "Summer 2025"
+        dated = await db.events.find_one({"_id": "dated"})
+        assert dated["starts_at"] == datetime(2025, 1, 1, 5)
+        await db.client.drop_database(db.name)
+
+    run(migrate)
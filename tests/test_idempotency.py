@@ -0,0 +1,49 @@
+import uuid
+from datetime import datetime, timedelta
+
+CONTACT = {"first_name": "Ada", "last_name": "Test", "email": "ada@example.com", "message": "Hello"}
+
+
+def _submit(client, key, **changes):
+    return client.post("/api/forms/contact", json={**CONTACT, **changes}, headers={"Idempotency-Key": key})
+
+
+def test_replay_after_the_key_expires_is_stored_again(client, run):
+    from database import db
+    from idempotency import claim_for
+
+    key = str(uuid.uuid4())
+    first = _submit(client, key, message="expiry")
+    assert first.status_code == 200
+
+    # The TTL monitor only runs once a minute, so expire the claim by hand
+    claim = claim_for("contact_forms", key, "", {})
+    run(db.idempotency_keys.update_one, {"_id": claim.key}, {"$set": {"expires_at": datetime.utcnow() - timedelta(seconds=1)}})
+
+    again = _submit(client, key, message="expiry")
+    assert again.status_code == 200
+    assert "idempotent-replayed" not in again.headers
+    assert again.json()["id"] != first.json()["id"]
+
+
+def test_write_behind_replay_on_another_worker_returns_the_first_id(client, run, monkeypatch):
+    import idempotency
+    from database import db
+    from routes import forms_routes
+    from write_behind import form_queue
+
+    monkeypatch.setattr(forms_routes, "FORMS_WRITE_BEHIND", True)
+    key = str(uuid.uuid4())
+    first = _submit(client, key, message="write-behind")
+    assert first.status_code == 200
+
+    # Another worker: it never saw the key
+    monkeypatch.setattr(forms_routes, "idempotency_keys", idempotency.IdempotencyKeys())
+    replay = _submit(client, key, message="write-behind")
+    assert replay.status_code == 200
+    assert replay.headers["idempotent-replayed"] == "true"
+    assert replay.json()["id"] == first.json()["id"]
+
+    run(form_queue.flush)
+    assert run(db.contact_forms.count_documents, {"message": "write-behind"}) == 1
+    assert run(db.contact_forms.find_one, {"message": "write-behind"})["_id"] == first.json()["id"]
@@ -0,0 +1,21 @@
+import hashlib
+
+
+def test_recount_includes_media_assets_and_is_safe_to_rerun(client, run):
+    import image_store
+    import upload_gc
+    from database import db
+
+    digest = hashlib.sha256(b"recount").hexdigest()
+    url = image_store.store_url(digest, ".png")
+    run(db.image_blobs.insert_one, {"_id": digest, "ext": ".png", "refs": 1})
+    run(db.gallery.insert_one, {"_id": "recount-item", "title_en": "t", "title_fr": "t", "image_url": url})
+    run(db.media_assets.insert_one, {"_id": "recount-asset", "key": "test.recount", "url": url + "?w=640"})
+
+    for _ in range(2):
+        run(upload_gc._count_store_refs, db, 100)
+        assert run(db.image_blobs.find_one, {"_id": digest})["refs"] == 2
+
+    run(db.gallery.delete_one, {"_id": "recount-item"})
+    run(db.media_assets.delete_one, {"_id": "recount-asset"})
+    run(db.image_blobs.delete_one, {"_id": digest})
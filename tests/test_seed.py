@@ -0,0 +1,53 @@
+import asyncio
+from datetime import datetime
+
+
+def test_losing_worker_waits_for_the_seed_and_caches_nothing_empty(client, run):
+    import database
+    import seed
+    from cache import content_cache
+
+    db = database.client["gosec_test_seed_race"]
+
+    async def race():
+        await db.client.drop_database(db.name)
+        lock_id = f"{seed.SEED_LOCK_ID}:{seed.seed_version()}"
+        # The first worker took the lock and has not inserted anything yet
+        await db.seed_state.insert_one({"_id": lock_id, "locked_at": datetime.utcnow()})
+        loser = asyncio.create_task(seed.seed_defaults(db))
+        await asyncio.sleep(seed.SEED_POLL_SECONDS * 3)
+        assert not loser.done(), "the losing worker started serving before the seed finished"
+
+        # The first worker finishes: its rows land and it records completion
+        await db.seed_state.delete_one({"_id": lock_id})
+        versions = {collection: content_cache.version(collection) for collection in seed._defaults}
+        assert await seed.seed_defaults(db) is True
+        for collection in seed._defaults:
+            assert content_cache.version(collection) > versions[collection], collection
+            assert await db[collection].count_documents({}) == len(seed._defaults[collection])
+
+        assert await asyncio.wait_for(loser, 5) is False
+        await db.client.drop_database(db.name)
+
+    run(race)
+
+
+def test_changed_seed_set_adds_only_new_defaults(client, run, monkeypatch):
+    import database
+    import seed
+
+    db = database.client["gosec_test_seed_versions"]
+    monkeypatch.setattr(seed, "_defaults", {"things": [{"_id": "a"}, {"_id": "b"}]})
+
+    async def releases():
+        await db.client.drop_database(db.name)
+        assert await seed.seed_defaults(db) is True
+        assert await seed.seed_defaults(db) is False
+        await db.things.delete_one({"_id": "a"})
+        # The next release adds a default; the one an admin deleted stays deleted
+        seed.register("things", [{"_id": "a"}, {"_id": "b"}, {"_id": "c"}])
+        assert await seed.seed_defaults(db) is True
+        assert sorted([doc["_id"] async for doc in db.things.find()]) == ["b", "c"]
+        await db.client.drop_database(db.name)
+
+    run(releases)
@@ -0,0 +1,51 @@
+import hashlib
+import os
+import time
+
+
+def _write(path, size, age):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"x" * size)
+    mtime = time.time() - age
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_sweep_reclaims_old_orphans_only(client, admin_headers, run):
+    import image_store
+    import metrics
+    import upload_gc
+    import uploads
+    from database import db
+
+    old = upload_gc.UPLOAD_GC_GRACE_SECONDS + 3600
+    gallery = image_store.UPLOAD_ROOT / "gallery"
+    old_orphan = _write(gallery / "gc-old-orphan.png", 100, old)
+    young_orphan = _write(gallery / "gc-young-orphan.png", 50, 0)
+    referenced = _write(gallery / "gc-referenced.png", 70, old)
+    orphan_digest = hashlib.sha256(b"gc-orphan").hexdigest()
+    kept_digest = hashlib.sha256(b"gc-kept").hexdigest()
+    stored_orphan = _write(image_store.blob_path(orphan_digest, ".png"), 30, old)
+    stored_kept = _write(image_store.blob_path(kept_digest, ".png"), 40, old)
+    run(db.gallery.insert_one, {
+        "_id": "gc-item", "title_en": "t", "title_fr": "t", "image_url": "/api/uploads/gallery/gc-referenced.png",
+    })
+    run(db.image_blobs.insert_one, {"_id": kept_digest, "ext": ".png", "refs": 1})
+    reclaimed = metrics.counter("uploads.reclaimed_bytes").value
+    try:
+        response = client.post("/api/admin/uploads/gc", headers=admin_headers)
+        assert response.status_code == 200, response.text
+        report = response.json()
+        assert report["orphans"] == 2
+        assert report["orphan_bytes"] == 100 + 30
+        assert report["scanned"] >= 5
+
+        run(uploads.drain_deletions, 5)
+        assert metrics.counter("uploads.reclaimed_bytes").value - reclaimed == 130
+        assert not old_orphan.exists() and not stored_orphan.exists()
+        assert young_orphan.exists() and referenced.exists() and stored_kept.exists()
+    finally:
+        run(db.gallery.delete_one, {"_id": "gc-item"})
+        run(db.image_blobs.delete_one, {"_id": kept_digest})
+        for path in (old_orphan, young_orphan, referenced, stored_orphan, stored_kept):
+            path.unlink(missing_ok=True)
@@ -0,0 +1,93 @@
+import asyncio
+import io
+from pathlib import Path
+
+import pytest
+from fastapi import HTTPException, UploadFile
+from PIL import Image
+
+import uploads
+
+STORE_DIR = uploads.UPLOAD_ROOT / "store"
+
+
+def _png(color=(10, 20, 30)) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (4, 4), color).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def _stored_files():
+    return sorted(p.name for p in STORE_DIR.rglob("*") if p.is_file())
+
+
+def _leftovers():
+    return [name for name in _stored_files() if name.endswith(".part")]
+
+
+def test_upload_is_moved_into_place_whole(client, admin_headers):
+    import image_store
+
+    body = _png((200, 0, 0))
+    response = client.post(
+        "/api/gallery/upload", files={"file": ("red.png", body, "image/png")}, headers=admin_headers
+    )
+    assert response.status_code == 200, response.text
+    final = image_store.blob_path(*image_store.parse_store_name(response.json()["filename"]))
+    assert final.read_bytes() == body
+    assert not _leftovers()
+
+
+def test_non_image_is_refused_without_leftovers(client, admin_headers):
+    before = _stored_files()
+    response = client.post(
+        "/api/gallery/upload",
+        files={"file": ("fake.png", b"fake_image_data_for_testing", "image/png")},
+        headers=admin_headers,
+    )
+    assert response.status_code == 400
+    assert _stored_files() == before
+    assert not _leftovers()
+
+
+def test_declared_oversize_body_is_refused(client, admin_headers):
+    before = _stored_files()
+    body = b"\x89PNG\r\n\x1a\n" + b"\0" * uploads.UPLOAD_MAX_BYTES
+    response = client.post(
+        "/api/gallery/upload", files={"file": ("big.png", body, "image/png")}, headers=admin_headers
+    )
+    assert response.status_code == 413
+    assert _stored_files() == before
+
+
+def test_streamed_oversize_body_is_cut_off(client, admin_headers):
+    before = _stored_files()
+    boundary = "gosec-test-boundary"
+    head = (
+        f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"big.png\"\r\n"
+        "Content-Type: image/png\r\n\r\n"
+    ).encode() + b"\x89PNG\r\n\x1a\n"
+
+    def chunks():
+        # No Content-Length: the limit has to be enforced as the body arrives
+        yield head
+        for _ in range(uploads.UPLOAD_MAX_REQUEST_BYTES // (1024 * 1024) + 2):
+            yield b"\0" * (1024 * 1024)
+        yield f"\r\n--{boundary}--\r\n".encode()
+
+    response = client.post(
+        "/api/gallery/upload",
+        content=chunks(),
+        headers={**admin_headers, "Content-Type": f"multipart/form-data; boundary={boundary}"},
+    )
+    assert response.status_code == 413
+    assert _stored_files() == before
+    assert not _leftovers()
+
+
+def test_stream_upload_discards_its_temp_file_on_rejection(tmp_path: Path):
+    upload = UploadFile(io.BytesIO(b"not an image"), filename="x.png")
+    with pytest.raises(HTTPException) as refused:
+        asyncio.run(uploads.stream_upload(upload, tmp_path))
+    assert refused.value.status_code == 400
+    assert list(tmp_path.iterdir()) == []
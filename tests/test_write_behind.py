@@ -0,0 +1,72 @@
+import uuid
+from datetime import datetime
+
+
+def _queue(directory):
+    from routes.forms_routes import contact_repo
+    from write_behind import WriteBehindQueue
+
+    queue = WriteBehindQueue(directory, batch_size=500, interval=3600)
+    queue.register(contact_repo)
+    return queue
+
+
+def _submission(tag: str, number: int) -> dict:
+    return {
+        "first_name": "Journal",
+        "last_name": str(number),
+        "email": "journal@example.com",
+        "message": tag,
+        "created_at": datetime.utcnow(),
+    }
+
+
+def _crash(queue):
+    """What a killed worker leaves: the journal on disk, its lock released"""
+    queue._active.file.close()
+
+
+def test_journal_of_a_crashed_worker_is_inserted_exactly_once(client, run, tmp_path):
+    from routes.forms_routes import contact_repo
+    from database import db
+
+    tag = f"replay-{uuid.uuid4()}"
+    crashed = _queue(tmp_path)
+    docs = [run(crashed.submit, contact_repo, _submission(tag, number)) for number in range(3)]
+    # The first document made it into MongoDB before the crash; the journal was not deleted yet
+    run(db.contact_forms.insert_one, {**_submission(tag, 0), "_id": docs[0]["id"]})
+    _crash(crashed)
+
+    restarted = _queue(tmp_path)
+    run(restarted.start)
+    run(restarted.stop)
+
+    stored = run(lambda: db.contact_forms.find({"message": tag}).to_list(None))
+    assert sorted(doc["_id"] for doc in stored) == sorted(doc["id"] for doc in docs)
+    assert list(tmp_path.iterdir()) == []
+
+    # A second restart finds nothing left to replay
+    again = _queue(tmp_path)
+    run(again.start)
+    run(again.stop)
+    assert run(db.contact_forms.count_documents, {"message": tag}) == 3
+
+
+def test_a_running_workers_journal_is_not_replayed_by_another(client, run, tmp_path):
+    from routes.forms_routes import contact_repo
+    from database import db
+
+    tag = f"locked-{uuid.uuid4()}"
+    running = _queue(tmp_path)
+    run(running.submit, contact_repo, _submission(tag, 0))
+
+    starting = _queue(tmp_path)
+    run(starting.start)
+    run(starting.stop)
+    # The segment is still flock'd by the running worker, so it is left to that worker
+    assert run(db.contact_forms.count_documents, {"message": tag}) == 0
+    assert len(list(tmp_path.glob("journal-*.ndjson"))) == 1
+
+    assert run(running.flush) == 1
+    assert run(db.contact_forms.count_documents, {"message": tag}) == 1
+    assert list(tmp_path.iterdir()) == []